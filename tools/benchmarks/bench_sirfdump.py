@@ -0,0 +1,182 @@
+'''tagbench: sirfdump get_record/hunt and sirf decoders'''
+
+# Copyright (c) 2018 Eric B. Decker, Daniel J. Maltbie
+# All rights reserved.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# See COPYING in the top level directory of this source tree.
+#
+# Contact: Eric B. Decker <cire831@gmail.com>
+#          Daniel J. Maltbie <dmaltbie@daloma.org>
+
+# sirfbin inputs are built from tagsynth's sirf payloads.  The clean
+# stream is packets back to back.  The noisy stream used for hunt puts
+# NOISE_LEN bytes of junk (never 0xa0) in front of every packet, so
+# every packet has to be hunted for.
+
+import random
+import struct
+
+from   sirfdump               import sirfdump as sd
+from   tagdump.tagfile        import TagFile
+from   tagdump.tagsynth       import TagSynth
+from   tagdump.tagsynth       import sirf_packet
+from   tagdump.sirf_defs      import SIRF_HDR_SIZE
+from   tagdump.sirf_headers   import sirf_navtrk_obj
+from   tagdump.sirf_decoders  import decode_sirf_navtrk
+from   tagdump.sirf_decoders  import decode_sirf_table
+from   tagdump.sirf_tables    import sirf_nl_meas_obj
+from   tagdump.sirf_framer    import SirfFramer
+
+from   bench_tagdump          import temp_path
+from   bench_tagdump          import SEED
+
+NOISE_LEN = 64
+
+_streams = {}
+
+
+def sirf_packets(size):
+    '''list of (mid, packet) adding up to about size bytes'''
+    ts   = TagSynth(None, seed = SEED)
+    pkts = []
+    total = 0
+    while total < size:
+        mid = ts._pick(ts.mid_mix)
+        pkt = sirf_packet(mid, ts.sirf_payload(mid))
+        pkts.append((mid, pkt))
+        total += len(pkt)
+    return pkts
+
+
+def sirf_stream(size, noise = 0):
+    '''(path, packet count) of a sirfbin stream, generated once'''
+    key = (size, noise)
+    if key not in _streams:
+        rnd  = random.Random(SEED)
+        path = temp_path('.sirf')
+        pkts = sirf_packets(size)
+        with open(path, 'wb') as out:
+            for mid, pkt in pkts:
+                if noise:
+                    out.write(bytearray([ rnd.randint(0, 0x9f)
+                                          for i in range(noise) ]))
+                out.write(pkt)
+        _streams[key] = (path, len(pkts))
+    return _streams[key]
+
+
+def setup_get_record(size):
+    return sirf_stream(size)
+
+
+def run_get_record(state):
+    path, npkts = state
+    sd.init_globals()
+    fd     = open(path, 'rb')
+    infile = TagFile(fd)
+    records = nbytes = 0
+    while (True):
+        rec_offset, rlen, mid, rec_buf = sd.get_record(infile)
+        if rec_offset < 0:
+            break
+        records += 1
+        nbytes  += rlen
+    fd.close()
+    return records, nbytes
+
+
+def setup_hunt(size):
+    return sirf_stream(size, NOISE_LEN)
+
+
+def run_hunt(state):
+    '''hunt from SOP to SOP across the noisy stream'''
+    path, npkts = state
+    sd.init_globals()
+    fd     = open(path, 'rb')
+    infile = TagFile(fd)
+    offset = 0
+    for i in range(npkts):
+        offset = sd.hunt(infile, offset)
+        if offset < 0:
+            break
+        offset += 2
+    nbytes = infile.tell()
+    fd.close()
+    return sd.num_hunt, nbytes
+
+
+def setup_framer(size):
+    '''noisy stream in 4K pieces, like reads off a serial port'''
+    path, npkts = sirf_stream(size, NOISE_LEN)
+    data = open(path, 'rb').read()
+    return [ data[i:i + 4096] for i in range(0, len(data), 4096) ]
+
+
+def run_framer(chunks):
+    framer = SirfFramer()
+    packets = 0
+    for chunk in chunks:
+        packets += len(framer.feed(chunk))
+    return packets, framer.offset()
+
+
+def setup_navtrk(size):
+    '''MID 4 payloads (past the mid) as the decoder sees them'''
+    return [ pkt[SIRF_HDR_SIZE + 1:] for mid, pkt in sirf_packets(size)
+             if mid == 4 ]
+
+
+def run_navtrk(bufs):
+    nbytes = 0
+    for buf in bufs:
+        decode_sirf_navtrk(0, 0, buf, sirf_navtrk_obj)
+        nbytes += len(buf)
+    return len(bufs), nbytes
+
+
+def setup_nl_meas(size):
+    '''MID 28 payloads (past the mid, with chksum/eop), tagsynth has none'''
+    rnd  = random.Random(SEED)
+    bufs = []
+    total = 0
+    while total < size:
+        cno = [ rnd.randint(20, 45) for i in range(10) ]
+        buf = struct.pack('>BIBQQIQHB10BHHHBB', rnd.randint(0, 11),
+                          rnd.getrandbits(32), rnd.randint(1, 32),
+                          rnd.getrandbits(64), rnd.getrandbits(64),
+                          rnd.getrandbits(32), rnd.getrandbits(64),
+                          rnd.randint(0, 1000), 0x17, *(cno + [ 100, 0, 0, 0, 0 ])) \
+              + '\x00\x00\xb0\xb3'
+        bufs.append(buf)
+        total += len(buf) + SIRF_HDR_SIZE + 1
+    return bufs
+
+
+def run_nl_meas(bufs):
+    nbytes = 0
+    for buf in bufs:
+        decode_sirf_table(0, 0, buf, sirf_nl_meas_obj)
+        nbytes += len(buf)
+    return len(bufs), nbytes
+
+
+benches = [
+    ('sirfdump.get_record',       setup_get_record, run_get_record),
+    ('sirfdump.hunt',             setup_hunt,       run_hunt),
+    ('sirf.framer',               setup_framer,     run_framer),
+    ('sirf.decode_sirf_navtrk',   setup_navtrk,     run_navtrk),
+    ('sirf.decode_sirf_table',    setup_nl_meas,    run_nl_meas),
+]
@@ -0,0 +1,105 @@
+'''tagbench: tagdump/sirfdump startup time'''
+
+# Copyright (c) 2018 Eric B. Decker, Daniel J. Maltbie
+# All rights reserved.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# See COPYING in the top level directory of this source tree.
+#
+# Contact: Eric B. Decker <cire831@gmail.com>
+#          Daniel J. Maltbie <dmaltbie@daloma.org>
+
+# Scripts run tagdump over and over on small files, there start up is
+# most of the cost.  Each run starts the tool RUNS times as a fresh
+# python process, a record is one invocation (rec/s is invocations per
+# second).  SIZE is ignored, the inputs are always small:
+#
+#   version     tagdump --version, imports only.
+#   small       a SMALL_SIZE stream without GPS records (core decoders
+#               only).
+#   small_gps   a SMALL_SIZE stream with the normal mix (core and sirf).
+#   sirfdump    sirfdump on a SMALL_SIZE sirfbin stream.
+#
+# import_ms (extra) is the time to import the tagdump module in a fresh
+# process, without interpreter start up.
+
+import os
+import sys
+import subprocess
+
+from   tagdump.tagsynth import TagSynth
+from   tagdump.tagsynth import DEFAULT_MIX
+
+from   bench_tagdump    import temp_path
+from   bench_tagdump    import SEED
+from   bench_sirfdump   import sirf_stream
+
+RUNS       = 10
+SMALL_SIZE = 16 * 1024
+
+TOOLS = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ENV   = dict(os.environ)
+ENV['PYTHONPATH'] = os.pathsep.join(
+    [ os.path.join(TOOLS, 'utils', 'tagdump'),
+      os.path.join(TOOLS, 'utils', 'sirfdump') ] +
+    [ p for p in [ os.environ.get('PYTHONPATH') ] if p ])
+
+IMPORT_TIME = 'import time; t = time.time(); import tagdump.tagdump; ' \
+              'print((time.time() - t) * 1000)'
+
+
+def small_stream(gps):
+    '''small DBLK stream, with or without GPS_RAW records'''
+    path = temp_path('.dblk')
+    mix  = dict(DEFAULT_MIX)
+    if not gps:
+        del mix['GPS_RAW']
+    with open(path, 'wb') as out:
+        TagSynth(out, seed = SEED, mix = mix).generate(SMALL_SIZE)
+    return path
+
+
+def invoke(argv):
+    with open(os.devnull, 'w') as null:
+        subprocess.check_call([ sys.executable ] + argv, env = ENV,
+                              stdout = null, stderr = null)
+
+
+def import_ms():
+    return float(subprocess.check_output(
+        [ sys.executable, '-c', IMPORT_TIME ], env = ENV))
+
+
+def runner(argv, path = None):
+    '''run function: start the tool RUNS times'''
+    def run(state):
+        nbytes = 0
+        for i in range(RUNS):
+            invoke(argv + ([ state ] if state else []))
+            if state:
+                nbytes += os.path.getsize(state)
+        return RUNS, nbytes, { 'import_ms': round(import_ms(), 1) }
+    return run
+
+
+benches = [
+    ('startup.tagdump.version',
+         lambda size: None,                     runner([ '-m', 'tagdump', '--version' ])),
+    ('startup.tagdump.small',
+         lambda size: small_stream(False),      runner([ '-m', 'tagdump' ])),
+    ('startup.tagdump.small_gps',
+         lambda size: small_stream(True),       runner([ '-m', 'tagdump' ])),
+    ('startup.sirfdump.small',
+         lambda size: sirf_stream(SMALL_SIZE)[0], runner([ '-m', 'sirfdump' ])),
+]
@@ -0,0 +1,155 @@
+'''tagbench: tagdump get_record, resync and dt_records decoders'''
+
+# Copyright (c) 2018 Eric B. Decker, Daniel J. Maltbie
+# All rights reserved.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# See COPYING in the top level directory of this source tree.
+#
+# Contact: Eric B. Decker <cire831@gmail.com>
+#          Daniel J. Maltbie <dmaltbie@daloma.org>
+
+# Inputs are tagsynth streams written to temp files, one per (size,
+# corruption) and shared by all benches that want the same stream.
+# resync is measured by walking streams with increasing bit flip
+# densities (flips per MB), each flip costs a chksum failure and a
+# resync.
+#
+# The decode benches use their own stream, the default mix plus SENSOR
+# records, so every rtype tagsynth can lay down has a decoder bench.
+# The rtypes it can't make (DEBUG, GPS_TIME, NOTE, ...) all use
+# decode_default, which the REBOOT, SYNC and SENSOR benches cover.
+
+import os
+import atexit
+import tempfile
+
+from   tagdump          import tagdump  as td
+from   tagdump.tagfile  import TagFile
+from   tagdump.tagsynth import TagSynth
+from   tagdump.tagsynth import DEFAULT_MIX
+from   tagdump.dt_defs  import *
+import tagdump.dt_defs  as     dtd
+from   tagdump.dt_defs  import dt_name
+
+# populate dt_records (decoders)
+import tagdump.tagdump_config
+
+SEED          = 1
+RESYNC_FLIPS  = [ 1, 10, 100 ]          # bit flips per MB
+DECODE_RTYPES = [ DT_REBOOT, DT_VERSION, DT_SYNC, DT_EVENT,
+                  DT_GPS_RAW_SIRFBIN, DT_SENSOR_DATA, DT_SENSOR_SET ]
+DECODE_MIX    = dict(DEFAULT_MIX, SENSOR = 40)
+
+_tmp_files = []
+_streams   = {}
+_records   = {}
+
+
+def _cleanup():
+    for path in _tmp_files:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+atexit.register(_cleanup)
+
+
+def temp_path(suffix):
+    '''a temp file that goes away when we exit'''
+    fd, path = tempfile.mkstemp(prefix = 'tagbench_', suffix = suffix)
+    os.close(fd)
+    _tmp_files.append(path)
+    return path
+
+
+def synth_stream(size, flips = 0, mix = None):
+    '''path of a synthetic DBLK stream, generated once per (size, flips, mix)'''
+    key = (size, flips, tuple(sorted(mix.items())) if mix else None)
+    if key not in _streams:
+        path = temp_path('.dblk')
+        with open(path, 'wb') as out:
+            TagSynth(out, seed = SEED, flips = flips, mix = mix).generate(size)
+        _streams[key] = path
+    return _streams[key]
+
+
+def walk(path):
+    '''get_record over a whole stream, returns (records, bytes, resyncs)'''
+    td.init_globals()
+    fd     = open(path, 'rb')
+    infile = TagFile(fd)
+    infile.seek(td.DBLK_DIR_SIZE)
+    records = nbytes = 0
+    while (True):
+        rec_offset, hdr, rec_buf = td.get_record(infile)
+        if (rec_offset < 0):
+            break
+        records += 1
+        nbytes  += len(rec_buf)
+    fd.close()
+    return records, nbytes, td.num_resyncs
+
+
+def stream_records(size):
+    '''rtype -> list of (offset, rec_buf) from the clean decode stream'''
+    if size not in _records:
+        recs = {}
+        td.init_globals()
+        fd     = open(synth_stream(size, mix = DECODE_MIX), 'rb')
+        infile = TagFile(fd)
+        infile.seek(td.DBLK_DIR_SIZE)
+        while (True):
+            rec_offset, hdr, rec_buf = td.get_record(infile)
+            if (rec_offset < 0):
+                break
+            recs.setdefault(hdr['type'].val, []).append((rec_offset, rec_buf))
+        fd.close()
+        _records[size] = recs
+    return _records[size]
+
+
+def run_get_record(path):
+    records, nbytes, resyncs = walk(path)
+    return records, nbytes
+
+
+def resync_bench(flips):
+    def setup(size):
+        return synth_stream(size, flips)
+    def run(path):
+        records, nbytes, resyncs = walk(path)
+        return records, nbytes, { 'resyncs': resyncs,
+                                  'chksum_errors': td.chksum_errors }
+    return ('tagdump.resync.flips_{}'.format(flips), setup, run)
+
+
+def decode_bench(rtype):
+    def setup(size):
+        v = dtd.dt_records[rtype]
+        return (v[DTR_DECODER], v[DTR_OBJ], stream_records(size).get(rtype, []))
+    def run(state):
+        decode, obj, recs = state
+        nbytes = 0
+        for rec_offset, rec_buf in recs:
+            decode(0, rec_offset, rec_buf, obj)
+            nbytes += len(rec_buf)
+        return len(recs), nbytes
+    return ('tagdump.decode.{}'.format(dt_name(rtype)), setup, run)
+
+
+benches = [ ('tagdump.get_record', synth_stream, run_get_record) ] + \
+          [ resync_bench(f) for f in RESYNC_FLIPS ] + \
+          [ decode_bench(r) for r in DECODE_RTYPES ]
@@ -0,0 +1,91 @@
+'''tagbench: TagTlvList parse/build'''
+
+# Copyright (c) 2018 Daniel J. Maltbie, Eric B. Decker
+# All rights reserved.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# See COPYING in the top level directory of this source tree.
+#
+# Contact: Daniel J. Maltbie <dmaltbie@daloma.org>
+#          Eric B. Decker <cire831@gmail.com>
+
+# tagtlv needs future and enum34.  If they aren't around the tagtlv
+# benches are skipped (benches is empty, skipped says why).
+#
+# Inputs are tagnet names like the ones tagfuse uses to pull DBLK data,
+# /<node_id>/tag/sd/0/dblk/0/<offset>/<size>, one per 512 byte block of
+# the size asked for.  A record is one name.
+
+import random
+
+try:
+    from tagtlv import TagTlvList
+    from tagtlv import tlv_types
+except ImportError:
+    TagTlvList = None
+
+from   bench_tagdump  import SEED
+
+BLOCK = 512
+
+
+def tlv_names(size):
+    rnd   = random.Random(SEED)
+    names = []
+    for off in range(0, size, BLOCK):
+        names.append(TagTlvList([
+            (tlv_types.NODE_ID, bytearray(b'\x00\x00\x00\x00\x00\x01')),
+            (tlv_types.STRING,  'tag'),
+            (tlv_types.STRING,  'sd'),
+            (tlv_types.INTEGER, 0),
+            (tlv_types.STRING,  'dblk'),
+            (tlv_types.INTEGER, 0),
+            (tlv_types.OFFSET,  off),
+            (tlv_types.SIZE,    rnd.randint(1, BLOCK)),
+        ]))
+    return names
+
+
+def setup_build(size):
+    return tlv_names(size)
+
+
+def run_build(names):
+    nbytes = 0
+    for name in names:
+        nbytes += len(name.build())
+    return len(names), nbytes
+
+
+def setup_parse(size):
+    return [ name.build() for name in tlv_names(size) ]
+
+
+def run_parse(bufs):
+    nbytes = 0
+    for buf in bufs:
+        TagTlvList(buf)
+        nbytes += len(buf)
+    return len(bufs), nbytes
+
+
+benches = []
+skipped = None
+if TagTlvList is None:
+    skipped = 'tagtlv deps missing (future, enum34)'
+else:
+    benches = [
+        ('tagtlv.TagTlvList.build',   setup_build, run_build),
+        ('tagtlv.TagTlvList.parse',   setup_parse, run_parse),
+    ]
@@ -0,0 +1,255 @@
+#!/usr/bin/env python2
+'''tagbench - throughput benchmarks for the tag data parsers'''
+
+# Copyright (c) 2018 Eric B. Decker, Daniel J. Maltbie
+# All rights reserved.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# See COPYING in the top level directory of this source tree.
+#
+# Contact: Eric B. Decker <cire831@gmail.com>
+#          Daniel J. Maltbie <dmaltbie@daloma.org>
+
+####
+#
+# tagbench: measure records/s and MB/s of the tagdump, sirfdump and
+# tagtlv hot paths.  No network or hardware needed, all inputs are
+# generated (tagsynth) into temporary files.
+#
+# usage: tagbench.py [-h] [-s SIZE] [-r REPEAT] [-k MATCH] [-l]
+#                    [-o OUTPUT] [-b BASELINE] [-t THRESHOLD]
+#
+#   -s SIZE         approximate size of each generated input, k/m/g
+#                   suffixes allowed.  (args.size, default 1m)
+#   -r REPEAT       run each benchmark REPEAT times, keep the best.
+#                   (args.repeat, default 3)
+#   -k MATCH        only run benchmarks whose name contains MATCH,
+#                   comma separated.  (args.match)
+#   -l              list benchmarks and exit
+#
+#   -o OUTPUT       write results as json.  (args.output)
+#   -b BASELINE     compare against a saved json result.  (args.baseline)
+#   -t THRESHOLD    percent slower than the baseline (records/s) that
+#                   counts as a regression.  (args.threshold, default 10)
+#
+# exit status is 1 if any benchmark regressed against the baseline.
+#
+# Each bench_* module exports benches, a list of (name, setup, run), and
+# may export skipped, why some of its benches can't run here (missing
+# deps).  Skipped modules get a line in the output, not silence.
+# setup(size) builds the input (not timed) and returns the state handed
+# to run(state).  run returns (records, bytes) processed and may return
+# a third element, a dict of extra counters (resyncs etc) that are kept
+# in the results.  Anything the code under test prints is thrown away.
+
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+
+# the tools under test are not necessarily installed.  run them out of
+# the source tree.
+TOOLS = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for p in [ os.path.join(TOOLS, 'utils', 'tagdump'),
+           os.path.join(TOOLS, 'utils', 'sirfdump'),
+           os.path.join(TOOLS, 'tagnet', 'factspp', 'factspp') ]:
+    if p not in sys.path:
+        sys.path.insert(0, p)
+
+__version__ = '0.0.2'
+
+bench_modules = [ 'bench_tagdump', 'bench_sirfdump', 'bench_tagtlv',
+                  'bench_startup' ]
+
+
+def auto_size(x):
+    '''size with optional k, m, g suffix'''
+    mult = { 'k': 1 << 10, 'm': 1 << 20, 'g': 1 << 30 }
+    x = x.lower()
+    if x and x[-1] in mult:
+        return int(float(x[:-1]) * mult[x[-1]])
+    return int(x, 0)
+
+
+class Quiet(object):
+    '''throw away stdout while the code under test runs'''
+    def __enter__(self):
+        self.saved  = sys.stdout
+        sys.stdout  = open(os.devnull, 'w')
+        return self
+
+    def __exit__(self, *exc):
+        sys.stdout.close()
+        sys.stdout  = self.saved
+        return False
+
+
+def cpu_time():
+    t = os.times()
+    return t[0] + t[1]
+
+
+def collect(match = None):
+    '''
+    pull benches from all bench modules, filtered by match.
+
+    returns (benches, skipped), skipped is a list of (module, why).
+    '''
+    benches = []
+    skipped = []
+    for name in bench_modules:
+        m = __import__(name)
+        benches.extend(m.benches)
+        if getattr(m, 'skipped', None):
+            skipped.append((name, m.skipped))
+    if match:
+        keys = [ k.strip() for k in match.split(',') if k.strip() ]
+        benches = [ b for b in benches if any([ k in b[0] for k in keys ]) ]
+    return benches, skipped
+
+
+def run_bench(name, setup, run, size, repeat):
+    '''run one bench repeat times, return the result dict of the best'''
+    with Quiet():
+        state = setup(size)
+    best = None
+    for i in range(repeat):
+        with Quiet():
+            c0  = cpu_time()
+            t0  = time.time()
+            out = run(state)
+            t1  = time.time()
+            c1  = cpu_time()
+        wall = max(t1 - t0, 1e-9)
+        if best is None or wall < best['wall']:
+            best = { 'records': out[0], 'bytes': out[1],
+                     'wall': wall, 'cpu': c1 - c0,
+                     'rec_s': out[0] / wall,
+                     'mb_s':  out[1] / wall / (1 << 20) }
+            if len(out) > 2:
+                best['extra'] = out[2]
+    return best
+
+
+title0  = '{:40s} {:>9} {:>10} {:>12} {:>9} {:>8}'
+result0 = '{:40s} {:9d} {:10d} {:12.1f} {:9.2f} {:8.3f}'
+
+def display(results):
+    print(title0.format('bench', 'records', 'bytes', 'rec/s', 'MB/s', 'wall'))
+    for name in sorted(results.keys()):
+        r = results[name]
+        print(result0.format(name, r['records'], r['bytes'], r['rec_s'],
+                             r['mb_s'], r['wall'])),
+        if r.get('extra'):
+            print(' {}'.format(' '.join([ '{}: {}'.format(k, v) for k, v in
+                                          sorted(r['extra'].items()) ]))),
+        print
+
+
+cmp0 = '{:40s} {:>12} {:>12} {:>8}  {}'
+cmp1 = '{:40s} {:12.1f} {:12.1f} {:+7.1f}%  {}'
+
+def compare(results, baseline, threshold):
+    '''
+    compare results against a baseline (both name -> result dicts).
+
+    returns list of names that regressed by more than threshold percent
+    (records/s).
+    '''
+    regressed = []
+    print(cmp0.format('bench', 'base rec/s', 'rec/s', 'delta', '').rstrip())
+    for name in sorted(results.keys()):
+        cur  = results[name]
+        base = baseline.get(name)
+        if base is None:
+            print('{:40s} {:>12} {:12.1f}'.format(name, '-', cur['rec_s']))
+            continue
+        delta = (cur['rec_s'] / base['rec_s'] - 1.0) * 100 if base['rec_s'] else 0
+        flag = ''
+        if delta < -threshold:
+            flag = '*** REGRESSION'
+            regressed.append(name)
+        print(cmp1.format(name, base['rec_s'], cur['rec_s'], delta, flag).rstrip())
+    for name in sorted(baseline.keys()):
+        if name not in results:
+            print('{:40s} {:12.1f} {:>12}'.format(name, baseline[name]['rec_s'], '-'))
+    return regressed
+
+
+def parseargs():
+    parser = argparse.ArgumentParser(
+        description='tagdump/sirfdump/tagtlv throughput benchmarks')
+    parser.add_argument('-V', '--version', action='version',
+                        version='%(prog)s ' + __version__)
+    parser.add_argument('-s', '--size', type=auto_size, default=1 << 20,
+                        help='size of generated inputs (k/m/g), default 1m')
+    parser.add_argument('-r', '--repeat', type=int, default=3,
+                        help='runs per benchmark, best is kept')
+    parser.add_argument('-k', '--match',
+                        help='only benchmarks containing MATCH (comma separated)')
+    parser.add_argument('-l', '--list', action='store_true',
+                        help='list benchmarks and exit')
+    parser.add_argument('-o', '--output', type=argparse.FileType('w'),
+                        help='write json results')
+    parser.add_argument('-b', '--baseline', type=argparse.FileType('r'),
+                        help='compare against saved json results')
+    parser.add_argument('-t', '--threshold', type=float, default=10.0,
+                        help='regression threshold, percent (default 10)')
+    return parser.parse_args()
+
+
+def main():
+    args    = parseargs()
+    benches, skipped = collect(args.match)
+    for name, why in skipped:
+        sys.stderr.write('*** {}: skipped: {}\n'.format(name, why))
+    if args.list:
+        for b in benches:
+            print(b[0])
+        return 0
+
+    results = {}
+    for name, setup, run in benches:
+        sys.stderr.write('  {}\n'.format(name))
+        results[name] = run_bench(name, setup, run, args.size, args.repeat)
+
+    display(results)
+    for name, why in skipped:
+        print('{:40s} skipped: {}'.format(name, why))
+    doc = { 'tagbench': __version__,
+            'python':   platform.python_version(),
+            'machine':  platform.machine(),
+            'date':     time.strftime('%Y/%m/%d-%H:%M:%S'),
+            'size':     args.size,
+            'repeat':   args.repeat,
+            'results':  results }
+    if args.output:
+        json.dump(doc, args.output, indent = 2, sort_keys = True)
+        args.output.close()
+
+    if args.baseline:
+        base = json.load(args.baseline)
+        print
+        regressed = compare(results, base.get('results', {}), args.threshold)
+        if regressed:
+            print
+            print('*** {} regressions: {}'.format(len(regressed),
+                                                 ' '.join(regressed)))
+            return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
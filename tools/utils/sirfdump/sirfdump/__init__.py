@@ -5,5 +5,15 @@ sirfdump:  decode and display sirfbin messages
 
 # 0.0.1         Initial version
 # 0.1.0         Initial release
+# 0.1.1         --profile/--pstats, buffered output
+# 0.1.2         hunt scans 64K chunks with find, validates SOP candidates
+#               in place (len, EOP, checksum).  no TypeError at EOF.
+# 0.1.3         --live DEV, live capture from a tty/pty through a ring
+#               buffer.  sirflive replay, pty stand-in at a given baud.
+# 0.1.4         --stats, per mid/sid counts, bytes, rates, inter-arrival
+#               percentiles, error densities.  no decode/emit.
+# 0.1.5         framing moved to tagdump.sirf_framer (SirfFramer).  live and
+#               --stats frame with it, no seeks.
+# 0.1.6         --mids/--sids, lookup table filter right after framing.
 
-__version__ = '0.1.0'
+__version__ = '0.1.6'
@@ -25,29 +25,39 @@
 #   1   basic record display - more details
 #   2   detailed record display
 #   3   dump packet buffer
-#   4   details of rehunt (look for new SOP)
+#   4   details of rehunt (look for new SOP), ascii column in dumps
 #   5   other errors and decoder/header versions
 
 import sys
 import struct
+import cProfile
 
 from   tagdump.sirf_defs        import *
 import tagdump.sirf_defs        as     sirf
 import tagdump.tagfile          as     tf
 from   tagdump.misc_utils       import dump_buf
 from   tagdump.sirf_headers     import mids_w_sids
+from   tagdump.stageprof        import StageProfile
+from   tagdump.stageprof        import ProfFile
+from   tagdump.sirf_framer      import sop_valid
+from   tagdump.sirf_framer      import SOP_STR
+from   tagdump.sirf_framer      import SirfFramer
+from   tagdump.sirf_framer      import frame_file
+import tagdump.outbuf           as     outbuf
 
 from   sirfdumpargs             import parseargs
 
-# import configuration, which will populate decode/emitter trees.
+# import configuration, which registers the decode/emitter populators.
+# they get pulled in on first use.
 import sirfdump_config
 
 from   __init__                 import __version__   as VERSION
 from   tagdump.decode_base      import __version__   as db_ver
 from   tagdump.sirf_defs        import __version__   as sb_ver
-from   tagdump.sirf_decoders    import __version__   as sd_ver
-from   tagdump.sirf_emitters    import __version__   as se_ver
 from   tagdump.sirf_headers     import __version__   as sh_ver
+from   tagdump.stageprof        import __version__   as sp_ver
+from   tagdump.outbuf           import __version__   as ob_ver
+from   tagdump.registry         import __version__   as rg_ver
 
 ver_str = '\nsirfdump: ' + VERSION
 
@@ -59,8 +69,9 @@ ver_str = '\nsirfdump: ' + VERSION
 # readable output.
 #
 # usage: sirfdump.py [-h] [-v] [-V] [-j JUMP] [-x EndFilePos]
-#                    [-D] [-n num_recs]
-#                    input
+#                    [-D] [-n num_recs] [--mids MIDS] [--sids SIDS] [--stats]
+#                    [--live DEV [-b BAUD] [--ring SIZE]]
+#                    [input]
 #
 # Args:
 #
@@ -88,6 +99,33 @@ ver_str = '\nsirfdump: ' + VERSION
 #   -w              wide summary
 #                   (args.wide)
 #
+#   --mids MIDS     only packets with these mids, comma separated
+#                   (args.mids, list of ints)
+#   --sids SIDS     only these sids, for mids that have a sid (mids_w_sids).
+#                   mids without a sid are not affected.
+#                   (args.sids, list of ints)
+#
+#                   the filters are checked as soon as a packet is framed.
+#                   a packet filtered out is not counted, decoded or
+#                   displayed.  they apply to --stats and --live too.
+#
+#   --stats         statistics only, no decode or display.  per mid/sid
+#                   counts, bytes, rates, inter-arrival percentiles and
+#                   error densities, see sirfstats.py.  (args.stats)
+#
+#   --live DEV      read from a tty/pty instead of input, see sirflive.py
+#                   (args.live)
+#   -b BAUD         baud rate for --live, default 57600 (args.baud)
+#   --ring SIZE     --live ring buffer size, default 64K (args.ring)
+#
+#   --profile       accumulate wall/cpu time per stage (read, hdr, chksum,
+#                   hunt, decode, emit), decode per mid and emit per
+#                   emitter.  see tagdump/stageprof.py.
+#                   (args.profile, boolean)
+#
+#   --pstats FILE   run under cProfile and dump pstats to FILE.
+#                   (args.pstats)
+#
 # positional parameters:
 #
 #   input:          file to process.  (args.input)
@@ -98,6 +136,7 @@ ver_str = '\nsirfdump: ' + VERSION
 #
 verbose                 = 0             # how chatty to be
 debug                   = 0             # extra debug chatty
+prof                    = None          # StageProfile if --profile
 
 MAX_ZERO_HDRS           = 4096          # 4K bytes of zero
 
@@ -107,20 +146,30 @@ chksum_errors           = 0             # checksum errors seen
 unk_mids                = 0             # unknown record types
 total_records           = 0
 total_bytes             = 0
+num_filtered            = 0             # framed but filtered out
+
+# --mids/--sids, see set_filters
+mid_filter              = None
+sid_filter              = None
 
 def init_globals():
-    global verbose, debug
+    global verbose, debug, prof
     global num_hunt, chksum_errors, unk_mids
-    global total_records, total_bytes
+    global total_records, total_bytes, num_filtered
+    global mid_filter, sid_filter
 
     verbose             = 0
     debug               = 0
+    prof                = None
 
     num_hunt            = 0             # how often we've hunted for start
     chksum_errors       = 0             # checksum errors seen
     unk_mids            = 0             # unknown record types
     total_records       = 0
     total_bytes         = 0
+    num_filtered        = 0
+    mid_filter          = None
+    sid_filter          = None
 
 
 def hunt(fd, offset):
@@ -133,44 +182,79 @@ def hunt(fd, offset):
     returns: offset     where we found the new start
     '''
 
+    if not prof:
+        return _hunt(fd, offset)
+    prof.start()
+    try:
+        return _hunt(fd, offset)
+    finally:
+        prof.stop('hunt')
+
+
+# hunt reads HUNT_CHUNK bytes at a time and looks for SOP with find.
+# Each candidate is checked in place, len, EOP and checksum, and only a
+# whole valid packet stops the hunt.  A false SOP in the noise (0xa0a2
+# inside junk or inside a damaged packet) is stepped over without going
+# back through get_record.  A candidate that runs off the end of the
+# data (EOF) is handed back as is, get_record will complain about it.
+#
+# carry holds the tail of the previous chunk so an SOP or a run of
+# zeros split across two chunks is still seen.
+
+HUNT_CHUNK              = 64 * 1024
+ZERO_RUN                = '\x00' * (MAX_ZERO_HDRS + 2)
+
+
+def _hunt(fd, offset):
     global num_hunt
 
     print('*** hunt started @{0} (0x{0:x})'.format(offset))
     fd.seek(offset)
     num_hunt += 1
-    zero_hdrs = 0
-    accum     = 0
+    carry = ''
+    base  = offset                      # file offset of buf[0]
     while (True):
-        offset = fd.tell()
         try:
-            byte   = fd.read(1)          # get next byte
-            accum  = (accum & 0xff) << 8 | ord(byte)
-            if accum == 0xa0a2:
-                break
+            chunk = fd.read_some(HUNT_CHUNK)
         except IOError:
-            print('*** hunt: file io error @{}'.format(offset))
+            print('*** hunt: file io error @{}'.format(base + len(carry)))
             return -1
-        except EOFError:
-            print('*** hunt: end of file @{}'.format(offset))
+        if not chunk:
+            print('*** hunt: end of file @{}'.format(base + len(carry)))
             return -1
-        except:
-            print('*** hunt: exception error: {} @{}'.format(
-                sys.exc_info()[0], offset))
-            raise
-        if (accum == 0):
-            zero_hdrs += 1
-            if (zero_hdrs > MAX_ZERO_HDRS):
-                print('*** hunt: too many zeros ({}), bailing, @{}'.format(
-                    MAX_ZERO_HDRS, offset))
-                return -1
-        else:
-            zero_hdrs = 0
-    fd.seek(-2, 1)                  # back up to beginning of start of packet
-    offset = fd.tell()
-    if (verbose >= 4):
-        print('*** hunt: found SOP @{0} (0x{0:x})'.format(offset))
-    return offset
-
+        buf   = carry + chunk
+        zpos  = buf.find(ZERO_RUN)
+        idx   = buf.find(SOP_STR, max(len(carry) - 1, 0))
+        while (idx >= 0 and (zpos < 0 or idx < zpos)):
+            valid = sop_valid(buf, idx)
+            if valid is not True and valid is not False:
+                more = fd.read_some(valid)
+                while more and len(more) < valid:
+                    new = fd.read_some(valid - len(more))
+                    if not new:
+                        break
+                    more += new
+                buf += more
+                if len(more) < valid:
+                    valid = True        # EOF, let get_record have it
+                else:
+                    valid = sop_valid(buf, idx)
+            if valid:
+                offset = base + idx
+                fd.seek(offset)
+                if (verbose >= 4):
+                    print('*** hunt: found SOP @{0} (0x{0:x})'.format(offset))
+                return offset
+            if (verbose >= 4):
+                print('*** hunt: false SOP @{0} (0x{0:x})'.format(base + idx))
+            idx = buf.find(SOP_STR, idx + 1)
+        if zpos >= 0:
+            print('*** hunt: too many zeros ({}), bailing, @{}'.format(
+                MAX_ZERO_HDRS, base + zpos + MAX_ZERO_HDRS + 1))
+            return -1
+        keep  = min(len(buf), len(ZERO_RUN) - 1)
+        base += len(buf) - keep
+        carry = buf[len(buf) - keep:]
 
 
 def get_record(fd):
@@ -219,7 +303,11 @@ def get_record(fd):
             print('*** header read problem: wanted {}, got {}, @{}'.format(
                 SIRF_HDR_SIZE, len(rec_buf), offset))
             break                       # oops
+        if (prof):
+            prof.start()
         hdr, rlen = sirf.sirf_hdr_struct.unpack(rec_buf)
+        if (prof):
+            prof.stop('hdr')
         if hdr != SIRF_SOP_SEQ:
             print('*** bad SOP: {:4x}, @{}'.format(hdr, offset))
             offset = hunt(fd, offset)
@@ -263,8 +351,12 @@ def get_record(fd):
         #
         # If needs to match the checksum value in the packet.
         #
+        if (prof):
+            prof.start()
         chksum = sum(rec_buf[SIRF_HDR_SIZE:SIRF_HDR_SIZE + rlen])
         chksum &= 0x7fff                # force to 15 bits
+        if (prof):
+            prof.stop('chksum')
         if (chksum != req_sum):
             chksum_errors += 1
             chksum1 = '*** checksum failure @{0} (0x{0:x}) ' + \
@@ -284,6 +376,66 @@ def get_record(fd):
     return -1, 0, 0, ''
 
 
+# mid_filter is indexed by mid: FILTER_DROP, FILTER_KEEP, or FILTER_SID
+# (keep if sid_filter[sid]).  sid_filter is indexed by sid, 0/1.  One
+# lookup per packet, none at all when no filter is given.
+
+FILTER_DROP             = 0
+FILTER_KEEP             = 1
+FILTER_SID              = 2
+
+def set_filters(mids, sids):
+    '''
+    build mid_filter/sid_filter from --mids/--sids (lists or None).
+    both None, no filtering.
+    '''
+    global mid_filter, sid_filter
+
+    mid_filter = sid_filter = None
+    if not mids and not sids:
+        return
+    if mids:
+        mid_filter = bytearray(256)
+        for mid in mids:
+            mid_filter[mid] = FILTER_KEEP
+    else:
+        mid_filter = bytearray([ FILTER_KEEP ]) * 256
+    if sids:
+        sid_filter = bytearray(256)
+        for sid in sids:
+            sid_filter[sid] = 1
+        for mid in mids_w_sids:
+            if mid_filter[mid]:
+                mid_filter[mid] = FILTER_SID
+
+
+def wanted(mid, rec_buf):
+    '''
+    mid/sid filter check on a framed packet.  counts what is dropped.
+    only called when mid_filter is set.
+    '''
+    global num_filtered
+
+    f = mid_filter[mid]
+    if f == FILTER_SID:
+        f = sid_filter[rec_buf[SIRF_SID_OFFSET]]
+    if not f:
+        num_filtered += 1
+    return f
+
+
+def framed_records(fd, framer):
+    """
+    get_record for the push framer.
+
+    feeds fd to framer a chunk at a time and generates the same
+    (offset, len, mid, rec_buf) get_record returns.
+    """
+    for offset, pkt in frame_file(fd, framer):
+        rec_buf = bytearray(pkt)
+        yield offset, len(rec_buf), rec_buf[SIRF_MID_OFFSET], rec_buf
+
+
 # format for summary
 # --- offset len  mid     name
 # --- 999999 999  128/99  ssssss
@@ -291,6 +443,99 @@ def get_record(fd):
 title0  = '--- offset  len{}                        mid      name'
 summary0 = '--- @{:<6d} {:3}{}                  ({:02x})  {:3}{:4}  {:s}'
 
+
+def count_mid(mid):
+    """
+    increment counter in dict of mids, create new entry if needed.
+    If not known count it as unknown.
+    """
+    global unk_mids
+
+    try:
+        sirf.mid_table[mid]
+    except KeyError:
+        unk_mids += 1
+
+    try:
+        sirf.mid_count[mid] += 1
+    except KeyError:
+        sirf.mid_count[mid] = 1
+
+
+def emit_record(rec_offset, rlen, mid, rec_buf, wide = ''):
+    """
+    count, decode and display one validated packet.
+
+    rec_buf is the whole packet (SOP through EOP), rlen its length.  Used
+    by dump (file input) and live (sirflive).
+    """
+    global total_records, total_bytes
+
+    count_mid(mid)
+
+    # first print the summary
+
+    v = sirf.mid_table.get(mid, (None, None, None, 'unk'))
+    decode   = v[MID_DECODER]           # mid_table function
+    emitters = v[MID_EMITTERS]          # mid_table emitter list
+    obj      = v[MID_OBJECT]
+    mid_name = v[MID_NAME]              # and the name of the mid
+
+    sid    = rec_buf[SIRF_SID_OFFSET]   # if there is a sid, next byte
+    sid_str = '' if mid not in mids_w_sids else '/{}'.format(sid)
+
+    # first display the summary, then any additional decodes
+    print(summary0.format(rec_offset, rlen, wide, mid, mid,
+                          sid_str, mid_name)),
+
+    # get_record has verified that we have a proper header, tail,
+    # and validated checksum.  All sirf decoders assume we are pointing
+    # past the mid.  The mid has already been consumed.
+    #
+    # so we must start the decoding there as well.
+
+    buf = rec_buf[SIRF_HDR_SIZE+1:]
+    if (decode):
+        try:
+            if prof:
+                # stop in finally, a failed decode is still charged
+                # and the profile stack stays balanced.
+                prof.start()
+                try:
+                    decode(verbose, rec_offset, buf, obj)
+                finally:
+                    prof.stop('decode', mid_name)
+                for e in emitters or []:
+                    prof.start()
+                    try:
+                        e(verbose, rec_offset, buf, obj)
+                    finally:
+                        prof.stop('emit', e.__name__)
+            else:
+                decode(verbose, rec_offset, buf, obj)
+                if emitters and len(emitters):
+                    for e in emitters:
+                        e(verbose, rec_offset, buf, obj)
+        except struct.error:
+            print
+            print('*** decode error: (len: {}, mid: {} {}, '
+                  'expected: {}), @{}'.format(rlen, mid, mid_name,
+                  len(obj) if obj else 0, rec_offset))
+    else:
+        print
+        if (verbose >= 5):
+            print
+            print('*** no decoder installed for mid {} '
+                  '({:02x}), @{}'.format(mid, mid, rec_offset)),
+    if (verbose >= 3):
+        print
+        dump_buf(rec_buf, '    ', ascii = verbose >= 4)
+    if (verbose >= 1):
+        print
+    total_records += 1
+    total_bytes   += rlen
+
+
 def dump(args):
     """
     Reads records and prints out details
@@ -306,40 +551,43 @@ def dump(args):
     and mid-specific decoder summary
     """
 
-    global verbose, debug
+    global verbose, debug, prof
     global num_hunt, chksum_errors, unk_mids
     global total_records, total_bytes
 
+    if (args.live):
+        from sirflive import live
+        return live(args)
+
     init_globals()
 
+    # all output (emitters included) goes through one large buffer.
+    outbuf.install()
+
     if (args.verbose and args.verbose >= 5):
+        # decoders/emitters are loaded lazily, only pull them in here
+        from tagdump.sirf_decoders import __version__ as sd_ver
+        from tagdump.sirf_emitters import __version__ as se_ver
         print ver_str
-        print '  decode_base: {}  sirf_defs: {}'.format(db_ver, sb_ver)
+        print '  decode_base: {}  sirf_defs: {}  profile: {}  outbuf: {}  registry: {}'.format(
+            db_ver, sb_ver, sp_ver, ob_ver, rg_ver)
         print '  sirf:     d: {}  e: {}  h: {}'.format(sd_ver, se_ver, sh_ver)
         print
 
-    def count_mid(mid):
-        """
-        increment counter in dict of mids, create new entry if needed.
-        If not known count it as unknown.
-        """
-        global unk_mids
-
-        try:
-            sirf.mid_table[mid]
-        except KeyError:
-            unk_mids += 1
-
-        try:
-            sirf.mid_count[mid] += 1
-        except KeyError:
-            sirf.mid_count[mid] = 1
-
     # create file object that handles both buffered and direct io
     infile  = tf.TagFile(args.input)
 
+    cprof = None
+    if (args.pstats):
+        cprof = cProfile.Profile()
+        cprof.enable()
+    if (args.profile):
+        prof   = StageProfile()
+        infile = ProfFile(infile, prof)
+
     verbose = args.verbose if (args.verbose) else 0
     debug   = args.debug   if (args.debug)   else 0
+    set_filters(args.mids, args.sids)
 
     if (args.jump):
         infile.seek(args.jump)
@@ -348,12 +596,24 @@ def dump(args):
     if (args.wide):
         wide = '                                            '
 
-    print title0.format(wide)
+    # --stats frames with SirfFramer, no seeks and no hunt chatter
+    stats  = None
+    framer = None
+    if (args.stats):
+        from sirfstats import SirfStats
+        stats   = SirfStats()
+        framer  = SirfFramer(infile.tell())
+        records = framed_records(infile, framer)
+    else:
+        print title0.format(wide)
 
     # extract record from input file and output decoded results
     try:
         while(True):
-            rec_offset, rlen, mid, rec_buf = get_record(infile)
+            if (framer):
+                rec_offset, rlen, mid, rec_buf = next(records, (-1, 0, 0, ''))
+            else:
+                rec_offset, rlen, mid, rec_buf = get_record(infile)
             if rec_offset < 0:
                 break
 
@@ -361,54 +621,16 @@ def dump(args):
             if (args.endpos and rec_offset > args.endpos):
                 break                       # all done
 
-            count_mid(mid)
-
-            # first print the summary
-
-            v = sirf.mid_table.get(mid, (None, None, None, 'unk'))
-            decode   = v[MID_DECODER]           # mid_table function
-            emitters = v[MID_EMITTERS]          # mid_table emitter list
-            obj      = v[MID_OBJECT]
-            mid_name = v[MID_NAME]              # and the name of the mid
-
-            sid    = rec_buf[SIRF_SID_OFFSET]   # if there is a sid, next byte
-            sid_str = '' if mid not in mids_w_sids else '/{}'.format(sid)
-
-            # first display the summary, then any additional decodes
-            print(summary0.format(rec_offset, rlen, wide, mid, mid,
-                                  sid_str, mid_name)),
+            if (mid_filter and not wanted(mid, rec_buf)):
+                continue
 
-            # get_record has verified that we have a proper header, tail,
-            # and validated checksum.  All sirf decoders assume we are pointing
-            # past the mid.  The mid has already been consumed.
-            #
-            # so we must start the decoding there as well.
-
-            buf = rec_buf[SIRF_HDR_SIZE+1:]
-            if (decode):
-                try:
-                    decode(verbose, rec_offset, buf, obj)
-                    if emitters and len(emitters):
-                        for e in emitters:
-                            e(verbose, rec_offset, buf, obj)
-                except struct.error:
-                    print
-                    print('*** decode error: (len: {}, mid: {} {}, '
-                          'expected: {}), @{}'.format(rlen, mid, mid_name,
-                          len(obj) if obj else 0, rec_offset))
+            if (stats):
+                count_mid(mid)
+                stats.add(mid, rec_buf, rlen)
+                total_records += 1
+                total_bytes   += rlen
             else:
-                print
-                if (verbose >= 5):
-                    print
-                    print('*** no decoder installed for mid {} '
-                          '({:02x}), @{}'.format(mid, mid, rec_offset)),
-            if (verbose >= 3):
-                print
-                dump_buf(rec_buf, '    ')
-            if (verbose >= 1):
-                print
-            total_records += 1
-            total_bytes   += rlen
+                emit_record(rec_offset, rlen, mid, rec_buf, wide)
             if (args.num and total_records >= args.num):
                 break
     except KeyboardInterrupt:
@@ -416,13 +638,29 @@ def dump(args):
         print
         print('*** user stop'),
 
+    if (framer):
+        num_hunt      = framer.resyncs
+        chksum_errors = framer.chksum_errors
     print
     print('*** end of processing @{} (0x{:x}),  processed: {} records, {} bytes'.format(
         infile.tell(), infile.tell(), total_records, total_bytes))
     print('*** hunts: {}, chksum_errs: {}, unk_mids: {}'.format(
         num_hunt, chksum_errors, unk_mids))
+    if (mid_filter):
+        print('*** filtered out: {}'.format(num_filtered))
     print
     print('mid/s: {}'.format(sirf.mid_count))
+    if stats:
+        stats.display(infile.tell(), chksum_errors, num_hunt)
+    if cprof:
+        cprof.disable()
+        cprof.dump_stats(args.pstats)
+        print('*** pstats: {}'.format(args.pstats))
+    if prof:
+        prof.finish()
+        print
+        prof.display()
+    outbuf.flush()
 
 if __name__ == "__main__":
     dump(parseargs())
@@ -1,4 +1,8 @@
 '''configuration for sirfdump'''
 
-# import populators sirf decode/emitters
-import tagdump.sirf_populate
+# register populators for sirf decode/emitters.  Each is imported on
+# the first lookup of a mid it lists (see tagdump/registry.py).
+import tagdump.sirf_defs        as     sirf
+
+for populator, keys in sirf.sirf_populators:
+    sirf.mid_table.register(populator, keys)
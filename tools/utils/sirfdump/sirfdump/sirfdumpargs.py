@@ -27,14 +27,39 @@ def auto_int(x):
 def auto_upper(x):
     return x.upper()
 
+def auto_int_list(x):
+    '''comma separated mids or sids, each 0 .. 255'''
+    try:
+        vals = [ auto_int(v) for v in x.split(',') if v ]
+    except ValueError:
+        raise argparse.ArgumentTypeError('bad number in {}'.format(x))
+    for v in vals:
+        if v < 0 or v > 255:
+            raise argparse.ArgumentTypeError('{} out of range, 0 .. 255'.format(v))
+    return vals
+
 def parseargs():
     parser = argparse.ArgumentParser(
         description='Display SirfBin records.')
 
     parser.add_argument('input',
+                        nargs='?',
                         type=argparse.FileType('rb'),
                         help='input file')
 
+    parser.add_argument('--live',
+                        metavar='DEV',
+                        help='read live from a tty/pty instead of a file')
+
+    parser.add_argument('-b', '--baud',
+                        type=int,
+                        default=57600,
+                        help='baud rate for --live (default 57600)')
+
+    parser.add_argument('--ring',
+                        type=auto_int,
+                        help='--live ring buffer size (default 64K)')
+
     parser.add_argument('-V', '--version',
                         action='version',
                         version='%(prog)s ' + VERSION)
@@ -65,7 +90,55 @@ def parseargs():
                         action='store_true',
                         help='extra wide summary (better viewing)')
 
-    return parser.parse_args()
+    parser.add_argument('--mids',
+                        type=auto_int_list,
+                        help='only these mids (comma separated)')
+
+    parser.add_argument('--sids',
+                        type=auto_int_list,
+                        help='only these sids, for mids that have a sid')
+
+    parser.add_argument('--stats',
+                        action='store_true',
+                        help='statistics only, no decode or record display')
+
+    parser.add_argument('--profile',
+                        action='store_true',
+                        help='time each stage (read, decode, emit, ...)')
+
+    parser.add_argument('--pstats',
+                        help='run under cProfile, dump pstats to PSTATS')
+
+    args = parser.parse_args()
+    if not args.input and not args.live:
+        parser.error('need an input file or --live DEV')
+    return args
+
+
+def parse_replay_args(argv = None):
+    '''pty replay stand-in, see sirflive.py'''
+    parser = argparse.ArgumentParser(prog = 'sirflive',
+        description='Replay a sirfbin capture through a pty at a baud rate.')
+
+    parser.add_argument('input',
+                        type=argparse.FileType('rb'),
+                        help='capture file to replay')
+
+    parser.add_argument('-b', '--baud',
+                        type=int,
+                        default=57600,
+                        help='baud rate to pace the replay (default 57600)')
+
+    parser.add_argument('--wait',
+                        type=float,
+                        default=0,
+                        help='seconds to wait before starting')
+
+    parser.add_argument('--loop',
+                        action='store_true',
+                        help='replay the capture over and over')
+
+    return parser.parse_args(argv)
 
 if __name__ == '__main__':
     print(parseargs())
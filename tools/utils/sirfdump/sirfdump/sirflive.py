@@ -0,0 +1,293 @@
+'''sirflive: live sirfbin from a serial port or pty, and a pty replayer'''
+#
+# Copyright (c) 2018 Eric B. Decker
+# All rights reserved.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# See COPYING in the top level directory of this source tree.
+#
+# Contact: Eric B. Decker <cire831@gmail.com>
+
+####
+#
+# live: sirfdump --live DEV [-b BAUD] [--ring SIZE]
+#
+# DEV (a tty or pty) is opened non-blocking, raw, at BAUD.  A reader
+# thread pulls whatever the port has (select + os.read) into a fixed
+# size RingBuf.  The main thread drains the ring, frames packets as they
+# complete (SirfFramer) and hands each one to sirfdump.emit_record, the
+# same decode/emit path (mid_table) used for files.
+#
+# If display falls behind the port (slow terminal, big -v) the ring
+# fills.  New bytes that do not fit are dropped and counted, like a UART
+# overrun, and framing resyncs on the next good packet.  At the end (EOF,
+# hangup or ^C) the byte, drop, ring high water and framing stats are
+# printed.
+#
+# replay: python -m sirfdump.sirflive [-b BAUD] [--loop] capture
+#
+# Stand-in for a GPS on a serial port.  Opens a pty, prints the slave
+# name and writes the capture file to it paced at BAUD (10 bits a byte,
+# 8N1).  Point sirfdump --live at the slave name.
+
+import os
+import sys
+import time
+import tty
+import errno
+import select
+import termios
+import threading
+
+import sirfdump                 as     sd
+from   tagdump.sirf_framer      import SirfFramer
+from   tagdump.sirf_defs        import *
+import tagdump.sirf_defs        as     sirf
+import tagdump.outbuf           as     outbuf
+
+__version__ = '0.0.3 (sl)'
+
+DEFAULT_BAUD    = 57600                 # sirfbin on the gsd4e
+RING_SIZE       = 64 * 1024
+READ_SIZE       = 4096
+POLL_TIME       = 0.25                  # secs, reader select/ring wait
+
+BAUDS = dict([ (b, getattr(termios, 'B{}'.format(b)))
+               for b in (4800, 9600, 19200, 38400, 57600, 115200,
+                         230400, 460800, 921600)
+               if hasattr(termios, 'B{}'.format(b)) ])
+
+
+class RingBuf(object):
+    '''
+    fixed size byte ring, one producer (reader thread), one consumer.
+
+    put() drops what does not fit (newest bytes, like an overrun) and
+    counts it.  get() waits up to timeout for data and takes it all.
+    '''
+    def __init__(self, size = RING_SIZE):
+        super(RingBuf, self).__init__()
+        self.buf     = bytearray(size)
+        self.size    = size
+        self.head    = 0                # next byte to take
+        self.count   = 0                # bytes held
+        self.cond    = threading.Condition()
+        self.total   = 0                # bytes offered
+        self.dropped = 0
+        self.high    = 0                # high water
+
+    def put(self, data):
+        with self.cond:
+            n = len(data)
+            self.total += n
+            free = self.size - self.count
+            if n > free:
+                self.dropped += n - free
+                data = data[:free]
+                n    = free
+            if n:
+                tail = (self.head + self.count) % self.size
+                first = min(n, self.size - tail)
+                self.buf[tail:tail + first] = data[:first]
+                if first < n:
+                    self.buf[0:n - first] = data[first:]
+                self.count += n
+                if self.count > self.high:
+                    self.high = self.count
+                self.cond.notify()
+            return n
+
+    def get(self, timeout = POLL_TIME):
+        with self.cond:
+            if not self.count:
+                self.cond.wait(timeout)
+            n = self.count
+            if not n:
+                return ''
+            head  = self.head
+            first = min(n, self.size - head)
+            data  = str(self.buf[head:head + first])
+            if first < n:
+                data += str(self.buf[0:n - first])
+            self.head  = (head + n) % self.size
+            self.count = 0
+            return data
+
+
+class Reader(threading.Thread):
+    '''pull bytes off the port into the ring until eof or stop'''
+    def __init__(self, fd, ring):
+        super(Reader, self).__init__()
+        self.daemon = True
+        self.fd     = fd
+        self.ring   = ring
+        self.eof    = False
+        self.error  = None
+        self.stopping = False
+
+    def run(self):
+        try:
+            while not self.stopping:
+                r, w, x = select.select([ self.fd ], [], [], POLL_TIME)
+                if not r:
+                    continue
+                try:
+                    data = os.read(self.fd, READ_SIZE)
+                except OSError as e:
+                    if e.errno in (errno.EAGAIN, errno.EINTR):
+                        continue
+                    if e.errno == errno.EIO:
+                        break           # pty hung up
+                    raise
+                if not data:
+                    break
+                self.ring.put(data)
+        except Exception as e:
+            self.error = e
+        finally:
+            self.eof = True
+            with self.ring.cond:
+                self.ring.cond.notify()
+
+
+def open_tty(dev, baud = DEFAULT_BAUD):
+    '''open dev non-blocking and raw at baud.  returns the os fd'''
+    fd = os.open(dev, os.O_RDWR | os.O_NOCTTY | os.O_NONBLOCK)
+    try:
+        tty.setraw(fd)
+        attrs = termios.tcgetattr(fd)
+        attrs[2] |= termios.CLOCAL | termios.CREAD
+        if baud in BAUDS:
+            attrs[4] = attrs[5] = BAUDS[baud]
+        termios.tcsetattr(fd, termios.TCSANOW, attrs)
+    except termios.error:
+        pass                            # not a tty we can configure
+    return fd
+
+
+def live(args):
+    '''sirfdump --live, see the top of this file'''
+    sd.init_globals()
+    sd.verbose = args.verbose if (args.verbose) else 0
+    sd.debug   = args.debug   if (args.debug)   else 0
+    sd.set_filters(args.mids, args.sids)
+    outbuf.install()
+
+    wide = ''
+    if (args.wide):
+        wide = '                                            '
+
+    fd     = open_tty(args.live, args.baud)
+    ring   = RingBuf(args.ring or RING_SIZE)
+    reader = Reader(fd, ring)
+    framer = SirfFramer()
+    print('*** live: {} @ {} baud, ring {}'.format(args.live, args.baud,
+                                                   ring.size))
+    stats = None
+    if (args.stats):
+        from sirfstats import SirfStats
+        stats = SirfStats()
+    else:
+        print sd.title0.format(wide)
+    outbuf.flush()
+
+    reader.start()
+    done = False
+    try:
+        while (not done):
+            data = ring.get()
+            if not data:
+                if reader.eof:
+                    break
+                continue
+            now = time.time()
+            for offset, pkt in framer.feed(data):
+                rec_buf = bytearray(pkt)
+                mid     = rec_buf[SIRF_MID_OFFSET]
+                if (sd.mid_filter and not sd.wanted(mid, rec_buf)):
+                    continue
+                if (stats):
+                    sd.count_mid(mid)
+                    stats.add(mid, rec_buf, len(pkt), now)
+                    sd.total_records += 1
+                    sd.total_bytes   += len(pkt)
+                else:
+                    sd.emit_record(offset, len(pkt), mid, rec_buf, wide)
+                if (args.num and sd.total_records >= args.num):
+                    done = True
+                    break
+            outbuf.flush()
+    except KeyboardInterrupt:
+        print
+        print
+        print('*** user stop'),
+    reader.stopping = True
+    reader.join(1)
+    os.close(fd)
+
+    print
+    if reader.error:
+        print('*** live: read error: {}'.format(reader.error))
+    print('*** end of live @{},  processed: {} records, {} bytes'.format(
+        framer.offset(), sd.total_records, sd.total_bytes))
+    print('*** rx: {} bytes, dropped: {}, ring high water: {}/{}'.format(
+        ring.total, ring.dropped, ring.high, ring.size))
+    print('*** framing: packets: {}, bad SOPs: {} (len {}, eop {}, chksum {}), '
+          'resyncs: {}, skipped bytes: {}, partial: {}'.format(
+              framer.packets, framer.bad, framer.bad_len, framer.bad_eop,
+              framer.chksum_errors, framer.resyncs, framer.skipped,
+              framer.pending()))
+    print('*** unk_mids: {}'.format(sd.unk_mids))
+    if (sd.mid_filter):
+        print('*** filtered out: {}'.format(sd.num_filtered))
+    print
+    print('mid/s: {}'.format(sirf.mid_count))
+    if stats:
+        stats.display(ring.total, framer.chksum_errors, framer.resyncs,
+                      'arrival')
+    outbuf.flush()
+
+
+def replay(args):
+    '''pty stand-in, write args.input to a pty paced at args.baud'''
+    master, slave = os.openpty()
+    tty.setraw(slave)
+    print('*** replay: {} @ {} baud'.format(os.ttyname(slave), args.baud))
+    sys.stdout.flush()
+    data  = args.input.read()
+    rate  = args.baud / 10.0            # bytes/sec, 8N1
+    chunk = max(1, int(rate / 100))     # about 10ms worth
+    try:
+        if args.wait:
+            time.sleep(args.wait)
+        while (True):
+            t0 = time.time()
+            for i in range(0, len(data), chunk):
+                os.write(master, data[i:i + chunk])
+                ahead = t0 + (i + chunk) / rate - time.time()
+                if ahead > 0:
+                    time.sleep(ahead)
+            if not args.loop:
+                break
+    except KeyboardInterrupt:
+        pass
+    time.sleep(0.5)                     # let the reader drain
+    os.close(master)
+    os.close(slave)
+    print('*** replay: done, {} bytes'.format(len(data)))
+
+
+if __name__ == '__main__':
+    from sirfdumpargs import parse_replay_args
+    replay(parse_replay_args())
@@ -0,0 +1,177 @@
+'''sirfstats: statistics only pass over a sirfbin stream (--stats)'''
+#
+# Copyright (c) 2018 Eric B. Decker
+# All rights reserved.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# See COPYING in the top level directory of this source tree.
+#
+# Contact: Eric B. Decker <cire831@gmail.com>
+
+####
+#
+# sirfdump --stats: no decode, no emitters.  Each framed packet is
+# counted by mid, and by (mid, sid) for mids in mids_w_sids, with byte
+# volume.
+#
+# Times.  A sirfbin file has no receive timestamps, so the clock is the
+# receiver's own: the GPS time of week from the last MID 2 (1/100 s) or
+# MID 41 (ms) seen.  Packets before the first of those have no time.
+# With --live the clock is the wall clock at arrival.  From the clock:
+#
+#   rate        messages/s per RATE_BUCKET seconds (min/avg/max over
+#               the buckets), and per mid over the whole span.
+#   inter-arrival  per mid (mid/sid), p50/p90/p99/max of the time between
+#               one packet and the next of the same kind.  With the
+#               GPS clock the resolution is a nav epoch.
+#
+# The tow wraps at the end of the week.  Any other step backwards, or
+# forward more than MAX_GAP, is a clock jump (receiver restart, bad
+# data).  The clock carries on from where it was and the jump is
+# counted, so the span and rates only cover time actually seen.
+#
+# Errors.  Checksum errors and hunts, as counts and per MB of input.
+
+import struct
+
+from   tagdump.sirf_defs        import *
+import tagdump.sirf_defs        as     sirf
+from   tagdump.sirf_headers     import mids_w_sids
+from   tagdump.hdr_structs      import structs
+
+__version__ = '0.0.1 (ss)'
+
+RATE_BUCKET     = 60                    # secs
+
+WEEK_SECS       = 7 * 24 * 3600
+MAX_GAP         = 3600                  # secs, bigger tow steps are jumps
+
+# tow in the packet (offset from SOP), struct, scale to secs
+TOW_SOURCES = {
+     2: (structs['sb_nav_data_t'].offset('tow'), struct.Struct('>I'), 0.01),
+    41: (structs['sb_geodetic_t'].offset('tow'), struct.Struct('>I'), 0.001),
+}
+
+_mids_w_sids = frozenset(mids_w_sids)
+
+
+def percentile(vals, pct):
+    '''nearest rank percentile of a sorted list'''
+    if not vals:
+        return None
+    k = int(round(pct / 100.0 * (len(vals) - 1)))
+    return vals[k]
+
+
+class SirfStats(object):
+    '''per mid/sid counts, bytes, rates and inter-arrival times'''
+    def __init__(self):
+        super(SirfStats, self).__init__()
+        self.count   = {}               # key -> packets, key mid or (mid, sid)
+        self.bytes   = {}
+        self.last_t  = {}               # key -> time of last packet
+        self.deltas  = {}               # key -> [ inter-arrival ]
+        self.buckets = {}               # bucket -> packets
+        self.packets = 0
+        self.nbytes  = 0
+        self.first_t = None
+        self.t       = None             # current time, gps clock
+        self.base    = 0.0              # t = tow + base
+        self.jumps   = 0                # clock discontinuities
+
+    def gps_clock(self, mid, rec_buf):
+        '''advance the clock from a MID 2/41 tow'''
+        src = TOW_SOURCES.get(mid)
+        if src is None or len(rec_buf) < src[0] + 4:
+            return self.t
+        tow = src[1].unpack_from(rec_buf, src[0])[0] * src[2]
+        if self.t is not None:
+            step = tow + self.base - self.t
+            if step < -WEEK_SECS / 2 and step + WEEK_SECS <= MAX_GAP:
+                self.base += WEEK_SECS          # week rollover
+            elif step < 0 or step > MAX_GAP:
+                self.jumps += 1                 # restart/garbage, rebase
+                self.base = self.t - tow
+        self.t = tow + self.base
+        return self.t
+
+    def add(self, mid, rec_buf, rlen, t = None):
+        '''
+        count one packet.  t is the arrival time, None to use the gps
+        clock kept from the stream.
+        '''
+        if t is None:
+            t = self.gps_clock(mid, rec_buf)
+        key = mid
+        if mid in _mids_w_sids and len(rec_buf) > SIRF_SID_OFFSET:
+            key = (mid, rec_buf[SIRF_SID_OFFSET])
+        self.packets += 1
+        self.nbytes  += rlen
+        try:
+            self.count[key] += 1
+            self.bytes[key] += rlen
+        except KeyError:
+            self.count[key]  = 1
+            self.bytes[key]  = rlen
+            self.deltas[key] = []
+        if t is None:
+            return
+        if self.first_t is None:
+            self.first_t = t
+        last = self.last_t.get(key)
+        if last is not None and t >= last:
+            self.deltas[key].append(t - last)
+        self.last_t[key] = t
+        b = int((t - self.first_t) // RATE_BUCKET)
+        self.buckets[b] = self.buckets.get(b, 0) + 1
+
+    def span(self):
+        if self.first_t is None or not self.last_t:
+            return 0.0
+        return max(self.last_t.values()) - self.first_t
+
+    def display(self, in_bytes, chksum_errors, hunts, clock = 'gps tow'):
+        span = self.span()
+        mb   = in_bytes / float(1024 * 1024) if in_bytes else 0.0
+        print
+        print('*** stats: {} packets, {} bytes (of {} input), clock: {}, '
+              'span: {:.1f}s'.format(self.packets, self.nbytes, in_bytes,
+                                     clock, span))
+        print('    {:>3} {:>4}  {:24s} {:>8} {:>10} {:>8}   {:>8} {:>8} {:>8} {:>8}'.format(
+            'mid', 'sid', 'name', 'count', 'bytes', 'rate/s',
+            'p50', 'p90', 'p99', 'max'))
+        for key in sorted(self.count, key = lambda k: k if isinstance(k, tuple)
+                          else (k, -1)):
+            mid, sid = key if isinstance(key, tuple) else (key, '')
+            v = sirf.mid_table.get(mid, (None, None, None, 'unk'))
+            d = sorted(self.deltas[key])
+            pct = [ percentile(d, p) for p in (50, 90, 99) ] + \
+                  [ d[-1] if d else None ]
+            print('    {:3} {:>4}  {:24s} {:8} {:10} {:>8}   {}'.format(
+                mid, sid, str(v[MID_NAME])[:24], self.count[key],
+                self.bytes[key],
+                '{:.3f}'.format(self.count[key] / span) if span else '-',
+                ' '.join([ '{:8.3f}'.format(x) if x is not None else '       -'
+                           for x in pct ])))
+        if self.buckets:
+            rates = [ self.buckets.get(b, 0) / float(RATE_BUCKET)
+                      for b in range(max(self.buckets) + 1) ]
+            print('    rate ({}s buckets, {}): min {:.3f}  avg {:.3f}  '
+                  'max {:.3f} msgs/s'.format(RATE_BUCKET, len(rates),
+                  min(rates), sum(rates) / len(rates), max(rates)))
+        if self.jumps:
+            print('    clock jumps: {}'.format(self.jumps))
+        print('    chksum_errs: {} ({:.2f}/MB)  hunts: {} ({:.2f}/MB)'.format(
+            chksum_errors, chksum_errors / mb if mb else 0.0,
+            hunts, hunts / mb if mb else 0.0))
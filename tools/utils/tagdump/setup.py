@@ -28,6 +28,8 @@ setup(
     license          = 'GPL3',
     packages         = ['tagdump'],
     entry_points     = {
-        'console_scripts': ['tagdump=tagdump.__main__:main'],
+        'console_scripts': ['tagdump=tagdump.__main__:main',
+                            'tagmerge=tagdump.tagmerge:main',
+                            'tagsynth=tagdump.tagsynth:main'],
     }
 )
@@ -72,5 +72,28 @@ tagdump:  decode and display Tag Data Stream file
 #
 #               owcb, convert uptime and elapsed to 32 bit num secs needed.
 #
+# 0.3.0.dev4    --stats, statistics only pass.  header walk, no decode/emit.
+#               recnum coverage bitmap.  missing/dup/out of order summary.
+#               tagmerge, k-way merge of multiple captures by recnum.
+#               tagdump batch DIR, fleet processing in a process pool.
+#               tagsynth, synthetic data stream generator.
+#               build(), encode objects back to bytes (round trip).
+#               --profile, per stage timing.  --pstats, cProfile dump.
+#               outbuf, emitter output through one large buffered writer.
+#               hex_dump, one pass hex dumps, ascii column at -vvvv.
+#               dump_bufs, -vvvv dumps the headers resync turned down.
+#               registry, decoders/emitters populated on first use.
+#               hdrgen, flat struct decoders generated from the C headers.
+#               event names 36/37 (GPS_STANDBY/GPS_TURN_OFF) were swapped.
+#               sirf_tables, table driven unpack_from decoders for OSP mids.
+#               navtrk/vis decoded as columns (obj.cols), no per channel dicts.
+#               tagdump track, GPS fixes (MID 2/41) to a WGS84 track file.
+#               tagdump sirf, GPS_RAW_SIRFBIN packets to a sirfbin file + .idx.
+#               sirf_framer, push style sirfbin framer (feed bytes, get packets).
+#               tagdump acq, GPS acquisition (ttf, on time, mpm) per power cycle.
+#               tagdump time, rtctime -> UTC correlation (MID 41), .tcor cache.
+#               tagdump grid, spatial grid index over fixes, bbox + time query.
+#               SENSOR_DATA/SENSOR_SET decoded, tagdump sensor time series.
+#
 
-__version__ = '0.3.0.dev3'
+__version__ = '0.3.0.dev4'
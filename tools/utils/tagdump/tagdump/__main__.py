@@ -3,10 +3,47 @@ tagdump:  decode and display Tag Data Stream file
 @author: Dan Maltbie/Eric B. Decker
 """
 
+import sys
+
 from tagdump import dump
 from tagdumpargs import parseargs
 
 def main():
+    if len(sys.argv) > 1 and sys.argv[1] == 'batch':
+        from tagbatch    import batch
+        from tagdumpargs import parse_batch_args
+        batch(parse_batch_args(sys.argv[2:]))
+        return
+    if len(sys.argv) > 1 and sys.argv[1] == 'track':
+        from tagtrack    import track
+        from tagdumpargs import parse_track_args
+        track(parse_track_args(sys.argv[2:]))
+        return
+    if len(sys.argv) > 1 and sys.argv[1] == 'sirf':
+        from tagsirf     import extract
+        from tagdumpargs import parse_sirf_args
+        extract(parse_sirf_args(sys.argv[2:]))
+        return
+    if len(sys.argv) > 1 and sys.argv[1] == 'acq':
+        from tagacq      import acq
+        from tagdumpargs import parse_acq_args
+        acq(parse_acq_args(sys.argv[2:]))
+        return
+    if len(sys.argv) > 1 and sys.argv[1] == 'time':
+        from tagtime     import time_corr
+        from tagdumpargs import parse_time_args
+        time_corr(parse_time_args(sys.argv[2:]))
+        return
+    if len(sys.argv) > 1 and sys.argv[1] == 'grid':
+        from taggrid     import grid
+        from tagdumpargs import parse_grid_args
+        grid(parse_grid_args(sys.argv[2:]))
+        return
+    if len(sys.argv) > 1 and sys.argv[1] == 'sensor':
+        from tagsensor   import sensor
+        from tagdumpargs import parse_sensor_args
+        sensor(parse_sensor_args(sys.argv[2:]))
+        return
     dump(parseargs())
 
 if __name__ == '__main__':
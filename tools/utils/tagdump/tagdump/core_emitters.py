@@ -21,7 +21,7 @@
 
 # basic emitters for main data blocks
 
-__version__ = '0.2.7 (ce)'
+__version__ = '0.2.9 (ce)'
 
 from   dt_defs      import *
 from   dt_defs      import rec0
@@ -36,6 +36,9 @@ from   core_headers import event_names
 from   core_headers import gps_cmd_names
 from   core_headers import PANIC_WARN
 from   core_headers import GPS_CMD
+from   core_headers import sns_structs
+from   core_headers import sns_name
+from   core_headers import SNS_PAYLOAD_OFFSET
 
 from   sirf_defs    import *
 import sirf_defs    as     sirf
@@ -404,20 +407,53 @@ def emit_gps_xyz(level, offset, buf, obj):
 # SENSOR/SET decoders
 #
 
+sns0  = ' {:s}  {}  {}'
+sns1  = '    {:<6s} {}'
+
 def emit_sensor_data(level, offset, buf, obj):
-    print_record(offset, buf)
+    len      = obj['hdr']['len'].val
+    type     = obj['hdr']['type'].val
+    recnum   = obj['hdr']['recnum'].val
+    rtctime  = obj['hdr']['rt']
+    st       = get_systime(rtctime)
+
+    sched    = obj['sched_delta'].val
+    sns_id   = obj['sns_id'].val
+    print(rec0.format(offset, recnum, st, len, type, dt_name(type))),
+    s = sns_structs.get(sns_id)
+    if (s is None or len < SNS_PAYLOAD_OFFSET + s.size):
+        print(sns0.format(sns_name(sns_id), sched, '(no payload)'))
+    else:
+        vals = s.unpack_from(buf, SNS_PAYLOAD_OFFSET)
+        print(sns0.format(sns_name(sns_id), sched,
+                          ' '.join([ str(v) for v in vals ])))
     if (level >= 1):
         print(obj)
-        print_hdr(obj)
-        print
 
 
 def emit_sensor_set(level, offset, buf, obj):
-    print_record(offset, buf)
+    len      = obj['hdr']['len'].val
+    type     = obj['hdr']['type'].val
+    recnum   = obj['hdr']['recnum'].val
+    rtctime  = obj['hdr']['rt']
+    st       = get_systime(rtctime)
+
+    sched    = obj['sched_delta'].val
+    mask     = obj['mask'].val
+    print(rec0.format(offset, recnum, st, len, type, dt_name(type))),
+    print(sns0.format('0x{:04x}'.format(mask), sched, obj['mask_id'].val))
+    idx = SNS_PAYLOAD_OFFSET
+    for sns_id, s in sorted(sns_structs.items()):
+        if not (mask & (1 << sns_id)):
+            continue
+        if (idx + s.size > len):
+            print(sns1.format(sns_name(sns_id), '(short)'))
+            break
+        vals = s.unpack_from(buf, idx)
+        idx += s.size
+        print(sns1.format(sns_name(sns_id), ' '.join([ str(v) for v in vals ])))
     if (level >= 1):
         print(obj)
-        print_hdr(obj)
-        print
 
 
 ################################################################
@@ -478,6 +514,8 @@ def emit_config(level, offset, buf, obj):
 # dt_gps_raw_obj, 2nd level emit on mid
 #
 
+gps0  = '-- MID: {:3}{:4} ({:02x}) <{:2}> {}'
+
 def emit_gps_raw(level, offset, buf, obj):
     xlen     = obj['gps_hdr']['hdr']['len'].val
     xtype    = obj['gps_hdr']['hdr']['type'].val
@@ -488,18 +526,21 @@ def emit_gps_raw(level, offset, buf, obj):
     dir_bit  = obj['gps_hdr']['dir'].val
     dir_str  = 'rx' if dir_bit == 0 else 'tx'
 
+    # len of an aggie walks the whole object tree, only do it once
+    obj_len  = len(obj)
+
     print(rec0.format(offset, recnum, st, xlen, xtype, dt_name(xtype))),
     if (obj['sirf_hdr']['start'].val != SIRF_SOP_SEQ):
-        index = len(obj) - len(sirf_hdr_obj)
+        index = obj_len - len(sirf_hdr_obj)
         print('-- non-binary <{:2}>'.format(dir_str))
         if (level >= 1):
             print('    {:s}'.format(buf[index:])),
         if (level >= 2):
-            dump_buf(buf, '    ')
+            dump_buf(buf, '    ', ascii = level >= 4)
         return
 
     mid      = obj['sirf_hdr']['mid'].val
-    sid      = buf[len(obj)]                # if there is a sid, next byte
+    sid      = buf[obj_len]                 # if there is a sid, next byte
 
     v = sirf.mid_table.get(mid, (None, None, None, ''))
     emitters    = v[MID_EMITTERS]           # emitter list
@@ -507,13 +548,13 @@ def emit_gps_raw(level, offset, buf, obj):
     mid_name    = v[MID_NAME]
 
     sid_str = '' if mid not in mids_w_sids else '/{}'.format(sid)
-    print('-- MID: {:3}{:4} ({:02x}) <{:2}> {}'.format(
-        mid, sid_str, mid, dir_str, mid_name)),
+    print(gps0.format(mid, sid_str, mid, dir_str, mid_name)),
 
     if not emitters or len(emitters) == 0:
         print
         if (level >= 5):
             print('*** no emitters defined for mid {}'.format(mid))
         return
+    buf = buf[obj_len:]
     for e in emitters:
-        e(level, offset, buf[len(obj):], decoder_obj)
+        e(level, offset, buf, decoder_obj)
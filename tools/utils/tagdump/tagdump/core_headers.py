@@ -22,8 +22,9 @@
 
 # basic data type object descriptors
 
-__version__ = '0.2.6 (ch)'
+__version__ = '0.2.9 (ch)'
 
+import struct
 import binascii
 from   decode_base  import *
 from   collections  import OrderedDict
@@ -155,8 +156,8 @@ event_names = {
     50: "GPS_HW_CONFIG",
     34: "GPS_RECONFIG",
     35: "GPS_TURN_ON",
-    36: "GPS_TURN_OFF",
-    37: "GPS_STANDBY",
+    36: "GPS_STANDBY",
+    37: "GPS_TURN_OFF",
     38: "GPS_MPM",
     39: "GPS_FULL_PWR",
     40: "GPS_PULSE",
@@ -232,8 +233,83 @@ dt_gps_time_obj = dt_simple_hdr
 dt_gps_geo_obj  = dt_simple_hdr
 dt_gps_xyz_obj  = dt_simple_hdr
 
-dt_sen_data_obj = dt_simple_hdr
-dt_sen_set_obj  = dt_simple_hdr
+####
+#
+# SENSOR_DATA and SENSOR_SET
+#
+# dt_sensor_data_t/dt_sensor_set_t (typed_data.h) are followed by the
+# payload, 16 bit datums, native (little endian).  A SENSOR_DATA is one
+# sensor (sns_id).  A SENSOR_SET has a bit per sensor in mask (bit n is
+# sns_id n) and the payloads of the set sensors back to back, lowest
+# sns_id first.
+#
+# sns_id values are the mm4 SNS_IDs (sensors.h).  Payload sizes are the
+# <sensor>_PAYLOAD_SIZEs in typed_data.h, the datum count follows them.
+#
+
+dt_sen_data_obj = aggie(OrderedDict([
+    ('hdr',         dt_hdr_obj),
+    ('sched_delta', atom(('<I', '{}'))),
+    ('sns_id',      atom(('<H', '{}'))),
+    ('pad',         atom(('<H', '{}')))]))
+
+dt_sen_set_obj  = aggie(OrderedDict([
+    ('hdr',         dt_hdr_obj),
+    ('sched_delta', atom(('<I', '{}'))),
+    ('mask',        atom(('<H', '0x{:04x}'))),
+    ('mask_id',     atom(('<H', '{}')))]))
+
+SNS_PAYLOAD_OFFSET = len(dt_sen_data_obj)
+
+# <sensor>_PAYLOAD_SIZE, typed_data.h.  hdrgen --check compares.
+sns_payload_sizes = {
+    'BATT':  2,
+    'TEMP':  2,
+    'SAL':   4,
+    'ACCEL': 6,
+    'PTEMP': 2,
+    'PRESS': 2,
+    'SPEED': 4,
+    'MAG':   6,
+}
+
+# datum names, sensors with one datum use their name
+sns_datum_names = {
+    'SAL':   ('sal1', 'sal2'),
+    'ACCEL': ('x', 'y', 'z'),
+    'SPEED': ('x', 'y'),
+    'MAG':   ('x', 'y', 'z'),
+}
+
+
+def _sns_datums(name):
+    '''datum names, as many as the payload size holds (16 bits each)'''
+    n     = sns_payload_sizes[name] / 2
+    names = sns_datum_names.get(name, (name.lower(),))[:n]
+    return tuple(names) + tuple([ 'd{}'.format(i)
+                                  for i in range(len(names), n) ])
+
+
+# sns_id: (name, datum names)
+sns_table = OrderedDict([ (sns_id, (name, _sns_datums(name)))
+                          for sns_id, name in [ (2, 'BATT'),
+                                                (3, 'TEMP'),
+                                                (4, 'SAL'),
+                                                (5, 'ACCEL'),
+                                                (6, 'PTEMP'),
+                                                (7, 'PRESS'),
+                                                (8, 'SPEED'),
+                                                (9, 'MAG') ] ])
+
+# precompiled payload decoders, sns_id -> struct
+sns_structs = dict([ (sns_id, struct.Struct('<{}H'.format(len(datums))))
+                     for sns_id, (name, datums) in sns_table.items() ])
+
+
+def sns_name(sns_id):
+    if sns_id in sns_table:
+        return sns_table[sns_id][0]
+    return 'sns/' + str(sns_id)
 
 dt_test_obj     = dt_simple_hdr
 
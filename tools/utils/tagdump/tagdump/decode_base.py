@@ -23,7 +23,7 @@
 import struct
 from   collections import OrderedDict
 
-__version__ = '0.2.0 (db)'
+__version__ = '0.2.1 (db)'
 
 class atom(object):
     '''
@@ -32,6 +32,9 @@ class atom(object):
 
     set will set the instance.attribute "val" to the value
     of the atom's decode of the buffer.
+
+    build is the inverse of set.  It packs "val" back into bytes
+    using the same precompiled struct.
     '''
     def __init__(self, a_tuple):
         self.s_str = a_tuple[0]
@@ -60,11 +63,28 @@ class atom(object):
         self.val = self.s_rec.unpack(buf[:self.s_rec.size])[0]
         return self.s_rec.size
 
+    def zero(self):
+        '''set val to zero (or the empty string for string atoms)'''
+        self.val = '' if self.s_str[-1] == 's' else 0
+
+    def build(self, val = None):
+        '''
+        pack the atom.  if val is given it becomes the new atom.val.
+
+        return the packed bytes (string)
+        '''
+        if val is not None:
+            self.val = val
+        return self.s_rec.pack(self.val)
+
 
 class aggie(OrderedDict):
     '''
     aggie: aggregation node.
     takes one parameter a dictionary of key -> {atom | aggie}
+
+    set decodes a buffer into the tree, build packs the tree back
+    into bytes.
     '''
     def __init__(self, a_dict):
         super(aggie, self).__init__(a_dict)
@@ -96,3 +116,29 @@ class aggie(OrderedDict):
         for key, v_obj in self.iteritems():
             consumed += v_obj.set(buf[consumed:])
         return consumed
+
+    def zero(self):
+        '''zero all atoms in the tree'''
+        for key, v_obj in self.iteritems():
+            if hasattr(v_obj, 'zero'):
+                v_obj.zero()
+
+    def build(self, vals = None):
+        '''
+        pack the tree into bytes, in key order.
+
+        vals, optional, is a dict keyed the same as the aggie.  Values
+        found are stored into the tree before packing (nested dicts for
+        nested aggies).  Anything not in vals is packed from its current
+        val, so set(buf) followed by build() gives back buf.
+
+        Entries that are not objects (decoder scratch) are skipped.
+
+        return a bytearray
+        '''
+        out = bytearray()
+        for key, v_obj in self.iteritems():
+            if not hasattr(v_obj, 'build'):
+                continue
+            out += v_obj.build(vals.get(key) if vals else None)
+        return out
@@ -28,8 +28,9 @@
 import struct
 from   misc_utils   import dump_buf
 from   core_headers import dt_hdr_obj
+from   registry     import Registry
 
-__version__ = '0.2.6 (dt)'
+__version__ = '0.2.9 (dt)'
 
 
 # __all__ exports commonly used definitions.  It gets used
@@ -89,10 +90,16 @@ DT_H_REVISION           = 17
 # key and uses that to insert its vector (req_len. decode, obj, name)
 # into the dictionary.
 #
+# dt_records is a Registry (registry.py).  tagdump_config registers the
+# populators in dt_populators, each is imported on the first lookup of
+# one of the rtypes it lists.  The core decoders and emitters are one
+# module each and every stream starts with REBOOT/VERSION, so there is
+# one core populator.
+#
 # dt_count keeps track of what rtypes we have seen.
 #
 
-dt_records = {}
+dt_records = Registry()
 dt_count   = {}
 
 DTR_REQ_LEN  = 0                        # required length
@@ -110,6 +117,12 @@ DTR_NAME     = 4                        # rtype name
 dt_sync_majik = 0xdedf00ef
 quad_struct   = struct.Struct('<I')      # for searching for syncs
 
+# flat version of dt_hdr_obj, for fast header walks that don't want to
+# go through the object tree.  Must track dt_hdr_obj (core_headers).
+#
+# len, type, recnum, rt (sub_sec, sec, min, hr, dow, day, mon, year), recsum
+dt_hdr_struct = struct.Struct('<HHIHBBBBBBHH')
+
 DT_REBOOT               = 1
 DT_VERSION              = 2
 DT_SYNC                 = 3
@@ -126,6 +139,14 @@ DT_NOTE                 = 23
 DT_CONFIG		= 24
 DT_GPS_RAW_SIRFBIN      = 32
 
+# dt_records populators, (module, rtypes it fills in), see registry.py
+dt_populators = [
+    ('core_populate', (DT_REBOOT, DT_VERSION, DT_SYNC, DT_EVENT, DT_DEBUG,
+                       DT_GPS_VERSION, DT_GPS_TIME, DT_GPS_GEO, DT_GPS_XYZ,
+                       DT_SENSOR_DATA, DT_SENSOR_SET, DT_TEST, DT_NOTE,
+                       DT_CONFIG, DT_GPS_RAW_SIRFBIN)),
+]
+
 
 # common format used by all records.  (rec0)
 # --- offset recnum       rt  len  type  name
@@ -134,6 +155,50 @@ DT_GPS_RAW_SIRFBIN      = 32
 rec0  = '--- @{:<6d} {:6d} {:8d}  {:3d}    {:2d}  {:s}'
 
 
+# where len and recsum live in any record (dt_hdr_obj)
+dt_len_struct    = struct.Struct('<H')
+DT_RECSUM_OFFSET = len(dt_hdr_obj) - len(dt_hdr_obj['recsum'])
+
+
+def dt_recsum(buf, rlen = None):
+    '''
+    compute the recsum of a record.
+
+    byte sum over the record (header and data) with the recsum field
+    itself taken as zero.  16 bits.
+    '''
+    if rlen is None:
+        rlen = len(buf)
+    chksum  = sum(buf[:rlen])
+    chksum -= buf[DT_RECSUM_OFFSET] + buf[DT_RECSUM_OFFSET + 1]
+    return chksum & 0xffff
+
+
+def build_record(obj, vals = None, extra = None):
+    '''
+    build a complete dt record.
+
+    input:  obj     record object descriptor, starts with a dt_hdr_obj
+            vals    optional dict of values, see aggie.build
+            extra   optional bytes that follow obj (owcb, image_info,
+                    sirf packet, note text, ...)
+
+    output: bytearray holding the record.  len and recsum are filled in
+            (both in the buffer and in the hdr object).  No pad bytes.
+    '''
+    buf = obj.build(vals)
+    if extra:
+        buf += extra
+    rlen = len(buf)
+    dt_len_struct.pack_into(buf, 0, rlen)
+    dt_len_struct.pack_into(buf, DT_RECSUM_OFFSET, 0)
+    recsum = dt_recsum(buf)
+    dt_len_struct.pack_into(buf, DT_RECSUM_OFFSET, recsum)
+    dt_hdr_obj['len'].val    = rlen
+    dt_hdr_obj['recsum'].val = recsum
+    return buf
+
+
 def get_systime(rtctime):
     '''
     get systime from a rtctime.
@@ -149,6 +214,16 @@ def get_systime(rtctime):
     return st
 
 
+def rtctime_str(year, mon, day, hr, mn, sec):
+    '''
+    display string for the pieces of a rtctime.
+
+    2018/04/12-13:05:22, the year/mon/day/hr/min/sec fields of a rtctime_obj
+    '''
+    return '{:04d}/{:02d}/{:02d}-{:02d}:{:02d}:{:02d}'.format(
+        year, mon, day, hr, mn, sec)
+
+
 def dt_name(rtype):
     v = dt_records.get(rtype, (0, None, None, None, 'unk'))
     return v[DTR_NAME]
@@ -0,0 +1,364 @@
+'''flat struct decoders for the tag and SiRF C structs'''
+
+# GENERATED by hdrgen.py from image_info.h, overwatch.h, typed_data.h, sirf_msg.h.
+# Do not edit, rerun hdrgen (python -m tagdump.hdrgen) when the headers
+# change.  hdrgen --check tells if this file is out of date.
+#
+# structs:      name -> CStruct.  fmt/size/fields/offsets of the C struct,
+#               flattened.  var is True if the struct ends in a variable
+#               length array (data[0]), size is then the fixed part.
+# mid_structs:  SiRF mid -> struct name.  sb_* structs include the 5 byte
+#               packet header (start1, start2, len, mid), big endian.
+# enums:        enum type -> ((name, value), ...)
+#
+# CStruct is a struct.Struct.  unpack_from(buf, offset) gives the values
+# in fields order, decode(buf, offset) a dict keyed by field name.
+
+import struct
+
+__version__ = '0.0.1 (hg)'
+
+DT_H_REVISION = 17
+
+
+class CStruct(struct.Struct):
+    '''struct.Struct plus field names and offsets of a C struct'''
+    def __init__(self, name, fmt, fields, offsets, var = False):
+        super(CStruct, self).__init__(fmt)
+        self.name    = name
+        self.fields  = fields
+        self.offsets = offsets
+        self.var     = var
+        self.index   = dict(zip(fields, range(len(fields))))
+
+    def offset(self, field):
+        return self.offsets[self.index[field]]
+
+    def decode(self, buf, offset = 0):
+        return dict(zip(self.fields, self.unpack_from(buf, offset)))
+
+
+structs = {}
+
+# image_info.h
+
+# image_ver_t, size 4
+structs['image_ver_t'] = CStruct('image_ver_t', '<HBB',
+    ('build', 'minor', 'major'),
+    (0, 2, 3))
+
+# hw_ver_t, size 2
+structs['hw_ver_t'] = CStruct('hw_ver_t', '<BB',
+    ('hw_rev', 'hw_model'),
+    (0, 1))
+
+# image_info_t, size 144
+structs['image_info_t'] = CStruct('image_info_t', '<IIIIIHBB44s44s30sBB',
+    ('ii_sig', 'image_start', 'image_length', 'vector_chk',
+     'image_chk', 'ver_id.build', 'ver_id.minor', 'ver_id.major',
+     'descriptor0', 'descriptor1', 'stamp_date', 'hw_ver.hw_rev',
+     'hw_ver.hw_model'),
+    (0, 4, 8, 12, 16, 20, 22, 23, 24, 68, 112, 142, 143))
+
+# overwatch.h
+
+# ow_control_block_t, size 84
+structs['ow_control_block_t'] = CStruct('ow_control_block_t', '<IIQIIIIIIIIBBBBIQIIIII',
+    ('ow_sig', 'ow_rpt_flags', 'uptime', 'reset_status',
+     'reset_others', 'from_base', 'fail_count', 'fault_mask_gold',
+     'fault_mask_nib', 'subsys_disable', 'ow_sig_b', 'ow_req',
+     'reboot_reason', 'ow_boot_mode', 'owt_action', 'reboot_count',
+     'elapsed', 'strange', 'strange_loc', 'vec_chk_fail',
+     'image_chk_fail', 'ow_sig_c'),
+    (0, 4, 8, 16, 20, 24, 28, 32, 36, 40, 44, 48, 49, 50, 51, 52, 56,
+     64, 68, 72, 76, 80))
+
+# typed_data.h
+
+# dt_header_t, size 20
+structs['dt_header_t'] = CStruct('dt_header_t', '<HHIHBBBBBBHH',
+    ('len', 'dtype', 'recnum', 'rt.sub_sec', 'rt.sec', 'rt.min',
+     'rt.hr', 'rt.dow', 'rt.day', 'rt.mon', 'rt.year', 'recsum'),
+    (0, 2, 4, 8, 10, 11, 12, 13, 14, 15, 16, 18))
+
+# dt_reboot_t, size 36
+structs['dt_reboot_t'] = CStruct('dt_reboot_t', '<HHIHBBBBBBHHIIII',
+    ('len', 'dtype', 'recnum', 'rt.sub_sec', 'rt.sec', 'rt.min',
+     'rt.hr', 'rt.dow', 'rt.day', 'rt.mon', 'rt.year', 'recsum',
+     'prev_sync', 'sync_majik', 'dt_h_revision', 'base'),
+    (0, 2, 4, 8, 10, 11, 12, 13, 14, 15, 16, 18, 20, 24, 28, 32))
+
+# dt_dump_reboot_t, size 120
+structs['dt_dump_reboot_t'] = CStruct('dt_dump_reboot_t', '<HHIHBBBBBBHHIIIIIIQIIIIIIIIBBBBIQIIIII',
+    ('dt_reboot.len', 'dt_reboot.dtype', 'dt_reboot.recnum',
+     'dt_reboot.rt.sub_sec', 'dt_reboot.rt.sec',
+     'dt_reboot.rt.min', 'dt_reboot.rt.hr', 'dt_reboot.rt.dow',
+     'dt_reboot.rt.day', 'dt_reboot.rt.mon', 'dt_reboot.rt.year',
+     'dt_reboot.recsum', 'dt_reboot.prev_sync',
+     'dt_reboot.sync_majik', 'dt_reboot.dt_h_revision',
+     'dt_reboot.base', 'dt_owcb.ow_sig', 'dt_owcb.ow_rpt_flags',
+     'dt_owcb.uptime', 'dt_owcb.reset_status',
+     'dt_owcb.reset_others', 'dt_owcb.from_base',
+     'dt_owcb.fail_count', 'dt_owcb.fault_mask_gold',
+     'dt_owcb.fault_mask_nib', 'dt_owcb.subsys_disable',
+     'dt_owcb.ow_sig_b', 'dt_owcb.ow_req', 'dt_owcb.reboot_reason',
+     'dt_owcb.ow_boot_mode', 'dt_owcb.owt_action',
+     'dt_owcb.reboot_count', 'dt_owcb.elapsed', 'dt_owcb.strange',
+     'dt_owcb.strange_loc', 'dt_owcb.vec_chk_fail',
+     'dt_owcb.image_chk_fail', 'dt_owcb.ow_sig_c'),
+    (0, 2, 4, 8, 10, 11, 12, 13, 14, 15, 16, 18, 20, 24, 28, 32, 36,
+     40, 44, 52, 56, 60, 64, 68, 72, 76, 80, 84, 85, 86, 87, 88,
+     92, 100, 104, 108, 112, 116))
+
+# dt_version_t, size 24
+structs['dt_version_t'] = CStruct('dt_version_t', '<HHIHBBBBBBHHI',
+    ('len', 'dtype', 'recnum', 'rt.sub_sec', 'rt.sec', 'rt.min',
+     'rt.hr', 'rt.dow', 'rt.day', 'rt.mon', 'rt.year', 'recsum',
+     'base'),
+    (0, 2, 4, 8, 10, 11, 12, 13, 14, 15, 16, 18, 20))
+
+# dt_dump_version_t, size 168
+structs['dt_dump_version_t'] = CStruct('dt_dump_version_t', '<HHIHBBBBBBHHIIIIIIHBB44s44s30sBB',
+    ('dt_ver.len', 'dt_ver.dtype', 'dt_ver.recnum',
+     'dt_ver.rt.sub_sec', 'dt_ver.rt.sec', 'dt_ver.rt.min',
+     'dt_ver.rt.hr', 'dt_ver.rt.dow', 'dt_ver.rt.day',
+     'dt_ver.rt.mon', 'dt_ver.rt.year', 'dt_ver.recsum',
+     'dt_ver.base', 'dt_image_info.ii_sig',
+     'dt_image_info.image_start', 'dt_image_info.image_length',
+     'dt_image_info.vector_chk', 'dt_image_info.image_chk',
+     'dt_image_info.ver_id.build', 'dt_image_info.ver_id.minor',
+     'dt_image_info.ver_id.major', 'dt_image_info.descriptor0',
+     'dt_image_info.descriptor1', 'dt_image_info.stamp_date',
+     'dt_image_info.hw_ver.hw_rev', 'dt_image_info.hw_ver.hw_model'),
+    (0, 2, 4, 8, 10, 11, 12, 13, 14, 15, 16, 18, 20, 24, 28, 32, 36,
+     40, 44, 46, 47, 48, 92, 136, 166, 167))
+
+# dt_sync_t, size 28
+structs['dt_sync_t'] = CStruct('dt_sync_t', '<HHIHBBBBBBHHII',
+    ('len', 'dtype', 'recnum', 'rt.sub_sec', 'rt.sec', 'rt.min',
+     'rt.hr', 'rt.dow', 'rt.day', 'rt.mon', 'rt.year', 'recsum',
+     'prev_sync', 'sync_majik'),
+    (0, 2, 4, 8, 10, 11, 12, 13, 14, 15, 16, 18, 20, 24))
+
+# dt_event_t, size 40
+structs['dt_event_t'] = CStruct('dt_event_t', '<HHIHBBBBBBHHHBBIIII',
+    ('len', 'dtype', 'recnum', 'rt.sub_sec', 'rt.sec', 'rt.min',
+     'rt.hr', 'rt.dow', 'rt.day', 'rt.mon', 'rt.year', 'recsum',
+     'ev', 'pcode', 'w', 'arg0', 'arg1', 'arg2', 'arg3'),
+    (0, 2, 4, 8, 10, 11, 12, 13, 14, 15, 16, 18, 20, 22, 23, 24, 28,
+     32, 36))
+
+# dt_gps_t, size 28
+structs['dt_gps_t'] = CStruct('dt_gps_t', '<HHIHBBBBBBHHIBBH',
+    ('len', 'dtype', 'recnum', 'rt.sub_sec', 'rt.sec', 'rt.min',
+     'rt.hr', 'rt.dow', 'rt.day', 'rt.mon', 'rt.year', 'recsum',
+     'mark_us', 'chip_id', 'dir', 'pad'),
+    (0, 2, 4, 8, 10, 11, 12, 13, 14, 15, 16, 18, 20, 24, 25, 26))
+
+# dt_sensor_data_t, size 28
+structs['dt_sensor_data_t'] = CStruct('dt_sensor_data_t', '<HHIHBBBBBBHHIHH',
+    ('len', 'dtype', 'recnum', 'rt.sub_sec', 'rt.sec', 'rt.min',
+     'rt.hr', 'rt.dow', 'rt.day', 'rt.mon', 'rt.year', 'recsum',
+     'sched_delta', 'sns_id', 'pad'),
+    (0, 2, 4, 8, 10, 11, 12, 13, 14, 15, 16, 18, 20, 24, 26))
+
+# dt_sensor_set_t, size 28
+structs['dt_sensor_set_t'] = CStruct('dt_sensor_set_t', '<HHIHBBBBBBHHIHH',
+    ('len', 'dtype', 'recnum', 'rt.sub_sec', 'rt.sec', 'rt.min',
+     'rt.hr', 'rt.dow', 'rt.day', 'rt.mon', 'rt.year', 'recsum',
+     'sched_delta', 'mask', 'mask_id'),
+    (0, 2, 4, 8, 10, 11, 12, 13, 14, 15, 16, 18, 20, 24, 26))
+
+# sirf_msg.h
+
+# sb_header_t, size 5 + var
+structs['sb_header_t'] = CStruct('sb_header_t', '>BBHB',
+    ('start1', 'start2', 'len', 'mid'),
+    (0, 1, 2, 4), True)
+
+# sb_nav_data_t, size 33 + var, mid 2
+structs['sb_nav_data_t'] = CStruct('sb_nav_data_t', '>BBHBiiihhhBBBHIB',
+    ('start1', 'start2', 'len', 'mid', 'xpos', 'ypos', 'zpos', 'xvel',
+     'yvel', 'zvel', 'mode1', 'hdop', 'mode2', 'week', 'tow',
+     'nsats'),
+    (0, 1, 2, 4, 5, 9, 13, 17, 19, 21, 23, 24, 25, 26, 28, 32), True)
+
+# sb_tracker_data_t, size 12 + var, mid 4
+structs['sb_tracker_data_t'] = CStruct('sb_tracker_data_t', '>BBHBHIB',
+    ('start1', 'start2', 'len', 'mid', 'week', 'tow', 'chans'),
+    (0, 1, 2, 4, 5, 7, 11), True)
+
+# sb_soft_version_data_t, size 5 + var, mid 6
+structs['sb_soft_version_data_t'] = CStruct('sb_soft_version_data_t', '>BBHB',
+    ('start1', 'start2', 'len', 'mid'),
+    (0, 1, 2, 4), True)
+
+# sb_clock_status_data_t, size 24, mid 7
+structs['sb_clock_status_data_t'] = CStruct('sb_clock_status_data_t', '>BBHBHIBIII',
+    ('start1', 'start2', 'len', 'mid', 'week_x', 'tow', 'nsats',
+     'drift', 'bias', 'esttime_ms'),
+    (0, 1, 2, 4, 5, 7, 11, 12, 16, 20))
+
+# sb_error_data_t, size 9 + var, mid 10
+structs['sb_error_data_t'] = CStruct('sb_error_data_t', '>BBHBHH',
+    ('start1', 'start2', 'len', 'mid', 'submsg', 'count'),
+    (0, 1, 2, 4, 5, 7), True)
+
+# sb_almanac_status_data_t, size 8 + var, mid 14
+structs['sb_almanac_status_data_t'] = CStruct('sb_almanac_status_data_t', '>BBHBBH',
+    ('start1', 'start2', 'len', 'mid', 'satid', 'weekstatus'),
+    (0, 1, 2, 4, 5, 6), True)
+
+# sb_nav_lib_data_t, size 60, mid 28
+structs['sb_nav_lib_data_t'] = CStruct('sb_nav_lib_data_t', '>BBHBBIBQQIQHBBBBBBBBBBBHHHBB',
+    ('start1', 'start2', 'len', 'mid', 'chan', 'time_tag', 'sat_id',
+     'soft_time', 'pseudo_range', 'car_freq', 'car_phase',
+     'time_in_track', 'sync_flags', 'c_no_1', 'c_no_2', 'c_no_3',
+     'c_no_4', 'c_no_5', 'c_no_6', 'c_no_7', 'c_no_8', 'c_no_9',
+     'c_no_10', 'delta_range_intv', 'mean_delta_time_range',
+     'extrap_time', 'phase_err_cnt', 'low_pow_cnt'),
+    (0, 1, 2, 4, 5, 6, 10, 11, 19, 27, 31, 39, 41, 42, 43, 44, 45, 46,
+     47, 48, 49, 50, 51, 52, 54, 56, 58, 59))
+
+# sb_geodetic_t, size 95, mid 41
+structs['sb_geodetic_t'] = CStruct('sb_geodetic_t', '>BBHBHHHIHBBBBHIiiiiBHHHhhIIIHiiiiIHHBBB',
+    ('start1', 'start2', 'len', 'mid', 'nav_valid', 'nav_type',
+     'week_x', 'tow', 'utc_year', 'utc_month', 'utc_day',
+     'utc_hour', 'utc_min', 'utc_ms', 'sat_mask', 'lat', 'lon',
+     'alt_elipsoid', 'alt_msl', 'map_datum', 'sog', 'cog',
+     'mag_var', 'climb', 'heading_rate', 'ehpe', 'evpe', 'ete',
+     'ehve', 'clock_bias', 'clock_bias_err', 'clock_drift',
+     'clock_drift_err', 'distance', 'distance_err', 'head_err',
+     'nsats', 'hdop', 'additional_mode'),
+    (0, 1, 2, 4, 5, 7, 9, 11, 15, 17, 18, 19, 20, 21, 23, 27, 31, 35,
+     39, 43, 44, 46, 48, 50, 52, 54, 58, 62, 66, 68, 72, 76, 80,
+     84, 88, 90, 92, 93, 94))
+
+# sb_pps_data_t, size 23, mid 52
+structs['sb_pps_data_t'] = CStruct('sb_pps_data_t', '>BBHBBBBBBHhIBI',
+    ('start1', 'start2', 'len', 'mid', 'hr', 'min', 'sec', 'day', 'mo',
+     'year', 'utcintoff', 'utcfracoff', 'status', 'reserved'),
+    (0, 1, 2, 4, 5, 6, 7, 8, 9, 10, 12, 14, 18, 19))
+
+# sb_session_rsp_t, size 7, mid 74
+structs['sb_session_rsp_t'] = CStruct('sb_session_rsp_t', '>BBHBBB',
+    ('start1', 'start2', 'len', 'mid', 'sid', 'status'),
+    (0, 1, 2, 4, 5, 6))
+
+# sb_pwr_rsp_t, size 10, mid 90
+structs['sb_pwr_rsp_t'] = CStruct('sb_pwr_rsp_t', '>BBHBBHH',
+    ('start1', 'start2', 'len', 'mid', 'sid', 'error', 'reserved'),
+    (0, 1, 2, 4, 5, 6, 8))
+
+# typed_data.h
+
+# dt_note_t, size 20
+structs['dt_note_t'] = CStruct('dt_note_t', '<HHIHBBBBBBHH',
+    ('len', 'dtype', 'recnum', 'rt.sub_sec', 'rt.sec', 'rt.min',
+     'rt.hr', 'rt.dow', 'rt.day', 'rt.mon', 'rt.year', 'recsum'),
+    (0, 2, 4, 8, 10, 11, 12, 13, 14, 15, 16, 18))
+
+
+mid_structs = {
+      2: 'sb_nav_data_t',
+      4: 'sb_tracker_data_t',
+      6: 'sb_soft_version_data_t',
+      7: 'sb_clock_status_data_t',
+     10: 'sb_error_data_t',
+     14: 'sb_almanac_status_data_t',
+     28: 'sb_nav_lib_data_t',
+     41: 'sb_geodetic_t',
+     52: 'sb_pps_data_t',
+     74: 'sb_session_rsp_t',
+     90: 'sb_pwr_rsp_t',
+}
+
+
+enums = {
+    'ow_boot_mode_t': (
+        ('OW_BOOT_GOLD', 0),
+        ('OW_BOOT_OWT', 1),
+        ('OW_BOOT_NIB', 2),
+    ),
+    'ow_request_t': (
+        ('OW_REQ_BOOT', 0),
+        ('OW_REQ_INSTALL', 1),
+        ('OW_REQ_FAIL', 2),
+    ),
+    'owt_action_t': (
+        ('OWT_ACT_NONE', 0),
+        ('OWT_ACT_INIT', 1),
+        ('OWT_ACT_INSTALL', 2),
+        ('OWT_ACT_EJECT', 3),
+    ),
+    'ow_reboot_reason_t': (
+        ('ORR_NONE', 0),
+        ('ORR_FAIL', 1),
+        ('ORR_OWCB_CLOBBER', 2),
+        ('ORR_STRANGE', 3),
+        ('ORR_FORCED', 4),
+        ('ORR_TIME_SKEW', 5),
+        ('ORR_USER_REQUEST', 6),
+        ('ORR_PANIC', 7),
+        ('ORR_LOW_PWR', 8),
+    ),
+    'dtype_t': (
+        ('DT_NONE', 0),
+        ('DT_REBOOT', 1),
+        ('DT_VERSION', 2),
+        ('DT_SYNC', 3),
+        ('DT_EVENT', 4),
+        ('DT_DEBUG', 5),
+        ('DT_GPS_VERSION', 16),
+        ('DT_GPS_TIME', 17),
+        ('DT_GPS_GEO', 18),
+        ('DT_GPS_XYZ', 19),
+        ('DT_SENSOR_DATA', 20),
+        ('DT_SENSOR_SET', 21),
+        ('DT_TEST', 22),
+        ('DT_NOTE', 23),
+        ('DT_CONFIG', 24),
+        ('DT_GPS_RAW_SIRFBIN', 32),
+        ('DT_MAX', 32),
+        ('DT_16', 65535),
+    ),
+    'dt_event_id_t': (
+        ('DT_EVENT_SURFACED', 1),
+        ('DT_EVENT_SUBMERGED', 2),
+        ('DT_EVENT_DOCKED', 3),
+        ('DT_EVENT_UNDOCKED', 4),
+        ('DT_EVENT_GPS_GEO', 5),
+        ('DT_EVENT_GPS_XYZ', 6),
+        ('DT_EVENT_GPS_TIME', 7),
+        ('DT_EVENT_SSW_DELAY_TIME', 8),
+        ('DT_EVENT_SSW_BLK_TIME', 9),
+        ('DT_EVENT_SSW_GRP_TIME', 10),
+        ('DT_EVENT_PANIC_WARN', 11),
+        ('DT_EVENT_GPS_BOOT', 32),
+        ('DT_EVENT_GPS_BOOT_TIME', 33),
+        ('DT_EVENT_GPS_BOOT_FAIL', 49),
+        ('DT_EVENT_GPS_HW_CONFIG', 50),
+        ('DT_EVENT_GPS_RECONFIG', 34),
+        ('DT_EVENT_GPS_TURN_ON', 35),
+        ('DT_EVENT_GPS_STANDBY', 36),
+        ('DT_EVENT_GPS_TURN_OFF', 37),
+        ('DT_EVENT_GPS_MPM', 38),
+        ('DT_EVENT_GPS_FULL_PWR', 39),
+        ('DT_EVENT_GPS_PULSE', 40),
+        ('DT_EVENT_GPS_FAST', 41),
+        ('DT_EVENT_GPS_FIRST', 42),
+        ('DT_EVENT_GPS_SATS_2', 43),
+        ('DT_EVENT_GPS_SATS_7', 44),
+        ('DT_EVENT_GPS_SATS_41', 45),
+        ('DT_EVENT_GPS_CYCLE_TIME', 46),
+        ('DT_EVENT_GPS_RX_ERR', 47),
+        ('DT_EVENT_GPS_AWAKE_S', 48),
+        ('DT_EVENT_GPS_CMD', 51),
+        ('DT_EVENT_GPS_RAW_TX', 52),
+        ('DT_EVENT_GPS_SWVER_TO', 53),
+        ('DT_EVENT_16', 65535),
+    ),
+    'gps_chip_id_t': (
+        ('CHIP_GPS_GSD4E', 1),
+    ),
+}
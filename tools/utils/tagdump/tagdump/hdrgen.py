@@ -0,0 +1,607 @@
+'''generate flat struct decoders from the C headers'''
+
+# Copyright (c) 2018 Eric B. Decker, Daniel J. Maltbie
+# All rights reserved.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# See COPYING in the top level directory of this source tree.
+#
+# Contact: Eric B. Decker <cire831@gmail.com>
+#          Daniel J. Maltbie <dmaltbie@daloma.org>
+
+####
+#
+# hdrgen: parse the typedefs in include/{typed_data,overwatch,image_info,
+# sirf_msg}.h and write hdr_structs.py, flat struct.Struct decoders for
+# every struct: format string, field names, field offsets and size.
+#
+# usage: hdrgen [-h] [-V] [-I INCLUDE] [-o OUTPUT] [--check] [-v]
+#
+#   -I INCLUDE      directory holding the headers.  (args.include)
+#                   default <top>/include
+#   -o OUTPUT       file to write.  (args.output)
+#                   default hdr_structs.py next to this file.
+#   --check         don't write.  compare hdr_structs.py, DT_H_REVISION,
+#                   the DT_ rtypes, event ids and the hand written
+#                   object descriptors (core_headers, sirf_headers)
+#                   against the headers.  exit 1 on any mismatch.
+#   -v              more detail.
+#
+# What we understand is what these headers use:
+#
+#   typedef enum [tag] { A = 1, B, ... } name;
+#   typedef struct [tag] { fields } [PACKED] name;
+#   typedef old new;
+#   #define NAME <integer>
+#
+# fields are <type> <name>[<dim>]; with dim a number or a #define.  An
+# array of dim 0 (data[0]) is a variable length tail and marks the
+# struct variable (var).  Nested structs are flattened, names joined
+# with '.' (rt.sub_sec).  uint8_t arrays become one 'Ns' field, other
+# arrays one field per element, name[i].
+#
+# Enums are built with -fshort-enums, they take the smallest unsigned
+# size that holds their largest value (dtype_t has DT_16 = 0xffff to
+# force 2 bytes).  Structs marked PACKED have no padding, the others
+# get natural (arm eabi) alignment and pad bytes ('x') where needed.
+#
+# Tag structs are native, little endian ('<').  sirf_msg.h describes
+# SiRF packets which are big endian on the wire ('>').  Each sb_*
+# struct starts with the 5 byte packet header (start1, start2, len,
+# mid).  The "/* MID n, ..." comment in front of a struct maps it to
+# its mid (mid_structs).
+#
+# rtctime_t lives in the tinyos tree (rtctime.h), not in include.  It is
+# described here (EXTERN_STRUCTS).
+
+import os
+import re
+import sys
+import struct
+import argparse
+
+from   __init__ import __version__ as VERSION
+
+__version__ = '0.0.1 (hg)'
+
+HEADERS = [ 'image_info.h', 'overwatch.h', 'typed_data.h', 'sirf_msg.h' ]
+BIG_ENDIAN_HEADERS = [ 'sirf_msg.h' ]
+
+BASE_TYPES = {
+    'uint8_t':  'B', 'int8_t':  'b', 'char': 'B',
+    'uint16_t': 'H', 'int16_t': 'h',
+    'uint32_t': 'I', 'int32_t': 'i',
+    'uint64_t': 'Q', 'int64_t': 'q',
+}
+
+# types used by the headers but defined elsewhere, (type, name, dim)
+EXTERN_STRUCTS = {
+    'rtctime_t': [ ('uint16_t', 'sub_sec', None),
+                   ('uint8_t',  'sec',     None),
+                   ('uint8_t',  'min',     None),
+                   ('uint8_t',  'hr',      None),
+                   ('uint8_t',  'dow',     None),
+                   ('uint8_t',  'day',     None),
+                   ('uint8_t',  'mon',     None),
+                   ('uint16_t', 'year',    None) ],
+}
+
+# hdr_structs name -> (module, object, header bytes the object skips)
+# used by --check.  sirf objects start after the mid.
+OBJECT_MAP = [
+    ('dt_header_t',             'core_headers', 'dt_hdr_obj',      0),
+    ('dt_reboot_t',             'core_headers', 'dt_reboot_obj',   0),
+    ('ow_control_block_t',      'core_headers', 'owcb_obj',        0),
+    ('dt_version_t',            'core_headers', 'dt_version_obj',  0),
+    ('image_info_t',            'core_headers', 'image_info_obj',  0),
+    ('dt_sync_t',               'core_headers', 'dt_sync_obj',     0),
+    ('dt_event_t',              'core_headers', 'dt_event_obj',    0),
+    ('dt_gps_t',                'core_headers', 'dt_gps_hdr_obj',  0),
+    ('dt_note_t',               'core_headers', 'dt_note_obj',     0),
+    ('dt_sensor_data_t',        'core_headers', 'dt_sen_data_obj', 0),
+    ('dt_sensor_set_t',         'core_headers', 'dt_sen_set_obj',  0),
+    ('sb_nav_data_t',           'sirf_headers', 'sirf_nav_obj',    5),
+    ('sb_tracker_data_t',       'sirf_headers', 'sirf_navtrk_obj', 5),
+    ('sb_geodetic_t',           'sirf_headers', 'sirf_geo_obj',    5),
+    ('sb_pwr_rsp_t',            'sirf_headers', 'sirf_pwr_mode_rsp_obj', 5),
+]
+
+
+class HdrError(Exception):
+    pass
+
+
+########################################################################
+#
+# parsing
+#
+
+def _comment(m):
+    '''comments go away, except "MID n," which leaves a marker'''
+    mid = re.search(r'^[\s*]*MID\s+(\d+),', m.group(0)[2:-2], re.M)
+    if mid:
+        return ' @MID {}@ '.format(mid.group(1))
+    return ' '
+
+
+def c_int(s, defines):
+    '''value of a C integer expression made of literals and #defines'''
+    s = re.sub(r'\b(0[xX][0-9a-fA-F]+|\d+)[uUlL]+\b', r'\1', s.strip())
+    s = re.sub(r'\b[A-Za-z_]\w*\b',
+               lambda m: str(defines[m.group(0)]) if m.group(0) in defines
+                         else m.group(0), s)
+    if not re.match(r'^[\s\d()xXa-fA-F+\-*/|<>&~]+$', s):
+        raise HdrError('not an integer: {}'.format(s))
+    return int(eval(s.replace('/', '//'), {}, {}))
+
+
+class Header(object):
+    '''what one header file defines'''
+    def __init__(self, path):
+        self.path    = path
+        self.name    = os.path.basename(path)
+        self.endian  = '>' if self.name in BIG_ENDIAN_HEADERS else '<'
+        self.text    = open(path).read()
+
+
+class Parser(object):
+    '''collect defines, enums, structs and aliases from headers'''
+    def __init__(self):
+        self.defines = {}               # name -> int
+        self.enums   = {}               # enum type -> [(name, value), ...]
+        self.enum_order = []
+        self.structs = {}               # name -> (fields, packed, endian, hdr, mid)
+        self.order   = []               # struct names in header order
+        self.aliases = {}               # new -> old
+
+    def parse(self, hdr):
+        text = re.sub(r'/\*.*?\*/', _comment, hdr.text, flags = re.S)
+        text = re.sub(r'//[^\n]*', ' ', text)
+
+        for m in re.finditer(r'^\s*#\s*define\s+(\w+)\s+([^\n]+)$', text, re.M):
+            try:
+                self.defines[m.group(1)] = c_int(m.group(2), self.defines)
+            except (HdrError, SyntaxError, TypeError):
+                pass
+        text = re.sub(r'^\s*#[^\n]*$', ' ', text, flags = re.M)
+
+        decl = re.compile(
+            r'(?:@MID (\d+)@\s*)?typedef\s+(enum|struct)\s*\w*\s*'
+            r'\{([^{}]*)\}\s*(PACKED)?\s*(\w+)\s*;'
+            r'|typedef\s+(\w+)\s+(\w+)\s*;'
+            r'|\benum\s*\{([^{}]*)\}\s*;', re.S)
+        for m in decl.finditer(text):
+            mid, kind, body, packed, name, old, new, anon = m.groups()
+            if old:
+                self.aliases[new] = old
+            elif anon is not None:
+                self.enum_body(None, anon)
+            elif kind == 'enum':
+                self.enum_body(name, body)
+            else:
+                self.struct_body(name, body, packed, hdr,
+                                 int(mid) if mid else None)
+
+    def enum_body(self, name, body):
+        vals = []
+        nxt  = 0
+        for item in body.replace('@', ' ').split(','):
+            item = item.strip()
+            if not item:
+                continue
+            if '=' in item:
+                k, v = [ x.strip() for x in item.split('=', 1) ]
+                try:
+                    nxt = c_int(v, self.defines)
+                except (HdrError, SyntaxError, TypeError):
+                    if name:
+                        raise HdrError('enum {}: {}'.format(name, item))
+                    continue            # sizeof() etc in anon enums
+            else:
+                k = item
+            vals.append((k, nxt))
+            self.defines[k] = nxt
+            nxt += 1
+        if name:
+            self.enums[name] = vals
+            self.enum_order.append(name)
+
+    def struct_body(self, name, body, packed, hdr, mid):
+        fields = []
+        for decl in body.split(';'):
+            decl = re.sub(r'@MID \d+@', ' ', decl).strip()
+            if not decl:
+                continue
+            m = re.match(r'^(\w+)\s+(\w+)\s*(?:\[\s*([^\]]+)\])?$', decl)
+            if not m:
+                raise HdrError('{}: {}: can not parse "{}"'.format(
+                    hdr.name, name, decl))
+            ftype, fname, dim = m.groups()
+            if dim is not None:
+                dim = c_int(dim, self.defines)
+            fields.append((ftype, fname, dim))
+        self.structs[name] = (fields, bool(packed), hdr.endian, hdr.name, mid)
+        self.order.append(name)
+
+
+########################################################################
+#
+# layout
+#
+
+class Layout(object):
+    '''flat layout of one struct'''
+    def __init__(self, name, endian, mid = None, hdr = None):
+        self.name    = name
+        self.endian  = endian
+        self.mid     = mid
+        self.hdr     = hdr
+        self.codes   = []               # struct codes, 'x' pads included
+        self.fields  = []
+        self.offsets = []
+        self.size    = 0
+        self.align   = 1
+        self.var     = False
+
+    @property
+    def fmt(self):
+        return self.endian + ''.join(self.codes)
+
+
+class Resolver(object):
+    '''turn parsed structs into flat layouts'''
+    def __init__(self, parser):
+        self.p      = parser
+        self.cache  = {}
+
+    def resolve_type(self, t):
+        while t in self.p.aliases:
+            t = self.p.aliases[t]
+        return t
+
+    def enum_code(self, t):
+        top = max([ v for k, v in self.p.enums[t] ] or [0])
+        if top <= 0xff:
+            return 'B'
+        if top <= 0xffff:
+            return 'H'
+        return 'I'
+
+    def members(self, t):
+        '''(fields, packed, endian, hdr, mid) of a struct type'''
+        if t in self.p.structs:
+            return self.p.structs[t]
+        if t in EXTERN_STRUCTS:
+            return (EXTERN_STRUCTS[t], True, None, None, None)
+        raise HdrError('unknown type: {}'.format(t))
+
+    def layout(self, name, endian = None):
+        key = (name, endian)
+        if key in self.cache:
+            return self.cache[key]
+        t = self.resolve_type(name)
+        fields, packed, s_endian, hdr, mid = self.members(t)
+        lo = Layout(name, endian or s_endian or '<', mid, hdr)
+        for ftype, fname, dim in fields:
+            self.add(lo, ftype, fname, dim, packed)
+        if not packed:
+            self.pad(lo, lo.align)
+        self.cache[key] = lo
+        return lo
+
+    def pad(self, lo, align):
+        extra = -lo.size % align
+        if extra:
+            lo.codes.append('{}x'.format(extra) if extra > 1 else 'x')
+            lo.size += extra
+
+    def add(self, lo, ftype, fname, dim, packed):
+        if lo.var:
+            raise HdrError('{}: {} follows a variable length field'.format(
+                lo.name, fname))
+        if dim == 0:
+            lo.var = True
+            return
+        t = self.resolve_type(ftype)
+        if t in BASE_TYPES or t in self.p.enums:
+            code  = BASE_TYPES[t] if t in BASE_TYPES else self.enum_code(t)
+            csize = struct.calcsize('<' + code)
+            if not packed:
+                self.pad(lo, csize)
+                lo.align = max(lo.align, csize)
+            if dim is not None and code == 'B':
+                lo.fields.append(fname)
+                lo.offsets.append(lo.size)
+                lo.codes.append('{}s'.format(dim))
+                lo.size += dim
+                return
+            for i in range(dim if dim is not None else 1):
+                lo.fields.append(fname if dim is None
+                                 else '{}[{}]'.format(fname, i))
+                lo.offsets.append(lo.size)
+                lo.codes.append(code)
+                lo.size += csize
+            return
+
+        sub = self.layout(t, lo.endian)
+        if sub.var:
+            raise HdrError('{}: nested variable struct {}'.format(lo.name, t))
+        sub_packed = self.members(t)[1]
+        if not packed and not sub_packed:
+            self.pad(lo, sub.align)
+            lo.align = max(lo.align, sub.align)
+        for i in range(dim if dim is not None else 1):
+            prefix = fname if dim is None else '{}[{}]'.format(fname, i)
+            base   = lo.size
+            for f, o in zip(sub.fields, sub.offsets):
+                lo.fields.append('{}.{}'.format(prefix, f))
+                lo.offsets.append(base + o)
+            lo.codes.extend(sub.codes)
+            lo.size += sub.size
+
+
+def load(include):
+    '''parse the headers, returns (parser, [layouts in header order])'''
+    p = Parser()
+    for name in HEADERS:
+        p.parse(Header(os.path.join(include, name)))
+    r = Resolver(p)
+    layouts = [ r.layout(name) for name in p.order ]
+    for new, old in sorted(p.aliases.items()):
+        if r.resolve_type(old) in p.structs:
+            lo = r.layout(new)
+            lo.hdr = p.structs[r.resolve_type(old)][3]
+            layouts.append(lo)
+    return p, layouts
+
+
+########################################################################
+#
+# output
+#
+
+PREAMBLE = """\
+'''flat struct decoders for the tag and SiRF C structs'''
+
+# GENERATED by hdrgen.py from {headers}.
+# Do not edit, rerun hdrgen (python -m tagdump.hdrgen) when the headers
+# change.  hdrgen --check tells if this file is out of date.
+#
+# structs:      name -> CStruct.  fmt/size/fields/offsets of the C struct,
+#               flattened.  var is True if the struct ends in a variable
+#               length array (data[0]), size is then the fixed part.
+# mid_structs:  SiRF mid -> struct name.  sb_* structs include the 5 byte
+#               packet header (start1, start2, len, mid), big endian.
+# enums:        enum type -> ((name, value), ...)
+#
+# CStruct is a struct.Struct.  unpack_from(buf, offset) gives the values
+# in fields order, decode(buf, offset) a dict keyed by field name.
+
+import struct
+
+__version__ = '{version}'
+
+DT_H_REVISION = {dt_rev}
+
+
+class CStruct(struct.Struct):
+    '''struct.Struct plus field names and offsets of a C struct'''
+    def __init__(self, name, fmt, fields, offsets, var = False):
+        super(CStruct, self).__init__(fmt)
+        self.name    = name
+        self.fields  = fields
+        self.offsets = offsets
+        self.var     = var
+        self.index   = dict(zip(fields, range(len(fields))))
+
+    def offset(self, field):
+        return self.offsets[self.index[field]]
+
+    def decode(self, buf, offset = 0):
+        return dict(zip(self.fields, self.unpack_from(buf, offset)))
+
+
+"""
+
+
+def _tuple(items, indent, width = 72):
+    '''repr of a tuple wrapped to width, continuation lines at indent'''
+    out  = []
+    line = '('
+    for i, it in enumerate(items):
+        s = repr(it) + (',' if i < len(items) - 1 or len(items) == 1 else '')
+        if len(line) + len(s) + 1 > width - indent and line != '(':
+            out.append(line.rstrip())
+            line = ' ' * (indent + 1)
+        line += s + ' '
+    out.append(line.rstrip() + ')')
+    return '\n'.join(out)
+
+
+def generate(p, layouts):
+    '''text of hdr_structs.py'''
+    out = [ PREAMBLE.format(headers = ', '.join(HEADERS),
+                            version = __version__,
+                            dt_rev  = p.defines.get('DT_H_REVISION')) ]
+    out.append('structs = {}\n')
+    hdr = None
+    for lo in layouts:
+        if lo.hdr != hdr:
+            hdr = lo.hdr
+            out.append('\n# {}\n'.format(hdr))
+        out.append('\n# {}, size {}{}{}\n'.format(
+            lo.name, lo.size, ' + var' if lo.var else '',
+            ', mid {}'.format(lo.mid) if lo.mid is not None else ''))
+        out.append("structs['{}'] = CStruct('{}', '{}',\n".format(
+            lo.name, lo.name, lo.fmt))
+        out.append('    {},\n'.format(_tuple(lo.fields, 4)))
+        out.append('    {}{})\n'.format(_tuple(lo.offsets, 4),
+                                        ', True' if lo.var else ''))
+
+    out.append('\n\nmid_structs = {\n')
+    for lo in sorted([ lo for lo in layouts if lo.mid is not None ],
+                     key = lambda lo: lo.mid):
+        out.append("    {:3d}: '{}',\n".format(lo.mid, lo.name))
+    out.append('}\n')
+
+    out.append('\n\nenums = {\n')
+    for name in p.enum_order:
+        out.append("    '{}': (\n".format(name))
+        for k, v in p.enums[name]:
+            out.append("        ('{}', {}),\n".format(k, v))
+        out.append('    ),\n')
+    out.append('}\n')
+    return ''.join(out)
+
+
+########################################################################
+#
+# --check
+#
+
+def obj_codes(obj):
+    '''flat struct codes of an object descriptor, None if not flat'''
+    codes = []
+    if hasattr(obj, 's_str') and hasattr(obj, 's_rec'):
+        if not obj.s_str:
+            return None                 # special atom (swver etc)
+        return [ obj.s_str.lstrip('<>!=@') ]
+    if not isinstance(obj, dict):
+        return None
+    for key, v in obj.items():
+        c = obj_codes(v)
+        if c is None:
+            return None
+        codes.extend(c)
+    return codes
+
+
+def expand(codes):
+    '''struct codes -> one code per field ('12s' stays, 'x' pads dropped)'''
+    return [ c for c in codes if not c.endswith('x') ]
+
+
+def check(p, layouts, out_path, verbose):
+    '''compare generated and hand written definitions, returns # errors'''
+    import dt_defs
+    import core_headers
+    import sirf_headers
+    errors = []
+
+    gen = generate(p, layouts)
+    try:
+        cur = open(out_path).read()
+    except IOError:
+        cur = None
+    if cur != gen:
+        errors.append('{} is out of date, rerun hdrgen'.format(
+            os.path.basename(out_path)))
+
+    dt_rev = p.defines.get('DT_H_REVISION')
+    if dt_rev != dt_defs.DT_H_REVISION:
+        errors.append('DT_H_REVISION: typed_data.h {}, dt_defs {}'.format(
+            dt_rev, dt_defs.DT_H_REVISION))
+
+    for k, v in p.enums.get('dtype_t', []):
+        if k in ('DT_NONE', 'DT_MAX', 'DT_16'):
+            continue
+        have = getattr(dt_defs, k, None)
+        if have != v:
+            errors.append('dtype_t {} = {}, dt_defs has {}'.format(k, v, have))
+
+    for k, v in p.enums.get('dt_event_id_t', []):
+        if k == 'DT_EVENT_16':
+            continue
+        have = core_headers.event_names.get(v)
+        if have != k[len('DT_EVENT_'):]:
+            errors.append('dt_event_id_t {} = {}, event_names has {}'.format(
+                k, v, have))
+
+    for name, size in sorted(core_headers.sns_payload_sizes.items()):
+        have = p.defines.get(name + '_PAYLOAD_SIZE')
+        if have != size:
+            errors.append('{}_PAYLOAD_SIZE = {}, sns_payload_sizes has {}'.format(
+                name, have, size))
+
+    by_name = dict([ (lo.name, lo) for lo in layouts ])
+    mods = { 'core_headers': core_headers, 'sirf_headers': sirf_headers }
+    for name, mod, objname, skip in OBJECT_MAP:
+        lo  = by_name[name]
+        obj = getattr(mods[mod], objname)
+        c_codes = expand(lo.codes)
+        c_len   = lo.size
+        if skip:
+            skip_fields = len([ o for o in lo.offsets if o < skip ])
+            c_codes = c_codes[skip_fields:]
+            c_len  -= skip
+        o_codes = obj_codes(obj)
+        o_len   = len(obj)
+        if lo.var:
+            # the object may describe part of the tail, compare the fixed part
+            o_codes = o_codes[:len(c_codes)] if o_codes else o_codes
+            o_len   = struct.calcsize('<' + ''.join(o_codes or []))
+        if o_len != c_len:
+            errors.append('{}: {} bytes, {}.{} {} bytes'.format(
+                name, c_len, mod, objname, o_len))
+        elif o_codes != c_codes:
+            errors.append('{}: fields {}, {}.{} {}'.format(
+                name, ''.join(c_codes), mod, objname, ''.join(o_codes or [])))
+        elif verbose:
+            print('  ok  {:24s} {}.{}'.format(name, mod, objname))
+
+    for e in errors:
+        print('*** ' + e)
+    return len(errors)
+
+
+def parseargs():
+    top = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                       '..', '..', '..', '..')
+    parser = argparse.ArgumentParser(
+        description='Generate flat struct decoders (hdr_structs.py) '
+                    'from the tag C headers.')
+    parser.add_argument('-V', '--version', action='version',
+                        version='%(prog)s ' + VERSION + ':  ' + __version__)
+    parser.add_argument('-I', '--include',
+                        default=os.path.normpath(os.path.join(top, 'include')),
+                        help='directory holding the headers')
+    parser.add_argument('-o', '--output',
+                        default=os.path.join(os.path.dirname(
+                            os.path.abspath(__file__)), 'hdr_structs.py'),
+                        help='file to write (default hdr_structs.py)')
+    parser.add_argument('--check', action='store_true',
+                        help='compare instead of writing, exit 1 on mismatch')
+    parser.add_argument('-v', '--verbose', action='count', default=0,
+                        help='increase output verbosity')
+    return parser.parse_args()
+
+
+def main():
+    args = parseargs()
+    try:
+        p, layouts = load(args.include)
+    except (HdrError, IOError) as e:
+        print('*** hdrgen: {}'.format(e))
+        sys.exit(1)
+    if args.check:
+        sys.exit(1 if check(p, layouts, args.output, args.verbose) else 0)
+    with open(args.output, 'w') as f:
+        f.write(generate(p, layouts))
+    if args.verbose:
+        for lo in layouts:
+            print('{:28s} {:4d}{:4s} {}'.format(lo.name, lo.size,
+                '+var' if lo.var else '', lo.fmt))
+
+if __name__ == '__main__':
+    main()
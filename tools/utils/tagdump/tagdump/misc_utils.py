@@ -22,32 +22,80 @@
 
 # Misc Utilities
 #
+# hex dumps
+#
+#   buf_str     'xx xx xx ' display bytes of a buffer.
+#   hex_dump    whole buffer as one string, 16 bytes per line.  first
+#               line starts with desc, following lines with the offset.
+#               ascii=True adds a |....| column (tagdump/sirfdump -vvvv).
+#   dump_buf    print hex_dump.
+#   dump_bufs   print a batch of (offset, buf) records with one write.
+#               (tagdump -vvvv, the headers resync turned down)
+#
+# buf_str is a table lookup per byte and one join.  hex_dump slices the
+# buf_str output into lines and joins once, nothing is built up a piece
+# at a time.  The old loop appended to a string per byte, which only
+# stays linear while CPython can resize the string in place.
+
+__version__ = '0.0.4 (mu)'
+
+HEX_STRIDE = 16                         # bytes per hex dump line
+
+_hex_byte  = [ '{:02x} '.format(c) for c in range(256) ]
+_printable = ''.join([ chr(c) if 32 <= c < 127 else '.' for c in range(256) ])
 
-import binascii
 
 def buf_str(buf):
     """
     Convert buffer into its display bytes
     """
-    i    = 0
-    p_ds = ''
-    p_s  = binascii.hexlify(buf)
-    while (i < (len(p_s))):
-        p_ds += p_s[i:i+2] + ' '
-        i += 2
-    return p_ds
-
-
-def dump_buf(buf, pre = '', desc = 'rec:  '):
-    bs = buf_str(buf)
-    stride = 16         # how many bytes per line
-
-    # 3 chars per byte
-    idx = 0
-    print(pre + desc),
-    while(idx < len(bs)):
-        max_loc = min(len(bs), idx + (stride * 3))
-        print(bs[idx:max_loc])
-        idx += (stride * 3)
-        if idx < len(bs):              # if more then print counter
-            print(pre + '{:04x}: '.format(idx/3)),
+    return ''.join(map(_hex_byte.__getitem__, bytearray(buf)))
+
+
+def hex_dump(buf, pre = '', desc = 'rec:  ', ascii = False):
+    """
+    Format buf as a hex dump, returned as one string.
+
+    the first line starts with pre + desc, following lines with pre and
+    the offset of the line.  ascii adds the printable
+    bytes of each line on the right.  Every line ends with a newline
+    except when buf is empty, then only pre + desc is returned.
+    """
+    if not buf:
+        return pre + desc
+    bs    = buf_str(buf)
+    width = HEX_STRIDE * 3              # 3 chars per byte
+    lines = []
+    for idx in xrange(0, len(buf), HEX_STRIDE):
+        if idx:
+            lead = '{}{:04x}:  '.format(pre, idx)
+        else:
+            lead = pre + desc + ' '
+        hx = bs[idx * 3:idx * 3 + width]
+        if ascii:
+            hx = '{:{}s} |{}|'.format(hx, width,
+                str(buf[idx:idx + HEX_STRIDE]).translate(_printable))
+        lines.append(lead + hx)
+    lines.append('')
+    return '\n'.join(lines)
+
+
+def dump_buf(buf, pre = '', desc = 'rec:  ', ascii = False):
+    print(hex_dump(buf, pre, desc, ascii)),
+
+
+def dump_bufs(recs, pre = '', ascii = False):
+    """
+    Hex dump a batch of records, recs is a list of (offset, buf).
+
+    each record gets a '@<offset>' line and a dump with offsets relative
+    to the record.  Everything is formatted first and printed at once.
+    """
+    out = []
+    for offset, buf in recs:
+        out.append('{}@{} (0x{:x}), len {}\n'.format(pre, offset, offset,
+                                                    len(buf)))
+        out.append(hex_dump(buf, pre, 'rec:  ', ascii))
+        if not buf:
+            out.append('\n')
+    print(''.join(out)),
@@ -0,0 +1,105 @@
+'''buffered output for emitters'''
+
+# Copyright (c) 2018 Eric B. Decker, Daniel J. Maltbie
+# All rights reserved.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# See COPYING in the top level directory of this source tree.
+#
+# Contact: Eric B. Decker <cire831@gmail.com>
+#          Daniel J. Maltbie <dmaltbie@daloma.org>
+
+# Emitters print a handful of lines per record.  With a plain stdout
+# every one of those can end up as a write syscall (line buffered tty,
+# or small pipe buffers) and for big dumps that is where the time goes.
+#
+# OutBuf collects output in memory and writes it out OUTBUF_SIZE at a
+# time.  install() puts an OutBuf in as sys.stdout, so all the existing
+# print statements (softspace and all) go through it unchanged.
+#
+# Flush points:
+#
+#   tail        TagFile flushes before it sleeps waiting for more data.
+#   error       uncaught exceptions flush before the traceback.
+#   exit        end of dump and atexit.
+#
+# Templates stay str.format templates.  On python 2.7 '%' with field
+# widths measures slower than str.format for our record lines, so there
+# is nothing to gain by converting them.  Templates used per record are
+# module level constants (rec0, rbt1a, rnavtrkx, gps0, ...) and are not
+# rebuilt per call.
+
+import sys
+import atexit
+
+__version__ = '0.0.1 (ob)'
+
+OUTBUF_SIZE = 256 * 1024
+
+
+class OutBuf(object):
+    '''large buffered writer sitting in front of a file'''
+    def __init__(self, fd, size = OUTBUF_SIZE):
+        super(OutBuf, self).__init__()
+        self.fd        = fd
+        self.size      = size
+        self.buf       = []
+        self.len       = 0
+        self.softspace = 0              # print statement state
+
+    def write(self, s):
+        self.buf.append(s)
+        self.len += len(s)
+        if self.len >= self.size:
+            self.flush()
+
+    def writelines(self, lines):
+        for s in lines:
+            self.write(s)
+
+    def flush(self):
+        if self.buf:
+            self.fd.write(''.join(self.buf))
+            self.buf = []
+            self.len = 0
+        self.fd.flush()
+
+    def fileno(self):
+        return self.fd.fileno()
+
+    def isatty(self):
+        return self.fd.isatty()
+
+
+def flush():
+    '''flush stdout, whatever it is'''
+    try:
+        sys.stdout.flush()
+    except (IOError, ValueError):
+        pass
+
+
+def _excepthook(etype, value, tb):
+    flush()
+    sys.__excepthook__(etype, value, tb)
+
+
+def install(size = OUTBUF_SIZE):
+    '''put an OutBuf in as sys.stdout.  returns it.'''
+    if isinstance(sys.stdout, OutBuf):
+        return sys.stdout
+    sys.stdout = OutBuf(sys.stdout, size)
+    sys.excepthook = _excepthook
+    atexit.register(flush)
+    return sys.stdout
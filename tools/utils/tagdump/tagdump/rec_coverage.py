@@ -0,0 +1,204 @@
+'''record number coverage tracking'''
+
+# Copyright (c) 2018 Eric B. Decker, Daniel J. Maltbie
+# All rights reserved.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# See COPYING in the top level directory of this source tree.
+#
+# Contact: Eric B. Decker <cire831@gmail.com>
+#          Daniel J. Maltbie <dmaltbie@daloma.org>
+
+# RecCoverage keeps one bit per record number seen.  The bitmap is a
+# bytearray that starts at the first recnum seen (rounded down to a byte
+# boundary) and grows in either direction as needed.  100M records is
+# about 12MB of bitmap.
+#
+# Missing ranges are found at the end by scanning the bitmap with a
+# regex that skips over fully populated bytes (0xff) at C speed.  Only
+# empty runs (0x00...) and partially populated bytes are looked at.
+#
+# Duplicates and out of order segments are counted as they happen.  The
+# first MAX_RANGES of each are remembered for display.
+
+import re
+
+__version__ = '0.0.1 (rc)'
+
+MAX_RANGES      = 64            # remember at most this many dup/ooo ranges
+MAX_DISPLAY     = 16            # ranges to display per category
+GROW_MIN        = 64 * 1024     # min bytes to grow the bitmap by
+
+# matches runs of empty bytes or single partially populated bytes
+_holes = re.compile('\x00+|[^\x00\xff]')
+
+
+def _add_range(ranges, num):
+    '''add num to a list of [lo, hi] ranges, extend last if contiguous'''
+    if ranges and ranges[-1][1] + 1 == num:
+        ranges[-1][1] = num
+        return True
+    if len(ranges) < MAX_RANGES:
+        ranges.append([num, num])
+        return True
+    return False
+
+
+def ranges_str(ranges, limit = MAX_DISPLAY):
+    '''display string for a list of (lo, hi) ranges'''
+    s = []
+    for lo, hi in ranges[:limit]:
+        if lo == hi:
+            s.append('{}'.format(lo))
+        else:
+            s.append('{}-{}'.format(lo, hi))
+    if len(ranges) > limit:
+        s.append('... ({} more)'.format(len(ranges) - limit))
+    return ' '.join(s)
+
+
+class RecCoverage(object):
+    '''
+    bitmap of record numbers seen.
+
+    add(recnum, offset) for each record.  missing(), dups and ooo give
+    the aggregate results.  display() prints a summary.
+    '''
+    def __init__(self):
+        super(RecCoverage, self).__init__()
+        self.bm         = bytearray()
+        self.base       = 0             # recnum of bit 0 of bm[0]
+        self.lo         = 0             # lowest recnum seen
+        self.hi         = 0             # highest recnum seen
+        self.last       = 0             # last recnum added
+        self.unique     = 0             # distinct recnums seen
+        self.num_dups   = 0             # records seen more than once
+        self.dup_ranges = []            # [lo, hi] of duplicated recnums
+        self.num_ooo    = 0             # times recnum went backwards
+        self.ooo_segs   = []            # (offset, prev, recnum) of backward steps
+
+    def _grow(self, recnum):
+        if not self.bm:
+            self.base = recnum & ~7
+            self.bm   = bytearray(GROW_MIN)
+            return
+        if recnum < self.base:
+            new_base = max(0, (recnum & ~7) - GROW_MIN * 8)
+            self.bm[0:0] = bytearray((self.base - new_base) >> 3)
+            self.base = new_base
+            return
+        need = ((recnum - self.base) >> 3) + 1
+        self.bm.extend(bytearray(max(need - len(self.bm), len(self.bm),
+                                     GROW_MIN)))
+
+    def seen(self, recnum):
+        '''return True if recnum has already been added'''
+        idx = recnum - self.base
+        if idx < 0 or (idx >> 3) >= len(self.bm):
+            return False
+        return bool(self.bm[idx >> 3] & (1 << (idx & 7)))
+
+    def add(self, recnum, offset = -1):
+        '''note recnum as seen.  offset is only used for reporting.'''
+        if recnum < self.base or \
+           ((recnum - self.base) >> 3) >= len(self.bm):
+            self._grow(recnum)
+        idx  = recnum - self.base
+        bit  = 1 << (idx & 7)
+        idx >>= 3
+        if self.bm[idx] & bit:
+            self.num_dups += 1
+            _add_range(self.dup_ranges, recnum)
+        else:
+            self.bm[idx] |= bit
+            self.unique  += 1
+
+        if not self.hi:                 # recnum 0 is never valid
+            self.lo = self.hi = recnum
+        elif recnum < self.lo:
+            self.lo = recnum
+        elif recnum > self.hi:
+            self.hi = recnum
+
+        if self.last and recnum < self.last:
+            self.num_ooo += 1
+            if len(self.ooo_segs) < MAX_RANGES:
+                self.ooo_segs.append((offset, self.last, recnum))
+        self.last = recnum
+
+    def missing(self):
+        '''
+        return list of (lo, hi) recnum ranges not seen between the lowest
+        and highest recnums seen.
+        '''
+        ranges = []
+        if not self.unique:
+            return ranges
+        base = self.base
+        bm   = self.bm
+        lo   = self.lo
+        hi   = self.hi
+        first_byte = (lo - base) >> 3
+        last_byte  = (hi - base) >> 3
+        for m in _holes.finditer(bm, first_byte, last_byte + 1):
+            start, end = m.start(), m.end()
+            if bm[start] == 0:
+                r_lo = base + start * 8
+                r_hi = base + end * 8 - 1
+                if ranges and ranges[-1][1] + 1 == r_lo:
+                    ranges[-1][1] = r_hi
+                else:
+                    ranges.append([r_lo, r_hi])
+                continue
+            b = bm[start]
+            for i in range(8):
+                if b & (1 << i):
+                    continue
+                num = base + start * 8 + i
+                if ranges and ranges[-1][1] + 1 == num:
+                    ranges[-1][1] = num
+                else:
+                    ranges.append([num, num])
+        # clip to what we have actually seen
+        out = []
+        for r_lo, r_hi in ranges:
+            r_lo = max(r_lo, lo)
+            r_hi = min(r_hi, hi)
+            if r_lo <= r_hi:
+                out.append((r_lo, r_hi))
+        return out
+
+    def num_missing(self, ranges = None):
+        if ranges is None:
+            ranges = self.missing()
+        return sum([hi - lo + 1 for lo, hi in ranges])
+
+    def display(self):
+        if not self.unique:
+            print('*** recnum coverage: no records')
+            return
+        ranges = self.missing()
+        print('*** recnum coverage: {} .. {}  seen: {}  missing: {} ({} ranges)'
+              '  dups: {}  out of order: {}'.format(
+                  self.lo, self.hi, self.unique, self.num_missing(ranges),
+                  len(ranges), self.num_dups, self.num_ooo))
+        if ranges:
+            print('    missing: {}'.format(ranges_str(ranges)))
+        if self.dup_ranges:
+            print('    dups:    {}'.format(ranges_str(self.dup_ranges)))
+        for offset, prev, recnum in self.ooo_segs[:MAX_DISPLAY]:
+            print('    backwards: {} -> {}, @{} (0x{:x})'.format(
+                prev, recnum, offset, offset))
+        if len(self.ooo_segs) > MAX_DISPLAY:
+            print('    ... ({} more)'.format(len(self.ooo_segs) - MAX_DISPLAY))
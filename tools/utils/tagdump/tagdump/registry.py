@@ -0,0 +1,132 @@
+'''lazy decode tables, populators imported on first use'''
+
+# Copyright (c) 2018 Eric B. Decker, Daniel J. Maltbie
+# All rights reserved.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# See COPYING in the top level directory of this source tree.
+#
+# Contact: Eric B. Decker <cire831@gmail.com>
+#          Daniel J. Maltbie <dmaltbie@daloma.org>
+
+# dt_records and mid_table are Registries.
+#
+# The populators (core_populate, sirf_populate) fill the tables by
+# assignment when they are imported, which pulls in the decoders,
+# emitters and headers they refer to.  Importing all of them up front
+# costs every tagdump run, even --version or a file without a single
+# GPS record.
+#
+# Instead a config module registers each populator by module name with
+# the keys it fills in (dt_defs.dt_populators, sirf_defs.sirf_populators):
+#
+#   dtd.dt_records.register('core_populate', (DT_REBOOT, DT_VERSION, ...))
+#   sirf.mid_table.register('sirf_populate', (2, 4, 6, 13, ...))
+#
+# Nothing is imported until a lookup misses.  A miss imports only the
+# queued populators that list the key, they fill in the table the way
+# they always have, and the lookup is retried.  A key no populator lists
+# falls to the catch all populators (keys=None), if any.  So a stream
+# without GPS records never loads the sirf populators, and one without
+# table driven mids never loads sirf_tables.  Hits are plain dict
+# lookups.
+#
+# A keyed populator that fills in a key it didn't list is a bug (the
+# lists and the populator have drifted), load raises ValueError.
+#
+# Anything that walks the whole table (keys, items, len, iteration)
+# loads everything first.  Populator names are relative to this
+# package.
+
+__version__ = '0.0.2 (rg)'
+
+
+class Registry(dict):
+    '''dict filled in by populator modules on first use'''
+    def __init__(self, *args, **kwargs):
+        super(Registry, self).__init__(*args, **kwargs)
+        self.pending = []               # (populator, keys or None)
+
+    def register(self, populator, keys = None):
+        '''
+        queue populator (module name) to be imported when a lookup misses.
+
+        keys, if given, are the keys the populator fills in, other misses
+        leave it alone.  None, a catch all, loaded by a miss on any key
+        no other populator lists.
+        '''
+        if keys is not None:
+            keys = frozenset(keys)
+        self.pending.append((populator, keys))
+
+    def load(self, key = None):
+        '''
+        import queued populators, all of them or only those that can
+        fill in key.  returns True if anything was loaded.
+        '''
+        if key is None:
+            todo = list(self.pending)
+        else:
+            todo = [ p for p in self.pending
+                     if p[1] is not None and key in p[1] ]
+            if not todo:
+                todo = [ p for p in self.pending if p[1] is None ]
+        for p in todo:
+            self.pending.remove(p)
+            before = set(super(Registry, self).keys())
+            __import__(p[0], globals(), locals(), [], -1)
+            if p[1] is not None:
+                extra = set(super(Registry, self).keys()) - before - p[1]
+                if extra:
+                    raise ValueError('{}: fills in unlisted keys {}'.format(
+                        p[0], sorted(extra)))
+        return len(todo) > 0
+
+    def __missing__(self, key):
+        if self.pending and self.load(key):
+            return self[key]
+        raise KeyError(key)
+
+    def __contains__(self, key):
+        try:
+            self[key]
+        except KeyError:
+            return False
+        return True
+
+    def get(self, key, default = None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __iter__(self):
+        self.load()
+        return super(Registry, self).__iter__()
+
+    def __len__(self):
+        self.load()
+        return super(Registry, self).__len__()
+
+    def keys(self):
+        self.load()
+        return super(Registry, self).keys()
+
+    def values(self):
+        self.load()
+        return super(Registry, self).values()
+
+    def items(self):
+        self.load()
+        return super(Registry, self).items()
@@ -21,58 +21,81 @@
 
 # Decoders for sirfbin data types
 
+import struct
+from   array         import array
+from   collections   import OrderedDict
+
 from   sirf_headers  import sirf_navtrk_chan
 from   sirf_headers  import sirf_vis_azel
 
-__version__ = '0.2.0 (sd)'
+__version__ = '0.2.2 (sd)'
 
-def decode_sirf_navtrk(level, offset, buf, obj):
+# MID 4 and MID 13 carry a block of fixed size entries, one per
+# channel (satellite).  The block is decoded in one pass into the
+# columns on obj.cols (see sirf_headers), no per channel objects.
+#
+# navtrk entries are 15 bytes, sv_id az el (B), state (>H), cno0-9 (B).
+# The single byte fields are strided slices of the block, state is one
+# unpack_from with a Struct cached per channel count.  cno is ten
+# columns, cno[i][n] is sample i of channel n.  A packet shorter than
+# its count gives only the whole entries present.
 
-    # delete any previous navtrk channel data
-    for k in obj.iterkeys():            # BRK
-        if isinstance(k,int):
-            del obj[k]
+NAVTRK_CHAN_LEN = len(sirf_navtrk_chan)
+VIS_AZEL_LEN    = len(sirf_vis_azel)
 
+_navtrk_state = {}                      # chans -> Struct, state column
+_vis_azel     = {}                      # sats  -> Struct, whole list
+
+
+def decode_sirf_navtrk(level, offset, buf, obj):
     consumed = obj.set(buf)
-    chans  = obj['chans'].val
-
-    # grab each channels cnos and other data
-    for n in range(chans):
-        d = {}                      # get a new dict
-        consumed += sirf_navtrk_chan.set(buf[consumed:])
-        for k, v in sirf_navtrk_chan.items():
-            d[k] = v.val
-        avg  = d['cno0'] + d['cno1'] + d['cno2']
-        avg += d['cno3'] + d['cno4'] + d['cno5']
-        avg += d['cno6'] + d['cno7'] + d['cno8']
-        avg += d['cno9']
-        avg /= float(10)
-        d['cno_avg'] = avg
-        obj[n] = d
-    return consumed
+    chans    = obj['chans'].val
+    cols     = obj.cols
 
+    clen  = NAVTRK_CHAN_LEN
+    blk   = bytearray(buf[consumed:consumed + chans * clen])
+    chans = len(blk) / clen
+    if len(blk) != chans * clen:
+        blk = blk[:chans * clen]
+    try:
+        s_state = _navtrk_state[chans]
+    except KeyError:
+        s_state = _navtrk_state[chans] = struct.Struct('>' + '3xH10x' * chans)
 
-def decode_sirf_vis(level, offset, buf, obj):
+    cols.n       = chans
+    cols.sv_id   = blk[0::clen]
+    cols.az      = blk[1::clen]
+    cols.el      = blk[2::clen]
+    cols.state   = array('H', s_state.unpack_from(blk))
+    cols.cno     = [ blk[i::clen] for i in range(5, 15) ]
+    cols.cno_avg = array('d', [ s / float(10) for s in map(sum, zip(*cols.cno)) ])
+    return consumed + len(blk)
 
-    # delete any previous vis data (previous packets)
-    for k in obj.iterkeys():            # BRK
-        if isinstance(k,int):
-            del obj[k]
 
+def decode_sirf_vis(level, offset, buf, obj):
     consumed = obj.set(buf)
-    num_sats = obj['vis_sats'].val
-
-    # for each visible satellite, the sirf_vis_azel object will have sv_id,
-    # sv_az, and sv_el.
-    #
-    # we copy the data off the object into a new dictionary and then add
-    # this dictionary onto the sirf_vis_obj using the vis_sat number
-    # (0..num_sats-1) as the key.
-
-    for n in range(num_sats):
-        d = {}                          # new dict
-        consumed += sirf_vis_azel.set(buf[consumed:])
-        for k, v in sirf_vis_azel.items():
-            d[k] = v.val
-        obj[n] = d
-    return consumed
+    sats     = min(obj['vis_sats'].val, (len(buf) - consumed) / VIS_AZEL_LEN)
+    cols     = obj.cols
+    try:
+        s_azel = _vis_azel[sats]
+    except KeyError:
+        s_azel = _vis_azel[sats] = struct.Struct('>' + 'Bhh' * sats)
+    v = s_azel.unpack_from(buf, consumed)
+
+    cols.n     = sats
+    cols.sv_id = bytearray(v[0::3])
+    cols.az    = array('h', v[1::3])
+    cols.el    = array('h', v[2::3])
+    return consumed + s_azel.size
+
+
+def decode_sirf_table(level, offset, buf, obj):
+    """
+    table driven mids (sirf_tables).  a truncated packet leaves an
+    empty val rather than blowing up the dump.
+    """
+    try:
+        return obj.set(buf)
+    except (struct.error, KeyError):
+        obj.val = OrderedDict()
+        return 0
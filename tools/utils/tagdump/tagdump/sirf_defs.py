@@ -32,15 +32,19 @@
 #
 # key is gps mid.  Contents is vector (decoder, emitter_list, obj, name).
 #
-# mid decoders when imported need to populate the table.
+# mid decoders when imported need to populate the table.  mid_table is
+# a Registry (registry.py), the configs register the populators in
+# sirf_populators, each is imported on the first lookup of one of its
+# mids.  sirf_name_populate (names only) takes any other mid.
 
 
 # __all__ exports commonly used definitions.  It gets used
 # when someone does a wild import of this module.
 
 import struct
+from   registry     import Registry
 
-__version__ = '0.2.0 (sd)'
+__version__ = '0.2.2 (sd)'
 
 __all__ = [
     'MID_DECODER',
@@ -69,9 +73,16 @@ __all__ = [
 # rather than the __repr__ of the object (decode_base), which
 # typically is some value.  What you want to see is the object name.
 
-mid_table = {}
+mid_table = Registry()
 mid_count = {}
 
+# mid_table populators, (module, mids it fills in), see registry.py
+sirf_populators = [
+    ('sirf_populate',       (2, 4, 6, 13, 18, 41, 90, 218, 225, 255)),
+    ('sirf_table_populate', (7, 8, 9, 10, 11, 12, 14, 15, 28, 50, 52, 66, 74)),
+    ('sirf_name_populate',  None),
+]
+
 MID_DECODER  = 0
 MID_EMITTERS = 1
 MID_OBJECT   = 2
@@ -23,7 +23,7 @@
 
 from   misc_utils    import buf_str
 
-__version__ = '0.2.1 (se)'
+__version__ = '0.2.3 (se)'
 
 
 def emit_default(level, offset, buf, obj):
@@ -76,44 +76,41 @@ rnavtrk1 = '    NAV_TRACK: week10: {}  tow: {}s  chans: {}'
 rnavtrkx = '    {:2}: az: {:5.1f}  el: {:4.1f}  state: {:#06x}  cno (avg): {}'
 rnavtrky = '    {:2}: az: {:5.1f}  el: {:4.1f}  state: {:#06x}  cno/s: {}'
 rnavtrkz = '    {:2}: az: {:3}  el: {:3}  state: {:#06x}  cno/s: {}'
+rnavcnos = ' {:2}' * 10
 
 def emit_sirf_navtrk(level, offset, buf, obj):
     week10 = obj['week10'].val
     tow    = obj['tow'].val/float(100)
     chans  = obj['chans'].val
+    cols   = obj.cols
     print
     if (level >= 1):
         print(rnavtrk1.format(week10, tow, chans))
-        for n in range(chans):
-            if (obj[n]['cno_avg']):
-                print(rnavtrkx.format(obj[n]['sv_id'],
-                                      obj[n]['sv_az23']*3.0/2.0,
-                                      obj[n]['sv_el2']/2.0,
-                                      obj[n]['state'],
-                                      obj[n]['cno_avg']))
+        for n in range(cols.n):
+            if (cols.cno_avg[n]):
+                print(rnavtrkx.format(cols.sv_id[n],
+                                      cols.az[n]*3.0/2.0,
+                                      cols.el[n]/2.0,
+                                      cols.state[n],
+                                      cols.cno_avg[n]))
     if (level >= 2):
+        cnos = [ rnavcnos.format(*row) for row in zip(*cols.cno) ]
         print
-        for n in range(chans):
-            cno_str = ''
-            for i in range(10):
-                cno_str += ' {:2}'.format(obj[n]['cno'+str(i)])
-            print(rnavtrky.format(obj[n]['sv_id'],
-                                  obj[n]['sv_az23']*3.0/2.0,
-                                  obj[n]['sv_el2']/2.0,
-                                  obj[n]['state'],
-                                  cno_str))
+        for n in range(cols.n):
+            print(rnavtrky.format(cols.sv_id[n],
+                                  cols.az[n]*3.0/2.0,
+                                  cols.el[n]/2.0,
+                                  cols.state[n],
+                                  cnos[n]))
     if (level >= 3):
         print
         print('raw:')
-        for n in range(chans):
-            cno_str = ''
-            for i in range(10):
-                cno_str += ' {:2}'.format(obj[n]['cno'+str(i)])
-            print(rnavtrkz.format(obj[n]['sv_id'],
-                                  obj[n]['sv_az23'],
-                                  obj[n]['sv_el2'],
-                                  obj[n]['state'],
-                                  cno_str))
+        for n in range(cols.n):
+            print(rnavtrkz.format(cols.sv_id[n],
+                                  cols.az[n],
+                                  cols.el[n],
+                                  cols.state[n],
+                                  cnos[n]))
 
 
 def emit_sirf_swver(level, offset, buf, obj):
@@ -124,16 +121,14 @@ def emit_sirf_swver(level, offset, buf, obj):
 def emit_sirf_vis(level, offset, buf, obj):
     num_sats = obj['vis_sats'].val
     print '({})'.format(num_sats)
-    sats = ''
+    cols = obj.cols
     if level >= 1:
         print('    {:<2} sats:'.format(num_sats)),
-        for n in range(num_sats):
-            sats += ' {}'.format(obj[n]['sv_id'])
-        print sats
+        print ''.join([ ' {}'.format(sv) for sv in cols.sv_id ])
     if level >= 2:
-        for n in range(num_sats):
+        for n in range(cols.n):
             print '      {:2}:  el {:2}   az {:3}'.format(
-                obj[n]['sv_id'], obj[n]['sv_el'], obj[n]['sv_az'])
+                cols.sv_id[n], cols.el[n], cols.az[n])
 
 
 def emit_sirf_ots(level, offset, buf, obj):
@@ -317,3 +312,15 @@ def emit_sirf_statistics(level, offset, buf, obj):
 def emit_sirf_dev_data(level, offset, buf, obj):
     print
     print '    {}'.format(obj)
+
+
+########################################################################
+#
+# table driven mids, sirf_tables.  one line of name: value pairs,
+# arrays space separated.
+#
+
+def emit_sirf_table(level, offset, buf, obj):
+    print
+    if (level >= 1 and obj.val):
+        print '    {}'.format(obj)
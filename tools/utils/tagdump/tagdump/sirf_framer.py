@@ -0,0 +1,195 @@
+'''push style sirfbin framer, feed it bytes, get packets back'''
+
+# Copyright (c) 2018 Eric B. Decker, Daniel J. Maltbie
+# All rights reserved.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# See COPYING in the top level directory of this source tree.
+#
+# Contact: Eric B. Decker <cire831@gmail.com>
+#          Daniel J. Maltbie <dmaltbie@daloma.org>
+
+####
+#
+# SirfFramer: sirfbin framing that doesn't care where the bytes come
+# from.  A file read in chunks, a serial port, the payload of a DBLK
+# GPS_RAW record or a Tagnet transfer all end up as feed(data) calls.
+#
+#   framer = SirfFramer()
+#   for offset, pkt in framer.feed(data):
+#       ...
+#
+# feed returns the list of (offset, packet) completed by data.  offset
+# counts bytes fed since the framer was made, packet is the whole packet
+# (SOP through EOP) as a str.  Bytes of a packet not yet complete are
+# held and finished off by a later feed.  Nothing is ever seeked.
+#
+# Work is per packet, not per byte.  SOPs are found with str.find, the
+# header and trailer are unpacked in place, the checksum is sum() over
+# the payload.  Back to back packets (the usual case) cost one find that
+# hits immediately.
+#
+# Resync.  An SOP that fails (length too big, bad EOP, bad checksum) is
+# stepped over by one byte and the next SOP looked for in the same
+# buffer.  Bytes not in any packet are counted in skipped, and each run
+# of them is one resync (what sirfdump calls a hunt).
+
+from   sirf_defs    import SIRF_HDR_SIZE
+from   sirf_defs    import SIRF_END_SIZE
+from   sirf_defs    import SIRF_MAX_PAYLOAD
+from   sirf_defs    import SIRF_EOP_SEQ
+from   sirf_defs    import sirf_hdr_struct
+from   sirf_defs    import sirf_end_struct
+
+__version__ = '0.0.1 (sf)'
+
+SOP_STR         = '\xa0\xa2'
+FRAME_CHUNK     = 64 * 1024             # frame_file read size
+
+# check() results
+PKT_OK          = 0
+PKT_BAD_LEN     = 1
+PKT_BAD_EOP     = 2
+PKT_BAD_CHKSUM  = 3
+
+
+def check(buf, idx):
+    """
+    check the packet at buf[idx] (an SOP) in place.
+
+    returns PKT_OK, one of the PKT_BAD codes, or (negative) the number of
+    bytes buf is short of holding the whole packet.
+    """
+    have = len(buf) - idx
+    if have < SIRF_HDR_SIZE:
+        return have - SIRF_HDR_SIZE
+    rlen = sirf_hdr_struct.unpack_from(buf, idx)[1]
+    if rlen > SIRF_MAX_PAYLOAD:
+        return PKT_BAD_LEN
+    need = SIRF_HDR_SIZE + rlen + SIRF_END_SIZE
+    if have < need:
+        return have - need
+    req_sum, term = sirf_end_struct.unpack_from(buf, idx + SIRF_HDR_SIZE + rlen)
+    if term != SIRF_EOP_SEQ:
+        return PKT_BAD_EOP
+    pay = idx + SIRF_HDR_SIZE
+    if sum(bytearray(buf[pay:pay + rlen])) & 0x7fff != req_sum:
+        return PKT_BAD_CHKSUM
+    return PKT_OK
+
+
+def sop_valid(buf, idx):
+    """
+    check() for the hunt.
+
+    returns True (valid packet), False (not a packet), or the number of
+    bytes buf is short of holding the whole packet.
+    """
+    rtn = check(buf, idx)
+    if rtn < 0:
+        return -rtn
+    return rtn == PKT_OK
+
+
+class SirfFramer(object):
+    '''
+    frame sirfbin packets out of a byte stream, see the top of this file.
+    '''
+    def __init__(self, base = 0):
+        super(SirfFramer, self).__init__()
+        self.buf     = ''
+        self.base    = base             # stream offset of buf[0]
+        self.packets = 0
+        self.bad     = 0                # SOPs that didn't check out
+        self.bad_len = 0
+        self.bad_eop = 0
+        self.chksum_errors = 0
+        self.skipped = 0                # bytes not in any packet
+        self.resyncs = 0                # runs of skipped bytes
+        self.in_gap  = False            # last feed ended skipping
+
+    def feed(self, data):
+        buf  = self.buf + data if self.buf else data
+        out  = []
+        idx  = 0
+        blen = len(buf)
+        while (True):
+            sop = buf.find(SOP_STR, idx)
+            if sop < 0:
+                keep = blen - 1 if buf.endswith(SOP_STR[0]) else blen
+                keep = max(keep, idx)
+                self._skip(keep - idx)
+                idx = keep
+                break
+            if sop != idx:
+                self._skip(sop - idx)
+            rtn = check(buf, sop)
+            if rtn == PKT_OK:
+                end = sop + SIRF_HDR_SIZE + SIRF_END_SIZE + \
+                      sirf_hdr_struct.unpack_from(buf, sop)[1]
+                out.append((self.base + sop, buf[sop:end]))
+                self.packets += 1
+                self.in_gap = False
+                idx = end
+            elif rtn > 0:
+                self.bad += 1
+                if rtn == PKT_BAD_LEN:
+                    self.bad_len += 1
+                elif rtn == PKT_BAD_EOP:
+                    self.bad_eop += 1
+                else:
+                    self.chksum_errors += 1
+                self._skip(1)
+                idx = sop + 1
+            else:
+                idx = sop               # partial, wait for more
+                break
+        self.buf   = buf[idx:]
+        self.base += idx
+        return out
+
+    def _skip(self, n):
+        if n <= 0:
+            return
+        if not self.in_gap:
+            self.resyncs += 1
+            self.in_gap = True
+        self.skipped += n
+
+    def offset(self):
+        '''stream offset just past the last byte fed'''
+        return self.base + len(self.buf)
+
+    def pending(self):
+        '''bytes held waiting for the rest of a packet'''
+        return len(self.buf)
+
+
+def frame_file(fd, framer = None, chunk = FRAME_CHUNK):
+    '''
+    frame a file, chunk bytes at a time.  fd is a TagFile (read_some) or
+    anything with read.
+
+    generates (offset, packet).  offsets are from where fd was at the
+    start unless framer (with its own base) is handed in.
+    '''
+    if framer is None:
+        framer = SirfFramer()
+    read = getattr(fd, 'read_some', fd.read)
+    while (True):
+        data = read(chunk)
+        if not data:
+            break
+        for pkt in framer.feed(data):
+            yield pkt
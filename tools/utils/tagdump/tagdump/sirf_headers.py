@@ -22,7 +22,7 @@
 
 # object descriptors for gps data blocks
 
-__version__ = '0.2.0 (sh)'
+__version__ = '0.2.1 (sh)'
 
 import binascii
 from   decode_base  import *
@@ -81,6 +81,16 @@ class atom_sirf_swver(object):
         self.val = ( buf[2:len0+2], buf[2+len0:2+len0+len1] )
         return len(self.val[0]) + len(self.val[1]) + 2
 
+    def zero(self):
+        self.val = ('', '')
+
+    def build(self, val = None):
+        '''pack val (str0, str1) back into len0 len1 str0 str1'''
+        if val is not None:
+            self.val = val
+        s0, s1 = self.val
+        return bytearray([len(s0), len(s1)]) + bytearray(s0) + bytearray(s1)
+
 
 class atom_sirf_dev_data(object):
     '''sirf_dev_data atom.  special.
@@ -127,6 +137,18 @@ class atom_sirf_dev_data(object):
         self.val = buf[:-SIRF_END_SIZE]
         return len(buf)
 
+    def zero(self):
+        self.val = ''
+
+    def build(self, val = None):
+        '''
+        pack the dev_data string.  Only the string, the chksum and
+        terminator are part of the sirfbin packet framing.
+        '''
+        if val is not None:
+            self.val = val
+        return bytearray(self.val)
+
 
 #########
 #
@@ -201,6 +223,27 @@ sirf_vis_azel    = aggie([('sv_id',    atom(('B',  '{}'))),
                          ('sv_az',    atom(('>h', '{}'))),
                          ('sv_el',    atom(('>h', '{}')))])
 
+# The channel block of MID 4 and the satellite list of MID 13 are
+# decoded in one pass into columns, one typed array per field indexed
+# by channel (sirf_decoders).  sirf_navtrk_chan and sirf_vis_azel
+# describe one entry, for build.
+#
+#   navtrk: sv_id, az (sv_az23), el (sv_el2), state, cno[0..9], cno_avg
+#   vis:    sv_id, az, el
+#
+# n is the number of entries in the last packet.
+
+class sirf_cols(object):
+    '''columns for a repeating block, filled in by the decoder'''
+    def __init__(self):
+        self.n = 0
+
+    def __len__(self):
+        return self.n
+
+sirf_navtrk_obj.cols = sirf_cols()
+sirf_vis_obj.cols    = sirf_cols()
+
 # OkToSend
 sirf_ots_obj = atom(('B', '{}'))
 
@@ -0,0 +1,93 @@
+'''names for sirfbin mids without decoders'''
+
+import sirf_defs     as     sirf
+
+def decode_null(level, offset, buf, obj):
+    return 0
+
+def emit_print(level, offset, buf, obj):
+    print
+
+#
+# other MIDs, just define their names.  no decoders
+#
+# MID 1 (ref nav data) is listed in the SiRF binary and OSP ICDs as not
+# implemented, there is no layout (and no sirf_msg.h struct) to build a
+# sirf_tables descriptor from.  If one ever shows up it is printed raw.
+#
+sirf.mid_table[1]   = (decode_null, [ emit_print ], None, 'ref nav data')
+sirf.mid_table[3]   = (decode_null, [ emit_print ], None, 'true tracker')
+sirf.mid_table[5]   = (decode_null, [ emit_print ], None, 'raw tracker')
+sirf.mid_table[17]  = (decode_null, [ emit_print ], None, 'differential corrections')
+sirf.mid_table[19]  = (decode_null, [ emit_print ], None, 'nav params rsp')
+sirf.mid_table[27]  = (decode_null, [ emit_print ], None, 'dgps status format')
+sirf.mid_table[29]  = (decode_null, [ emit_print ], None, 'nav lib dgps data')
+sirf.mid_table[30]  = (decode_null, [ emit_print ], None, 'nav lib sv state')
+sirf.mid_table[31]  = (decode_null, [ emit_print ], None, 'nav lib init')
+sirf.mid_table[43]  = (decode_null, [ emit_print ], None, 'queue cmd params')
+sirf.mid_table[45]  = (decode_null, [ emit_print ], None, 'dr raw data')
+sirf.mid_table[48]  = (decode_null, [ emit_print ], None, 'dr nav')
+sirf.mid_table[51]  = (decode_null, [ emit_print ], None, 'unk_51')
+sirf.mid_table[56]  = (decode_null, [ emit_print ], None, 'ext ephemeris data')
+sirf.mid_table[64]  = (decode_null, [ emit_print ], None, 'nav lib msgs')
+sirf.mid_table[65]  = (decode_null, [ emit_print ], None, 'gpio')
+sirf.mid_table[68]  = (decode_null, [ emit_print ], None, 'meas eng')
+sirf.mid_table[69]  = (decode_null, [ emit_print ], None, 'pos rsp')
+sirf.mid_table[70]  = (decode_null, [ emit_print ], None, 'alm/ephem status rsp')
+sirf.mid_table[71]  = (decode_null, [ emit_print ], None, 'hw config req')
+sirf.mid_table[72]  = (decode_null, [ emit_print ], None, 'sensor data')
+sirf.mid_table[73]  = (decode_null, [ emit_print ], None, 'aiding req')
+sirf.mid_table[75]  = (decode_null, [ emit_print ], None, 'ack nack error')
+sirf.mid_table[77]  = (decode_null, [ emit_print ], None, 'low pwr mode')
+sirf.mid_table[88]  = (decode_null, [ emit_print ], None, 'unk_88')
+sirf.mid_table[91]  = (decode_null, [ emit_print ], None, 'hw control out')
+sirf.mid_table[92]  = (decode_null, [ emit_print ], None, 'cw data')
+sirf.mid_table[93]  = (decode_null, [ emit_print ], None, 'TCXO learning')
+sirf.mid_table[128] = (decode_null, [ emit_print ], None, 'init_data_source')
+sirf.mid_table[129] = (decode_null, [ emit_print ], None, 'set_nmea')
+sirf.mid_table[130] = (decode_null, [ emit_print ], None, 'set almanac')
+sirf.mid_table[131] = (decode_null, [ emit_print ], None, 'formated dump')
+sirf.mid_table[132] = (decode_null, [ emit_print ], None, 'send swver')
+sirf.mid_table[133] = (decode_null, [ emit_print ], None, 'dgps source')
+sirf.mid_table[134] = (decode_null, [ emit_print ], None, 'set binary port')
+sirf.mid_table[135] = (decode_null, [ emit_print ], None, 'set protocol')
+sirf.mid_table[136] = (decode_null, [ emit_print ], None, 'mode control')
+sirf.mid_table[137] = (decode_null, [ emit_print ], None, 'dop mask control')
+sirf.mid_table[138] = (decode_null, [ emit_print ], None, 'dgps control')
+sirf.mid_table[139] = (decode_null, [ emit_print ], None, 'elevation mask')
+sirf.mid_table[140] = (decode_null, [ emit_print ], None, 'power mask')
+sirf.mid_table[143] = (decode_null, [ emit_print ], None, 'static navigation')
+sirf.mid_table[144] = (decode_null, [ emit_print ], None, 'poll_clk_status')
+sirf.mid_table[145] = (decode_null, [ emit_print ], None, 'dgps serial port')
+sirf.mid_table[146] = (decode_null, [ emit_print ], None, 'poll almanac')
+sirf.mid_table[147] = (decode_null, [ emit_print ], None, 'poll ephemeris')
+sirf.mid_table[148] = (decode_null, [ emit_print ], None, 'flash update')
+sirf.mid_table[149] = (decode_null, [ emit_print ], None, 'set ephemeris')
+sirf.mid_table[150] = (decode_null, [ emit_print ], None, 'switch op mode')
+sirf.mid_table[151] = (decode_null, [ emit_print ], None, 'set trickle power')
+sirf.mid_table[152] = (decode_null, [ emit_print ], None, 'poll nav params')
+sirf.mid_table[161] = (decode_null, [ emit_print ], None, 'store gps snapshot')
+sirf.mid_table[165] = (decode_null, [ emit_print ], None, 'set uart config')
+sirf.mid_table[166] = (decode_null, [ emit_print ], None, 'set msg rate')
+sirf.mid_table[167] = (decode_null, [ emit_print ], None, 'set low power acq')
+sirf.mid_table[168] = (decode_null, [ emit_print ], None, 'poll command params')
+sirf.mid_table[170] = (decode_null, [ emit_print ], None, 'set sbas params')
+sirf.mid_table[172] = (decode_null, [ emit_print ], None, 'sirfdrive/nav')
+sirf.mid_table[175] = (decode_null, [ emit_print ], None, 'user set command')
+sirf.mid_table[177] = (decode_null, [ emit_print ], None, 'data logger')
+sirf.mid_table[178] = (decode_null, [ emit_print ], None, 'sw/tb peek/poke(3)')
+sirf.mid_table[180] = (decode_null, [ emit_print ], None, 'gsc2xr preset op config')
+sirf.mid_table[205] = (decode_null, [ emit_print ], None, 'sw/ctl off(16)')
+sirf.mid_table[210] = (decode_null, [ emit_print ], None, 'position request')
+sirf.mid_table[211] = (decode_null, [ emit_print ], None, 'set corrections')
+sirf.mid_table[212] = (decode_null, [ emit_print ], None, 'status requests')
+sirf.mid_table[213] = (decode_null, [ emit_print ], None, 'session_req')
+sirf.mid_table[214] = (decode_null, [ emit_print ], None, 'hw_config_rsp')
+sirf.mid_table[215] = (decode_null, [ emit_print ], None, 'aiding')
+sirf.mid_table[216] = (decode_null, [ emit_print ], None, 'osp ack/nack/error/reject')
+sirf.mid_table[219] = (decode_null, [ emit_print ], None, 'hw control input')
+sirf.mid_table[220] = (decode_null, [ emit_print ], None, 'cw configuration')
+sirf.mid_table[221] = (decode_null, [ emit_print ], None, 'tcxo learning ctrl out')
+sirf.mid_table[232] = (decode_null, [ emit_print ], None, 'extended ephemeris')
+sirf.mid_table[233] = (decode_null, [ emit_print ], None, 'grf3i status')
+sirf.mid_table[234] = (decode_null, [ emit_print ], None, 'sensor control input')
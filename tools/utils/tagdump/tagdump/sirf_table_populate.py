@@ -0,0 +1,24 @@
+'''assign decoders and emitters for table driven sirfbin mids'''
+
+# flat layouts from sirf_tables, results in obj.val.  Kept apart from
+# sirf_populate so a stream without these mids never loads sirf_tables
+# (and hdr_structs).
+
+import sirf_defs     as     sirf
+from   sirf_decoders import decode_sirf_table
+from   sirf_emitters import emit_sirf_table
+from   sirf_tables   import *
+
+sirf.mid_table[7]   = (decode_sirf_table,   [ emit_sirf_table ],  sirf_clk_stat_obj,      'clk stat',     'sirf_clk_stat_obj')
+sirf.mid_table[8]   = (decode_sirf_table,   [ emit_sirf_table ],  sirf_50bps_obj,         '50 bps data',  'sirf_50bps_obj')
+sirf.mid_table[9]   = (decode_sirf_table,   [ emit_sirf_table ],  sirf_cpu_thru_obj,      'cpu thruput',  'sirf_cpu_thru_obj')
+sirf.mid_table[10]  = (decode_sirf_table,   [ emit_sirf_table ],  sirf_error_obj,         'error id',     'sirf_error_obj')
+sirf.mid_table[11]  = (decode_sirf_table,   [ emit_sirf_table ],  sirf_ack_obj,           'ack',          'sirf_ack_obj')
+sirf.mid_table[12]  = (decode_sirf_table,   [ emit_sirf_table ],  sirf_nack_obj,          'nack',         'sirf_nack_obj')
+sirf.mid_table[14]  = (decode_sirf_table,   [ emit_sirf_table ],  sirf_alm_obj,           'almanac data', 'sirf_alm_obj')
+sirf.mid_table[15]  = (decode_sirf_table,   [ emit_sirf_table ],  sirf_ephem_obj,         'ephemeris data', 'sirf_ephem_obj')
+sirf.mid_table[28]  = (decode_sirf_table,   [ emit_sirf_table ],  sirf_nl_meas_obj,       'nav lib',      'sirf_nl_meas_obj')
+sirf.mid_table[50]  = (decode_sirf_table,   [ emit_sirf_table ],  sirf_sbas_obj,          'sbas params',  'sirf_sbas_obj')
+sirf.mid_table[52]  = (decode_sirf_table,   [ emit_sirf_table ],  sirf_pps_obj,           '1pps time',    'sirf_pps_obj')
+sirf.mid_table[66]  = (decode_sirf_table,   [ emit_sirf_table ],  sirf_dop_obj,           'dop values',   'sirf_dop_obj')
+sirf.mid_table[74]  = (decode_sirf_table,   [ emit_sirf_table ],  sirf_session_obj,       'session rsp',  'sirf_session_obj')
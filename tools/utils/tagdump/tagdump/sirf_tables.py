@@ -0,0 +1,246 @@
+'''table driven descriptors for simple sirfbin messages'''
+
+# Copyright (c) 2018 Eric B. Decker, Daniel J. Maltbie
+# All rights reserved.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# See COPYING in the top level directory of this source tree.
+#
+# Contact: Eric B. Decker <cire831@gmail.com>
+#          Daniel J. Maltbie <dmaltbie@daloma.org>
+
+# Most OSP output messages are a fixed block of big endian fields, some
+# with an array (the repeating group) at the end.  Rather than an aggie
+# per message these are described by a spec and decoded with one
+# precompiled struct.Struct, one unpack_from per packet.
+#
+# spec: list of entries, in packet order, starting after the mid
+#
+#   (name, code)            one value
+#   (name, code, n)         list of n values
+#   (name, code, 'field')   list, the count is the value of an earlier
+#                           field.  only allowed as the last entry.
+#
+# code is a struct code ('B', '>H' order is implied).
+#
+# set(buf) decodes buf (the payload past the mid, as the decoders get
+# it) into val, an OrderedDict field -> value (lists for arrays).  val
+# is the structured result for a packet, plain ints and lists, it can
+# be handed as is to anything that wants columns or json.  decode(mid,
+# buf) does the same for any mid in mid_tables, for scripts working on
+# raw GPS_RAW payloads.
+#
+# Messages with a struct in sirf_msg.h are built from the generated
+# hdr_structs (from_c), the others are spelled out here from the OSP
+# ICD.  The doubles/floats in MID 28 are kept as the raw integers
+# sirf_msg.h declares.
+
+import struct
+from   collections  import OrderedDict
+
+from   hdr_structs  import structs      as c_structs
+from   sirf_defs    import SIRF_HDR_SIZE
+
+__version__ = '0.0.1 (st)'
+
+_code_re = None
+
+
+class sirf_table(object):
+    '''flat descriptor for a sirfbin payload, decoded with unpack_from'''
+    def __init__(self, name, spec):
+        self.name = name
+        self.spec = spec
+        self.plan = []                  # (name, index, n or None)
+        codes = []
+        idx   = 0
+        self.tail = None
+        for i, entry in enumerate(spec):
+            fname, code = entry[0], entry[1]
+            n = entry[2] if len(entry) > 2 else None
+            if isinstance(n, str):
+                if i != len(spec) - 1:
+                    raise ValueError('{}: counted array {} must be last'.format(
+                        name, fname))
+                self.tail = (fname, code, n)
+                break
+            codes.append('{}{}'.format(n, code) if n else code)
+            self.plan.append((fname, idx, n))
+            idx += n if n else 1
+        self.s_rec  = struct.Struct('>' + ''.join(codes))
+        self.tails  = {}                # count -> Struct, counted array
+        self.val    = OrderedDict()
+
+    def __len__(self):
+        return self.s_rec.size
+
+    def __repr__(self):
+        return '  '.join([ '{}: {}'.format(k, ' '.join(map(str, v))
+                                              if isinstance(v, list) else v)
+                           for k, v in self.val.iteritems() ])
+
+    def set(self, buf):
+        '''
+        decode buf into val.  returns the number of bytes consumed.
+        '''
+        vals = self.s_rec.unpack_from(buf)
+        d    = OrderedDict()
+        for fname, idx, n in self.plan:
+            d[fname] = list(vals[idx:idx + n]) if n else vals[idx]
+        consumed = self.s_rec.size
+        if self.tail:
+            fname, code, count = self.tail
+            n = d[count]
+            try:
+                s_tail = self.tails[n]
+            except KeyError:
+                s_tail = self.tails[n] = struct.Struct('>{}{}'.format(n, code))
+            d[fname]  = list(s_tail.unpack_from(buf, consumed))
+            consumed += s_tail.size
+        self.val = d
+        return consumed
+
+
+def c_spec(cname, groups = ()):
+    '''
+    spec from a generated sirf_msg.h struct, fields past the mid.
+
+    groups: base names of fields base_1 .. base_n that become one list.
+    '''
+    global _code_re
+    if _code_re is None:
+        import re
+        _code_re = re.compile(r'(\d*)([a-zA-Z?])')
+    cs    = c_structs[cname]
+    codes = [ (int(n) if n else None, c) for n, c in _code_re.findall(cs.format)
+              if c != 'x' ]
+    spec  = []
+    for fname, off, (n, code) in zip(cs.fields, cs.offsets, codes):
+        if off <= SIRF_HDR_SIZE:
+            continue                    # start1, start2, len, mid
+        if code == 's':
+            spec.append((fname, 'B', n))
+            continue
+        base = fname.rsplit('_', 1)[0]
+        if base in groups:
+            if spec and spec[-1][0] == base:
+                spec[-1] = (base, code, spec[-1][2] + 1)
+            else:
+                spec.append((base, code, 1))
+            continue
+        spec.append((fname, code))
+    return spec
+
+
+def from_c(cname, extra = (), groups = ()):
+    '''sirf_table from a generated struct, extra entries appended'''
+    return sirf_table(cname, c_spec(cname, groups) + list(extra))
+
+
+# MID 7, clock status
+sirf_clk_stat_obj   = from_c('sb_clock_status_data_t')
+
+# MID 8, 50 bps data, one subframe, 10 words
+sirf_50bps_obj      = sirf_table('sb_50bps_data', [
+    ('chan',            'B'),
+    ('sv_id',           'B'),
+    ('word',            'I', 10),
+])
+
+# MID 9, cpu throughput
+sirf_cpu_thru_obj   = sirf_table('sb_cpu_thruput', [
+    ('seg_stat_max',    'H'),
+    ('seg_stat_lat',    'H'),
+    ('avg_trk_time',    'H'),
+    ('last_ms',         'H'),
+])
+
+# MID 10, error id, count data words
+sirf_error_obj      = from_c('sb_error_data_t', [ ('data', 'I', 'count') ])
+
+# MID 11, ack / MID 12, nack
+sirf_ack_obj        = sirf_table('sb_ack',  [ ('ack_id',  'B') ])
+sirf_nack_obj       = sirf_table('sb_nack', [ ('nack_id', 'B') ])
+
+# MID 14, almanac, 12 data words and a checksum
+sirf_alm_obj        = from_c('sb_almanac_status_data_t',
+                             [ ('data', 'H', 12), ('checksum', 'H') ])
+
+# MID 15, ephemeris, 3 subframes of 15 words
+sirf_ephem_obj      = sirf_table('sb_ephemeris_data', [
+    ('sv_id',           'B'),
+    ('data',            'H', 45),
+])
+
+# MID 28, nav lib measurement data, c/no per 100ms
+sirf_nl_meas_obj    = from_c('sb_nav_lib_data_t', groups = ('c_no',))
+
+# MID 50, sbas parameters
+sirf_sbas_obj       = sirf_table('sb_sbas_params', [
+    ('prn',             'B'),
+    ('mode',            'B'),
+    ('dgps_timeout',    'B'),
+    ('flags',           'B'),
+    ('spare',           'B', 8),
+])
+
+# MID 52, 1pps time
+sirf_pps_obj        = from_c('sb_pps_data_t')
+
+# MID 66, dop values
+sirf_dop_obj        = sirf_table('sb_dop_values', [
+    ('sid',             'B'),
+    ('week',            'H'),
+    ('tow',             'I'),
+    ('gdop',            'H'),
+    ('pdop',            'H'),
+    ('hdop',            'H'),
+    ('vdop',            'H'),
+    ('tdop',            'H'),
+])
+
+# MID 74, session open/close response
+sirf_session_obj    = from_c('sb_session_rsp_t')
+
+
+mid_tables = {
+     7: sirf_clk_stat_obj,
+     8: sirf_50bps_obj,
+     9: sirf_cpu_thru_obj,
+    10: sirf_error_obj,
+    11: sirf_ack_obj,
+    12: sirf_nack_obj,
+    14: sirf_alm_obj,
+    15: sirf_ephem_obj,
+    28: sirf_nl_meas_obj,
+    50: sirf_sbas_obj,
+    52: sirf_pps_obj,
+    66: sirf_dop_obj,
+    74: sirf_session_obj,
+}
+
+
+def decode(mid, buf):
+    '''
+    structured result (OrderedDict) for a payload (past the mid) of a
+    table driven mid.  None if mid isn't one, or buf is too short.
+    '''
+    obj = mid_tables.get(mid)
+    if obj is None:
+        return None
+    try:
+        obj.set(buf)
+    except (struct.error, KeyError):
+        return None
+    return obj.val
@@ -0,0 +1,162 @@
+'''per stage timing for the decode pipeline (--profile)'''
+
+# Copyright (c) 2018 Eric B. Decker, Daniel J. Maltbie
+# All rights reserved.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# See COPYING in the top level directory of this source tree.
+#
+# Contact: Eric B. Decker <cire831@gmail.com>
+#          Daniel J. Maltbie <dmaltbie@daloma.org>
+
+# StageProfile accumulates wall and cpu time per (stage, key).  Stages
+# are the pipeline steps (read, hdr, chksum, resync/hunt, decode, emit),
+# keys break a stage down further (rtype or mid name for decode, emitter
+# name for emit).
+#
+# Stages nest.  start() pushes a frame, stop(stage, key) pops it and
+# charges the elapsed time less whatever nested stages used.  resync
+# does its own reads, those are charged to read, not resync.  So the
+# stage times add up to the time spent inside stages.  Anything else
+# (filters, counters, the main loop) shows up as "other".
+#
+# ProfFile wraps a TagFile (anything with read/tell/seek) and charges
+# every read to the read stage.  On a tagfuse file system read wall time
+# much larger than read cpu time says we are waiting on the network.
+#
+# cpu is process cpu time (time.clock on python 2).
+
+import time
+
+__version__ = '0.0.2 (sp)'
+
+try:
+    cpu_time = time.process_time
+except AttributeError:
+    cpu_time = time.clock
+
+STAGES = [ 'read', 'hdr', 'chksum', 'resync', 'hunt', 'decode', 'emit' ]
+
+
+class StageProfile(object):
+    '''accumulate wall/cpu time per (stage, key)'''
+    def __init__(self):
+        super(StageProfile, self).__init__()
+        self.times = {}                 # (stage, key) -> [calls, wall, cpu]
+        self.stack = []                 # [wall0, cpu0, child wall, child cpu]
+        self.wall0 = time.time()
+        self.cpu0  = cpu_time()
+        self.wall  = 0.0                # total run, set by finish
+        self.cpu   = 0.0
+
+    def start(self):
+        self.stack.append([time.time(), cpu_time(), 0.0, 0.0])
+
+    def stop(self, stage, key = None):
+        wall = time.time()
+        cpu  = cpu_time()
+        frame = self.stack.pop()
+        wall -= frame[0]
+        cpu  -= frame[1]
+        try:
+            t = self.times[(stage, key)]
+        except KeyError:
+            t = self.times[(stage, key)] = [0, 0.0, 0.0]
+        t[0] += 1
+        t[1] += wall - frame[2]
+        t[2] += cpu  - frame[3]
+        if self.stack:
+            self.stack[-1][2] += wall
+            self.stack[-1][3] += cpu
+
+    def finish(self):
+        self.wall = time.time() - self.wall0
+        self.cpu  = cpu_time()    - self.cpu0
+
+    def stage_totals(self):
+        '''stage -> [calls, wall, cpu] summed over keys'''
+        tot = {}
+        for (stage, key), t in self.times.items():
+            s = tot.setdefault(stage, [0, 0.0, 0.0])
+            s[0] += t[0]
+            s[1] += t[1]
+            s[2] += t[2]
+        return tot
+
+    def display(self):
+        if not self.wall:
+            self.finish()
+        wall = self.wall or 1e-9
+        tot  = self.stage_totals()
+        print('*** profile: wall: {:.3f}s  cpu: {:.3f}s'.format(
+            self.wall, self.cpu))
+        print('    {:8s} {:24s} {:>9} {:>9} {:>9} {:>6} {:>9}'.format(
+            'stage', 'key', 'calls', 'wall', 'cpu', 'wall%', 'us/call'))
+        stages = [ s for s in STAGES if s in tot ] + \
+                 sorted([ s for s in tot if s not in STAGES ])
+        in_stages = 0.0
+        for stage in stages:
+            calls, w, c = tot[stage]
+            in_stages += w
+            print('    {:8s} {:24s} {:9d} {:9.3f} {:9.3f} {:5.1f}% {:9.1f}'.format(
+                stage, '', calls, w, c, w * 100 / wall, w * 1e6 / calls))
+            keys = sorted([ k for (s, k) in self.times if s == stage and k ],
+                          key = lambda k: -self.times[(stage, k)][1])
+            for key in keys:
+                calls, w, c = self.times[(stage, key)]
+                print('    {:8s} {:24s} {:9d} {:9.3f} {:9.3f} {:5.1f}% {:9.1f}'.format(
+                    '', str(key)[:24], calls, w, c, w * 100 / wall,
+                    w * 1e6 / calls))
+        other = self.wall - in_stages
+        print('    {:8s} {:24s} {:>9} {:9.3f} {:>9} {:5.1f}%'.format(
+            'other', '', '', other, '', other * 100 / wall))
+
+        if 'read' in tot:
+            calls, w, c = tot['read']
+            print('    read wait (wall - cpu): {:.3f}s, {:.1f}% of wall'.format(
+                w - c, (w - c) * 100 / wall))
+        if 'decode' not in tot:
+            return
+        work = sum([ tot[s][1] for s in ('decode', 'emit') if s in tot ])
+        io   = tot['read'][1] if 'read' in tot else 0.0
+        print('    read: {:.1f}%  decode+emit: {:.1f}%  -> {}'.format(
+            io * 100 / wall, work * 100 / wall,
+            'i/o bound' if io > work else 'decode bound'))
+
+
+class ProfFile(object):
+    '''wrap a TagFile, charge reads to the read stage'''
+    def __init__(self, tf, prof):
+        super(ProfFile, self).__init__()
+        self.tf   = tf
+        self.prof = prof
+        self.name = tf.name
+
+    def read(self, cnt):
+        self.prof.start()
+        buf = self.tf.read(cnt)
+        self.prof.stop('read')
+        return buf
+
+    def read_some(self, cnt):
+        self.prof.start()
+        buf = self.tf.read_some(cnt)
+        self.prof.stop('read')
+        return buf
+
+    def tell(self):
+        return self.tf.tell()
+
+    def seek(self, *args, **kwargs):
+        return self.tf.seek(*args, **kwargs)
@@ -0,0 +1,343 @@
+'''tagdump acq - GPS acquisition (time to fix, on time) per power cycle'''
+
+# Copyright (c) 2018 Eric B. Decker, Daniel J. Maltbie
+# All rights reserved.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# See COPYING in the top level directory of this source tree.
+#
+# Contact: Eric B. Decker <cire831@gmail.com>
+#          Daniel J. Maltbie <dmaltbie@daloma.org>
+
+####
+#
+# tagdump acq: how long the GPS is on and how long it takes to get a fix.
+#
+# usage: tagdump acq [-h] [-o OUTPUT] [-v] input [input ...]
+#
+#   input           tag data streams, one per tag (a deployment)
+#   -o OUTPUT       per cycle csv (args.output)
+#
+# Each stream is walked once with get_record.  A GPS power cycle starts
+# at a GPS_TURN_ON event and ends at GPS_TURN_OFF, GPS_STANDBY, the next
+# GPS_TURN_ON or a REBOOT.  A cycle still open at the end of the stream
+# has no on time.  Per cycle:
+#
+#   tag         which input (0, 1, ...)
+#   recnum      record number of the GPS_TURN_ON
+#   t_on        GPS_TURN_ON rtctime, unix seconds
+#   on_time     secs from turn on to the end of the cycle
+#   first_char  secs from turn on to the first byte from the chip
+#               (GPS_FIRST arg1, ms)
+#   ttf         secs from turn on to the first valid fix.  The fix is a
+#               MID 41 (GPS_RAW_SIRFBIN, nav_valid 0) or, when the raw
+#               packets aren't logged, a GPS_SATS_41 event with arg1
+#               (nav_valid) 0.
+#   fixes       valid fixes in the cycle
+#   nsats       satellites in the first fix
+#   ttff_reset  MID 225/6, the chip's own ttff since reset (secs)
+#   ttff_nav    MID 225/6, ttff to first nav solution (secs)
+#   mpm         GPS_MPM events in the cycle, non zero says the chip was
+#               put into (or tried for) MPM.  full power otherwise.
+#   full_pwr    GPS_FULL_PWR events in the cycle
+#
+# Missing times are nan.  The columns are arrays (array module), one
+# row appended per cycle, so a deployment of many tags stays compact.
+#
+# The summary splits cycles by mode (mpm, full power) and gives the
+# fix rate and p10/p50/p90/max of ttf, on time per fix (on_time/fixes)
+# and ttff_nav.
+
+import math
+import struct
+import calendar
+from   array        import array
+from   collections  import OrderedDict
+
+import tagdump      as     td
+from   tagdump      import get_record
+from   tagdump      import DBLK_DIR_SIZE
+from   tagfile      import TagFile
+
+from   dt_defs      import DT_EVENT
+from   dt_defs      import DT_REBOOT
+from   dt_defs      import DT_GPS_RAW_SIRFBIN
+from   dt_defs      import dt_hdr_struct
+from   sirf_defs    import SIRF_SOP_SEQ
+from   sirf_defs    import SIRF_MID_OFFSET
+from   sirf_defs    import SIRF_SID_OFFSET
+from   sirf_defs    import sirf_hdr_struct
+from   core_headers import dt_gps_hdr_obj
+from   hdr_structs  import structs
+
+__version__ = '0.0.1 (ta)'
+
+JIFFIES         = 32768                 # rtctime sub_sec
+NAN             = float('nan')
+
+# GPS events, see core_headers.event_names
+GPS_TURN_ON     = 35
+GPS_STANDBY     = 36
+GPS_TURN_OFF    = 37
+GPS_MPM         = 38
+GPS_FULL_PWR    = 39
+GPS_FIRST       = 42
+GPS_SATS_41     = 45
+
+ACQ_COLS        = [ ('tag',        'H'),
+                    ('recnum',     'I'),
+                    ('t_on',       'd'),
+                    ('on_time',    'd'),
+                    ('first_char', 'd'),
+                    ('ttf',        'd'),
+                    ('fixes',      'I'),
+                    ('nsats',      'B'),
+                    ('ttff_reset', 'd'),
+                    ('ttff_nav',   'd'),
+                    ('mpm',        'H'),
+                    ('full_pwr',   'H') ]
+
+event_struct    = structs['dt_event_t']
+geo_struct      = structs['sb_geodetic_t']
+EV_OFFSET       = event_struct.offset('ev')
+ev_struct       = struct.Struct('<HBBIIII')     # ev, pcode, w, arg0-3
+
+GPS_DIR_OFFSET  = dt_hdr_struct.size + 5        # mark (4), chip (1), dir
+GPS_SIRF_OFFSET = len(dt_gps_hdr_obj)
+GEO_NAV_VALID   = geo_struct.index['nav_valid']
+GEO_NSATS       = geo_struct.index['nsats']
+
+# MID 225/6 statistics, sid then ttffs in 0.1s, from the sid on
+STATS_OFFSET    = GPS_SIRF_OFFSET + SIRF_SID_OFFSET
+stats_struct    = struct.Struct('>BHHH')        # sid, reset, aiding, nav
+
+
+def percentile(vals, pct):
+    '''nearest rank percentile of a sorted list'''
+    if not vals:
+        return None
+    return vals[int(round(pct / 100.0 * (len(vals) - 1)))]
+
+
+class AcqCycle(object):
+    '''one GPS power cycle being collected'''
+    __slots__ = ('recnum', 't_on', 'first_char', 'ttf', 'raw_fixes',
+                 'ev_fixes', 'nsats', 'ttff_reset', 'ttff_nav', 'mpm',
+                 'full_pwr')
+
+    def __init__(self, recnum, t_on):
+        self.recnum     = recnum
+        self.t_on       = t_on
+        self.first_char = NAN
+        self.ttf        = NAN
+        self.raw_fixes  = 0
+        self.ev_fixes   = 0
+        self.nsats      = 0
+        self.ttff_reset = NAN
+        self.ttff_nav   = NAN
+        self.mpm        = 0
+        self.full_pwr   = 0
+
+    def fix(self, t, nsats):
+        if math.isnan(self.ttf):
+            self.ttf   = t - self.t_on
+            self.nsats = nsats
+
+
+class TagAcq(object):
+    '''
+    walk data streams, one row per GPS power cycle into columns.
+    '''
+    def __init__(self):
+        super(TagAcq, self).__init__()
+        self.cols  = OrderedDict([ (name, array(code))
+                                   for name, code in ACQ_COLS ])
+        self.n     = 0
+        self.tag   = 0
+        self.cycle = None
+
+    def start_tag(self, tag):
+        self.close(NAN)
+        self.tag = tag
+
+    def close(self, t_end):
+        '''finish the open cycle (if any), t_end nan if it never ended'''
+        cy = self.cycle
+        if cy is None:
+            return
+        self.cycle = None
+        c = self.cols
+        c['tag'].append(self.tag)
+        c['recnum'].append(cy.recnum)
+        c['t_on'].append(cy.t_on)
+        c['on_time'].append(t_end - cy.t_on)
+        c['first_char'].append(cy.first_char)
+        c['ttf'].append(cy.ttf)
+        c['fixes'].append(cy.raw_fixes or cy.ev_fixes)
+        c['nsats'].append(cy.nsats)
+        c['ttff_reset'].append(cy.ttff_reset)
+        c['ttff_nav'].append(cy.ttff_nav)
+        c['mpm'].append(cy.mpm)
+        c['full_pwr'].append(cy.full_pwr)
+        self.n += 1
+
+    def add(self, offset, rec_buf):
+        '''look at one record'''
+        rlen, rtype, recnum, sub_sec, sec, mn, hr, dow, day, mon, year, \
+            recsum = dt_hdr_struct.unpack_from(rec_buf)
+        if rtype not in (DT_EVENT, DT_GPS_RAW_SIRFBIN, DT_REBOOT):
+            return
+        try:
+            t = calendar.timegm((year, mon, day, hr, mn, sec)) \
+                + sub_sec / float(JIFFIES)
+        except (ValueError, OverflowError):
+            t = NAN
+
+        if rtype == DT_REBOOT:
+            self.close(t)
+            return
+
+        if rtype == DT_EVENT:
+            if rlen < event_struct.size:
+                return
+            ev, pcode, w, arg0, arg1, arg2, arg3 = \
+                ev_struct.unpack_from(rec_buf, EV_OFFSET)
+            if ev == GPS_TURN_ON:
+                self.close(t)
+                self.cycle = AcqCycle(recnum, t)
+                return
+            cy = self.cycle
+            if cy is None:
+                return
+            if ev in (GPS_TURN_OFF, GPS_STANDBY):
+                self.close(t)
+            elif ev == GPS_FIRST:
+                cy.first_char = arg1 / 1000.0
+            elif ev == GPS_SATS_41:
+                if arg1 == 0:           # nav_valid
+                    cy.ev_fixes += 1
+                    cy.fix(t, arg0)
+            elif ev == GPS_MPM:
+                cy.mpm += 1
+            elif ev == GPS_FULL_PWR:
+                cy.full_pwr += 1
+            return
+
+        # GPS_RAW_SIRFBIN, from the chip
+        cy = self.cycle
+        if cy is None or rlen <= GPS_SIRF_OFFSET + 5:
+            return
+        if rec_buf[GPS_DIR_OFFSET] != 0:
+            return
+        if sirf_hdr_struct.unpack_from(rec_buf, GPS_SIRF_OFFSET)[0] \
+                != SIRF_SOP_SEQ:
+            return
+        mid = rec_buf[GPS_SIRF_OFFSET + SIRF_MID_OFFSET]
+        if mid == 41:
+            if rlen < GPS_SIRF_OFFSET + geo_struct.size:
+                return
+            v = geo_struct.unpack_from(rec_buf, GPS_SIRF_OFFSET)
+            if v[GEO_NAV_VALID] == 0:
+                cy.raw_fixes += 1
+                cy.fix(t, v[GEO_NSATS])
+        elif mid == 225:
+            if rlen < STATS_OFFSET + stats_struct.size:
+                return
+            sid, reset, aiding, nav = \
+                stats_struct.unpack_from(rec_buf, STATS_OFFSET)
+            if sid == 6:
+                cy.ttff_reset = reset / 10.0
+                cy.ttff_nav   = nav / 10.0
+
+    def write_csv(self, fd):
+        fd.write(','.join(self.cols.keys()) + '\n')
+        for row in zip(*self.cols.values()):
+            fd.write('{},{},{:.3f},{:.3f},{:.3f},{:.3f},{},{},'
+                     '{:.1f},{:.1f},{},{}\n'.format(*row))
+
+    def summary(self):
+        '''
+        per mode (mpm, full) [ cycles, with fix, ttfs, on time per fix,
+        ttff_navs ], the lists sorted.
+        '''
+        c = self.cols
+        modes = OrderedDict([ ('mpm', [ 0, 0, [], [], [] ]),
+                              ('full', [ 0, 0, [], [], [] ]) ])
+        isnan = math.isnan
+        for i in range(self.n):
+            m = modes['mpm' if c['mpm'][i] else 'full']
+            m[0] += 1
+            ttf = c['ttf'][i]
+            if isnan(ttf):
+                continue
+            m[1] += 1
+            m[2].append(ttf)
+            on, fixes = c['on_time'][i], c['fixes'][i]
+            if fixes and not isnan(on):
+                m[3].append(on / fixes)
+            if not isnan(c['ttff_nav'][i]):
+                m[4].append(c['ttff_nav'][i])
+        for m in modes.values():
+            for l in m[2:]:
+                l.sort()
+        return modes
+
+
+def pct_str(vals):
+    if not vals:
+        return '{:>31}'.format('-')
+    return '{:7.1f} {:7.1f} {:7.1f} {:7.1f}'.format(
+        percentile(vals, 10), percentile(vals, 50), percentile(vals, 90),
+        vals[-1])
+
+
+def acq(args):
+    '''tagdump acq, see the top of this file'''
+    ta = TagAcq()
+    for tag, infd in enumerate(args.input):
+        td.init_globals()
+        infile = TagFile(infd)
+        infile.seek(DBLK_DIR_SIZE)
+        ta.start_tag(tag)
+        while (True):
+            rec_offset, hdr, rec_buf = get_record(infile)
+            if (rec_offset < 0):
+                break
+            ta.add(rec_offset, rec_buf)
+        ta.close(NAN)
+
+    if args.output:
+        with open(args.output, 'w') as fd:
+            ta.write_csv(fd)
+
+    modes = ta.summary()
+    print('*** acq: {} tags, {} gps cycles{}'.format(
+        len(args.input), ta.n,
+        ' -> {}'.format(args.output) if args.output else ''))
+    print('    {:5s} {:>7} {:>6}  {:31s}  {:31s}  {:31s}'.format(
+        'mode', 'cycles', 'fix%', 'ttf (s) p10/p50/p90/max',
+        'on time/fix (s)', 'ttff_nav (s)'))
+    for name, m in modes.items():
+        print('    {:5s} {:7} {:>6}  {}  {}  {}'.format(
+            name, m[0],
+            '{:.1f}'.format(m[1] * 100.0 / m[0]) if m[0] else '-',
+            pct_str(m[2]), pct_str(m[3]), pct_str(m[4])))
+    if args.verbose:
+        c = ta.cols
+        for tag in range(len(args.input)):
+            rows = [ i for i in range(ta.n) if c['tag'][i] == tag ]
+            print('    {}: {} cycles, {} with fix'.format(
+                args.input[tag].name, len(rows),
+                len([ i for i in rows if not math.isnan(c['ttf'][i]) ])))
+    return ta
@@ -0,0 +1,251 @@
+'''tagdump batch - process a directory tree of tag data streams'''
+
+# Copyright (c) 2018 Daniel J. Maltbie, Eric B. Decker
+# All rights reserved.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# See COPYING in the top level directory of this source tree.
+#
+# Contact: Daniel J. Maltbie <dmaltbie@daloma.org>
+#          Eric B. Decker <cire831@gmail.com>
+
+####
+#
+# tagdump batch: fleet processing.
+#
+# usage: tagdump batch [-h] [-o OUTDIR] [-j JOBS] [-p PATTERN] [-v] dir
+#
+#   dir             directory tree to search for data streams
+#   -o OUTDIR       where per file output goes (args.outdir)
+#   -j JOBS         size of the process pool (args.jobs), default ncpus
+#   -p PATTERN      file name patterns (fnmatch) of data streams,
+#                   comma separated.  (args.pattern)
+#
+# Each data stream found is handed to a worker in a bounded process pool.
+# The worker walks the stream with get_record, accumulates TagStats and
+# decodes any REBOOT records (owcb) to pick up the reboot reason.  Output
+# for each file (named from its path relative to dir):
+#
+#   <name>.stats    the --stats summary plus any get_record complaints
+#   <name>.idx      record index, offset recnum rtype len rtctime
+#   <name>.tcor     rtctime -> UTC correlation (tagtime.py) for the index
+#   <name>.json     per file summary (export), used for the fleet report
+#
+# When all files are done, fleet.json and a fleet report (also printed)
+# are written to OUTDIR.
+
+import os
+import sys
+import json
+import fnmatch
+import multiprocessing
+
+import tagdump         as     td
+from   tagdump         import get_record
+from   tagdump         import DBLK_DIR_SIZE
+from   tagfile         import TagFile
+from   tagstats        import TagStats
+from   tagtime         import TimeCorr
+
+from   dt_defs         import *
+import dt_defs         as     dtd
+from   dt_defs         import dt_hdr_struct
+from   dt_defs         import dt_name
+from   dt_defs         import rtctime_str
+
+# import configuration, which will populate decode/emitter trees.
+import tagdump_config
+
+from   core_headers    import owcb_obj
+from   core_emitters   import reboot_reason_name
+
+DEFAULT_PATTERNS = 'DBLK*,*.dblk,*.DBLK,*.sd,*.img'
+
+idx_title = '# offset recnum rtype len rtctime\n'
+idx_fmt   = '{} {} {} {} {}\n'
+
+
+def find_streams(top, patterns):
+    '''walk top looking for files matching any of patterns'''
+    found = []
+    for dirpath, dirnames, filenames in os.walk(top):
+        dirnames.sort()
+        for fn in sorted(filenames):
+            for pat in patterns:
+                if fnmatch.fnmatch(fn, pat):
+                    found.append(os.path.join(dirpath, fn))
+                    break
+    return found
+
+
+def out_name(top, path):
+    '''flatten path relative to top into an output base name'''
+    return os.path.relpath(path, top).replace(os.sep, '_')
+
+
+def process_file(top, path, outdir):
+    '''
+    worker: stats, index and export for one data stream.
+
+    runs in a pool worker.  get_record and friends keep their state in
+    tagdump module globals, which are reset for each file.  stdout is
+    pointed at the .stats file so resync/checksum complaints land there.
+
+    returns the per file summary dict (also written as <name>.json).
+    '''
+    name = out_name(top, path)
+    base = os.path.join(outdir, name)
+    summary = { 'tag': name, 'path': path, 'error': None }
+
+    saved_stdout = sys.stdout
+    stats_fd = open(base + '.stats', 'w')
+    idx_fd   = open(base + '.idx',   'w')
+    sys.stdout = stats_fd
+    try:
+        td.init_globals()
+        stats   = TagStats()
+        tcor    = TimeCorr()
+        reasons = {}
+        reboot  = dtd.dt_records.get(DT_REBOOT)
+
+        infile  = TagFile(open(path, 'rb'))
+        infile.seek(DBLK_DIR_SIZE)
+        idx_fd.write(idx_title)
+        while (True):
+            rec_offset, hdr, rec_buf = get_record(infile)
+            if (rec_offset < 0):
+                break
+            stats.add(rec_offset, rec_buf)
+            tcor.add(rec_offset, rec_buf)
+            rlen, rtype, recnum, sub_sec, sec, mn, hr, dow, day, mon, year, \
+                recsum = dt_hdr_struct.unpack_from(rec_buf)
+            idx_fd.write(idx_fmt.format(rec_offset, recnum, rtype, rlen,
+                rtctime_str(year, mon, day, hr, mn, sec)))
+            if rtype == DT_REBOOT and reboot:
+                reboot[DTR_DECODER](0, rec_offset, rec_buf, reboot[DTR_OBJ])
+                reason = reboot_reason_name(owcb_obj['reboot_reason'].val)
+                reasons[reason] = reasons.get(reason, 0) + 1
+
+        tcor.finish(os.path.getsize(path), infile.tell())
+        tcor.write(base + '.tcor')
+        print
+        print('*** end of processing @{} (0x{:x})'.format(
+            infile.tell(), infile.tell()))
+        stats.display(td.resync_locs, td.chksum_errors)
+
+        missing = stats.cov.missing()
+        summary.update({
+            'records':       stats.records,
+            'bytes':         stats.bytes,
+            'recnum_lo':     stats.cov.lo,
+            'recnum_hi':     stats.cov.hi,
+            'missing':       stats.cov.num_missing(missing),
+            'dups':          stats.cov.num_dups,
+            'reboots':       stats.rtype_count.get(DT_REBOOT, 0),
+            'reboot_reasons': reasons,
+            'resyncs':       len(td.resync_locs),
+            'chksum_errors': td.chksum_errors,
+            'time_segments': len(tcor.seg_recnum),
+            'time_anchors':  len(tcor.recnum),
+            'first_rt':      rtctime_str(*stats.first_rt[:6]) if stats.first_rt else None,
+            'last_rt':       rtctime_str(*stats.last_rt[:6])  if stats.last_rt  else None,
+            'rtypes':        dict([ (dt_name(k), v) for k, v in stats.rtype_count.items() ]),
+            'mids':          stats.mid_count,
+        })
+    except Exception as e:
+        summary['error'] = '{}: {}'.format(type(e).__name__, e)
+        print('*** batch: {} failed: {}'.format(path, summary['error']))
+    finally:
+        sys.stdout = saved_stdout
+        stats_fd.close()
+        idx_fd.close()
+
+    with open(base + '.json', 'w') as fd:
+        json.dump(summary, fd, indent = 2, sort_keys = True)
+    return summary
+
+
+def _worker(work):
+    return process_file(*work)
+
+
+fleet0 = '{:32s} {:>9} {:>11} {:>6} {:>6} {:>7}  {:19s}  {:19s}  {}'
+
+def fleet_report(summaries):
+    '''print the aggregated fleet report'''
+    print(fleet0.format('tag', 'records', 'bytes', 'chksum', 'resync',
+                        'reboots', 'first', 'last', 'reasons'))
+    fleet_reasons = {}
+    tot_recs = tot_bytes = tot_chk = tot_rbt = 0
+    for s in summaries:
+        if s['error']:
+            print('{:32s} *** {}'.format(s['tag'], s['error']))
+            continue
+        for k, v in s['reboot_reasons'].items():
+            fleet_reasons[k] = fleet_reasons.get(k, 0) + v
+        tot_recs  += s['records']
+        tot_bytes += s['bytes']
+        tot_chk   += s['chksum_errors']
+        tot_rbt   += s['reboots']
+        print(fleet0.format(s['tag'][-32:], s['records'], s['bytes'],
+                            s['chksum_errors'], s['resyncs'], s['reboots'],
+                            s['first_rt'] or '-', s['last_rt'] or '-',
+                            ' '.join([ '{}:{}'.format(k, v) for k, v in
+                                       sorted(s['reboot_reasons'].items()) ])))
+    print
+    print('*** fleet: {} streams, {} records, {} bytes, chksum_errs: {}, reboots: {}'.format(
+        len(summaries), tot_recs, tot_bytes, tot_chk, tot_rbt))
+    print('*** reboot reasons: {}'.format(fleet_reasons))
+    return fleet_reasons
+
+
+def batch(args):
+    '''find data streams under args.dir and process them in a process pool'''
+    top      = args.dir
+    patterns = [ p.strip() for p in args.pattern.split(',') if p.strip() ]
+    paths    = find_streams(top, patterns)
+    if not paths:
+        print('*** batch: no data streams found under {}'.format(top))
+        return []
+
+    outdir = args.outdir
+    if not os.path.isdir(outdir):
+        os.makedirs(outdir)
+
+    jobs = args.jobs if args.jobs else multiprocessing.cpu_count()
+    jobs = max(1, min(jobs, len(paths)))
+    print('*** batch: {} streams, {} workers, output -> {}'.format(
+        len(paths), jobs, outdir))
+
+    work = [ (top, p, outdir) for p in paths ]
+    summaries = []
+    pool = multiprocessing.Pool(jobs)
+    try:
+        for s in pool.imap(_worker, work):
+            if args.verbose:
+                print('    {}: {} records'.format(s['tag'], s.get('records', 0)))
+            summaries.append(s)
+        pool.close()
+    except KeyboardInterrupt:
+        pool.terminate()
+        print
+        print('*** user stop')
+    pool.join()
+
+    print
+    reasons = fleet_report(summaries)
+    with open(os.path.join(outdir, 'fleet.json'), 'w') as fd:
+        json.dump({ 'streams': summaries, 'reboot_reasons': reasons },
+                  fd, indent = 2, sort_keys = True)
+    return summaries
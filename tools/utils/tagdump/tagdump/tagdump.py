@@ -27,26 +27,37 @@
 #   1   basic record display - more details
 #   2   detailed record display
 #   3   dump buffer/record
-#   4   details of resync
+#   4   details of resync, ascii column in dumps
 #   5   other errors and decoder versions
 
 import sys
 import struct
 import argparse
+import cProfile
 
 from   dt_defs         import *
 import dt_defs         as     dtd
 from   dt_defs         import print_record
+from   dt_defs         import dt_name
 
 import sirf_defs       as     sirf
 
 from   tagdumpargs     import parseargs
 from   misc_utils      import dump_buf
+from   misc_utils      import dump_bufs
 
 from   tagfile         import TagFile
 from   tagfile         import TF_SEEK_END
 
-# import configuration, which will populate decode/emitter trees.
+from   tagstats        import TagStats
+from   rec_coverage    import RecCoverage
+from   stageprof       import StageProfile
+import outbuf
+from   stageprof       import ProfFile
+from   tagstats        import GPS_RAW_MID_OFFSET
+
+# import configuration, which registers the decode/emitter populators.
+# they get pulled in on first use.
 import tagdump_config
 
 # we need a definition of the header so we can pull it in.
@@ -58,12 +69,13 @@ from   dt_defs         import DT_H_REVISION as DT_REV
 from   dt_defs         import __version__   as dt_ver
 from   decode_base     import __version__   as db_ver
 from   sirf_defs       import __version__   as sb_ver
-from   sirf_decoders   import __version__   as sd_ver
-from   sirf_emitters   import __version__   as se_ver
 from   sirf_headers    import __version__   as sh_ver
-from   core_decoders   import __version__   as cd_ver
-from   core_emitters   import __version__   as ce_ver
 from   core_headers    import __version__   as ch_ver
+from   tagstats        import __version__   as ts_ver
+from   rec_coverage    import __version__   as rc_ver
+from   stageprof       import __version__   as sp_ver
+from   outbuf          import __version__   as ob_ver
+from   registry        import __version__   as rg_ver
 
 ver_str = '\ntagdump: ' + VERSION + ':  dt_rev ' + str(DT_REV)
 
@@ -130,12 +142,28 @@ ver_str = '\ntagdump: ' + VERSION + ':  dt_rev ' + str(DT_REV)
 #                   get new data as it arrives.  (implies --net)
 #                   (args.tail, boolean)
 #
+#   --stats         statistics only.  walk record headers (recsum checked)
+#                   and display a summary.  no decoders or emitters are run.
+#                   (args.stats, boolean)
+#
+#   --profile       accumulate wall/cpu time per stage (read, hdr, chksum,
+#                   resync, decode, emit), decode per rtype (GPS_RAW per
+#                   mid) and emit per emitter.  displayed with the end
+#                   of run counters.  see stageprof.py.
+#                   (args.profile, boolean)
+#
+#   --pstats FILE   run under cProfile and dump pstats to FILE.
+#                   (args.pstats)
+#
 #   -v, --verbose   increase output verbosity
 #                   (args.verbose)
 #
 # positional parameters:
 #
 #   input:          file to process.  (args.input)
+#
+# tagdump batch DIR [-o OUTDIR] [-j JOBS] [-p PATTERN] processes every data
+# stream under DIR.  See tagbatch.py.
 
 
 # This program needs to understand the format of the DBlk data stream.
@@ -153,6 +181,7 @@ rec_high                = 0            # inclusive
 rec_last                = 0            # last rec num looked at
 verbose                 = 0            # how chatty to be
 debug                   = 0            # extra debug chatty
+prof                    = None         # StageProfile if --profile
 
 
 # 1st sector of the first is the directory
@@ -169,11 +198,13 @@ chksum_errors           = 0             # checksum errors seen
 unk_rtypes              = 0             # unknown record types
 total_records           = 0
 total_bytes             = 0
+resync_locs             = []            # where resyncs were started
 
 def init_globals():
     global rec_low, rec_high, rec_last, verbose, debug
     global num_resyncs, chksum_errors, unk_rtypes
-    global total_records, total_bytes
+    global total_records, total_bytes, resync_locs
+    global prof
 
     rec_low             = 0
     rec_high            = 0
@@ -186,6 +217,8 @@ def init_globals():
     unk_rtypes          = 0             # unknown record types
     total_records       = 0
     total_bytes         = 0
+    resync_locs         = []
+    prof                = None
 
 
 # resync the data stream to the next SYNC/REBOOT record
@@ -213,8 +246,27 @@ def resync(fd, offset):
 
     output: offset      offset of next record
                         -1 if something went wrong
+
+    at -vvvv the headers turned down on the way are dumped, as one batch,
+    when the resync is done.
     '''
 
+    rejects = []
+    try:
+        if not prof:
+            return _resync(fd, offset, rejects)
+        prof.start()
+        try:
+            return _resync(fd, offset, rejects)
+        finally:
+            prof.stop('resync')
+    finally:
+        if rejects:
+            print('*** resync: headers turned down: {}'.format(len(rejects)))
+            dump_bufs(rejects, '    ', ascii = True)
+
+
+def _resync(fd, offset, rejects):
     global num_resyncs
     hdr     = dt_hdr_obj
     hdr_len = len(hdr)
@@ -226,6 +278,7 @@ def resync(fd, offset):
         offset = (offset / 4) * 4
     fd.seek(offset)
     num_resyncs += 1
+    resync_locs.append(offset)
     zero_sigs = 0
     v = dtd.dt_records.get(DT_SYNC,   (0, None, None, None, ''))
     sync_len   = v[DTR_REQ_LEN]
@@ -294,6 +347,7 @@ def resync(fd, offset):
             print(resync2.format(offset_try, offset_try, rlen, rtype, recnum))
             print('    moving to: @{0} (0x{0:x})'.format(
                 offset_try + RESYNC_HDR_OFFSET))
+            rejects.append((offset_try, buf))
         fd.seek(offset_try + RESYNC_HDR_OFFSET)
 
 
@@ -360,11 +414,15 @@ def get_record(fd):
             print('*** record header read too short: wanted {}, got {}, @{}'.format(
                 hdr_len, len(rec_buf), offset))
             break                       # oops
+        if (prof):
+            prof.start()
         hdr.set(rec_buf)
         rlen   = hdr['len'].val
         rtype  = hdr['type'].val
         recnum = hdr['recnum'].val
         recsum = hdr['recsum'].val
+        if (prof):
+            prof.stop('hdr')
 
         # check for obvious errors
         if (rlen < hdr_len):
@@ -424,10 +482,14 @@ def get_record(fd):
         # so we need to remove it before comparing.  Recsum is 16 bits wide so can not
         # simply be added in as part of the checksum computation.
         #
+        if (prof):
+            prof.start()
         chksum = sum(rec_buf[:rlen])
         chksum -= (recsum & 0xff00) >> 8
         chksum -= (recsum & 0x00ff)
         chksum &= 0xffff                # force to 16 bits vs. 16 bit recsum
+        if (prof):
+            prof.stop('chksum')
         if (chksum != recsum):
             chksum_errors += 1
             chksum1 = '*** checksum failure @{0} (0x{0:x}) ' + \
@@ -436,7 +498,7 @@ def get_record(fd):
             print_record(offset, rec_buf)
             if (verbose >= 3):
                 print
-                dump_buf(rec_buf, '    ')
+                dump_buf(rec_buf, '    ', ascii = verbose >= 4)
             offset = resync(fd, offset)
             if (offset < 0):
                 break
@@ -464,6 +526,62 @@ def process_dir(fd):
     fd.seek(DBLK_DIR_SIZE)
 
 
+def prof_key(rtype, rec_buf):
+    '''profile key for decode, rtype name, GPS_RAW broken down by mid'''
+    if rtype == DT_GPS_RAW_SIRFBIN and len(rec_buf) > GPS_RAW_MID_OFFSET:
+        mid = rec_buf[GPS_RAW_MID_OFFSET]
+        return 'GPS_RAW/{}'.format(
+            sirf.mid_table.get(mid, (None, None, None, mid))[sirf.MID_NAME])
+    return dt_name(rtype)
+
+
+def end_profile(args, cprof):
+    '''finish up --profile/--pstats, called after the end counters'''
+    if cprof:
+        cprof.disable()
+        cprof.dump_stats(args.pstats)
+        print('*** pstats: {}'.format(args.pstats))
+    if prof:
+        prof.finish()
+        print
+        prof.display()
+
+
+def dump_stats(args, infile):
+    '''
+    statistics only pass (--stats)
+
+    walk the record headers using get_record (which validates the
+    recsum) and accumulate stats.  No decoding or emitting is done.
+    '''
+
+    global total_records, total_bytes
+
+    stats = TagStats()
+    try:
+        while(True):
+            rec_offset, hdr, rec_buf = get_record(infile)
+            if (rec_offset < 0):
+                break
+            if (args.endpos and rec_offset > args.endpos):
+                break
+            stats.add(rec_offset, rec_buf)
+            if (args.num and stats.records >= args.num):
+                break
+    except KeyboardInterrupt:
+        print
+        print
+        print('*** user stop'),
+
+    total_records = stats.records
+    total_bytes   = stats.bytes
+    print
+    print('*** end of processing @{} (0x{:x})'.format(
+        infile.tell(), infile.tell()))
+    stats.display(resync_locs, chksum_errors)
+    return stats
+
+
 def dump(args):
     """
     Reads records and prints out details
@@ -481,16 +599,26 @@ def dump(args):
 
     global rec_low, rec_high, rec_last, verbose, debug
     global num_resyncs, chksum_errors, unk_rtypes
-    global total_records, total_bytes
+    global total_records, total_bytes, prof
 
     init_globals()
 
+    # all output (emitters included) goes through one large buffer.
+    outbuf.install()
+
     if (args.verbose and args.verbose >= 5):
+        # decoders/emitters are loaded lazily, only pull them in here
+        from core_decoders import __version__ as cd_ver
+        from core_emitters import __version__ as ce_ver
+        from sirf_decoders import __version__ as sd_ver
+        from sirf_emitters import __version__ as se_ver
         print ver_str
-        print '  decode_base: {}  dt_defs: {}  sirf_defs: {}'.format(
-            db_ver, dt_ver, sb_ver)
+        print '  decode_base: {}  dt_defs: {}  sirf_defs: {}  registry: {}'.format(
+            db_ver, dt_ver, sb_ver, rg_ver)
         print '     core:  d: {}  e: {}  h: {}'.format(cd_ver, ce_ver, ch_ver)
         print '     sirf:  d: {}  e: {}  h: {}'.format(sd_ver, se_ver, sh_ver)
+        print '    stats:  {}  coverage: {}  profile: {}  outbuf: {}'.format(
+            ts_ver, rc_ver, sp_ver, ob_ver)
         print
 
     def count_dt(rtype):
@@ -521,6 +649,14 @@ def dump(args):
     # create file object that handles both buffered and direct io
     infile  = TagFile(args.input, net_io = args.net, tail = args.tail, verbose = verbose)
 
+    cprof = None
+    if (args.pstats):
+        cprof = cProfile.Profile()
+        cprof.enable()
+    if (args.profile):
+        prof   = StageProfile()
+        infile = ProfFile(infile, prof)
+
     if (args.start_rec):
         rec_low  = args.start_rec
     if (args.last_rec):
@@ -539,8 +675,17 @@ def dump(args):
         else:
             infile.seek(args.jump)
 
+    if (args.stats):
+        dump_stats(args, infile)
+        end_profile(args, cprof)
+        outbuf.flush()
+        return
+
     print(dtd.rec_title_str)
 
+    # recnum coverage over everything get_record hands back, before filters
+    cov = RecCoverage()
+
     # extract record from input file and output decoded results
     try:
         while(True):
@@ -561,6 +706,7 @@ def dump(args):
                 print('*** record gap: ({}) records, @{}'.format(
                     recnum - rec_last, rec_offset))
             rec_last = recnum
+            cov.add(recnum, rec_offset)
 
             # apply any filters (inclusion)
             if (args.rtypes):
@@ -587,10 +733,25 @@ def dump(args):
             obj      = v[DTR_OBJ]               # dt object
             if (decode):
                 try:
-                    decode(verbose, rec_offset, rec_buf, obj)
-                    if emitters and len(emitters):
-                        for e in emitters:
-                            e(verbose, rec_offset, rec_buf, obj)
+                    if prof:
+                        # stop in finally, a failed decode is still charged
+                        # and the profile stack stays balanced.
+                        prof.start()
+                        try:
+                            decode(verbose, rec_offset, rec_buf, obj)
+                        finally:
+                            prof.stop('decode', prof_key(rtype, rec_buf))
+                        for e in emitters or []:
+                            prof.start()
+                            try:
+                                e(verbose, rec_offset, rec_buf, obj)
+                            finally:
+                                prof.stop('emit', e.__name__)
+                    else:
+                        decode(verbose, rec_offset, rec_buf, obj)
+                        if emitters and len(emitters):
+                            for e in emitters:
+                                e(verbose, rec_offset, rec_buf, obj)
                 except struct.error:
                     print('*** decoder/emitter error: (len: {}, '
                           'rtype: {} {}, expected: {}), @{}'.format(
@@ -603,7 +764,7 @@ def dump(args):
             if (verbose >= 3):
                 print
                 print_record(rec_offset, rec_buf)
-                dump_buf(rec_buf, '    ')
+                dump_buf(rec_buf, '    ', ascii = verbose >= 4)
             if (verbose >= 1):
                 print
             total_records += 1
@@ -621,8 +782,12 @@ def dump(args):
     print('*** reboots: {}, resyncs: {}, chksum_errs: {}, unk_rtypes: {}'.format(
         dtd.dt_count.get(DT_REBOOT, 0), num_resyncs, chksum_errors, unk_rtypes))
     print
+    cov.display()
+    print
     print('rtypes: {}'.format(dtd.dt_count))
     print('mids:   {}'.format(sirf.mid_count))
+    end_profile(args, cprof)
+    outbuf.flush()
 
 if __name__ == "__main__":
     dump(parseargs())
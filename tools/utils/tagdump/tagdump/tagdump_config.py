@@ -1,5 +1,12 @@
 '''configuration for tagdump'''
 
-# import populators for core and sirf decode/emitters
-import core_populate
-import sirf_populate
+# register populators for core and sirf decode/emitters.  Each is
+# imported on the first lookup of an rtype/mid it lists (see
+# registry.py).
+import dt_defs       as     dtd
+import sirf_defs     as     sirf
+
+for populator, keys in dtd.dt_populators:
+    dtd.dt_records.register(populator, keys)
+for populator, keys in sirf.sirf_populators:
+    sirf.mid_table.register(populator, keys)
@@ -97,6 +97,17 @@ def parseargs():
                         action='store_true',
                         help='continue reading data at EOF')
 
+    parser.add_argument('--stats',
+                        action='store_true',
+                        help='statistics only, no decode or record display')
+
+    parser.add_argument('--profile',
+                        action='store_true',
+                        help='time each stage (read, decode, emit, ...)')
+
+    parser.add_argument('--pstats',
+                        help='run under cProfile, dump pstats to PSTATS')
+
     # see tagdump.py for verbosity levels
     parser.add_argument('-v', '--verbose',
                         action='count',
@@ -105,5 +116,211 @@ def parseargs():
 
     return parser.parse_args()
 
+
+def parse_batch_args(argv = None):
+    '''tagdump batch DIR, see tagbatch.py'''
+    from tagbatch import DEFAULT_PATTERNS
+
+    parser = argparse.ArgumentParser(prog = 'tagdump batch',
+        description='Process every Tag Data Stream under a directory.')
+
+    parser.add_argument('dir',
+                        help='directory tree to search')
+
+    parser.add_argument('-o', '--outdir',
+                        default='tagdump_batch',
+                        help='output directory for per file results')
+
+    parser.add_argument('-j', '--jobs',
+                        type=int,
+                        help='number of worker processes (default ncpus)')
+
+    parser.add_argument('-p', '--pattern',
+                        default=DEFAULT_PATTERNS,
+                        help='comma separated data stream file patterns')
+
+    parser.add_argument('-v', '--verbose',
+                        action='count',
+                        default=0,
+                        help='increase output verbosity')
+
+    return parser.parse_args(argv)
+
+def parse_track_args(argv = None):
+    '''tagdump track INPUT, see tagtrack.py'''
+    parser = argparse.ArgumentParser(prog = 'tagdump track',
+        description='Extract GPS position fixes from a Tag Data Stream.')
+
+    parser.add_argument('input',
+                        type=argparse.FileType('rb'),
+                        help='input file')
+
+    parser.add_argument('-o', '--output',
+                        help='track file (default <input>.trk or .csv)')
+
+    parser.add_argument('--csv',
+                        action='store_true',
+                        help='write csv text instead of a binary track file')
+
+    parser.add_argument('-v', '--verbose',
+                        action='count',
+                        default=0,
+                        help='increase output verbosity')
+
+    return parser.parse_args(argv)
+
+def parse_sensor_args(argv = None):
+    '''tagdump sensor INPUT, see tagsensor.py'''
+    parser = argparse.ArgumentParser(prog = 'tagdump sensor',
+        description='Extract SENSOR_DATA/SENSOR_SET samples as time series.')
+
+    parser.add_argument('input',
+                        type=argparse.FileType('rb'),
+                        help='input file')
+
+    parser.add_argument('-o', '--output',
+                        help='sensor file (default <input>.sns or .csv)')
+
+    parser.add_argument('--csv',
+                        action='store_true',
+                        help='write csv text instead of a binary sensor file')
+
+    parser.add_argument('-v', '--verbose',
+                        action='count',
+                        default=0,
+                        help='increase output verbosity')
+
+    return parser.parse_args(argv)
+
+def parse_acq_args(argv = None):
+    '''tagdump acq INPUT ..., see tagacq.py'''
+    parser = argparse.ArgumentParser(prog = 'tagdump acq',
+        description='GPS acquisition (time to fix, on time) per power cycle.')
+
+    parser.add_argument('input',
+                        nargs='+',
+                        type=argparse.FileType('rb'),
+                        help='input files, one per tag')
+
+    parser.add_argument('-o', '--output',
+                        help='per cycle csv')
+
+    parser.add_argument('-v', '--verbose',
+                        action='count',
+                        default=0,
+                        help='increase output verbosity')
+
+    return parser.parse_args(argv)
+
+def parse_time_args(argv = None):
+    '''tagdump time INPUT, see tagtime.py'''
+    from tagtime import utc_arg
+    parser = argparse.ArgumentParser(prog = 'tagdump time',
+        description='Correlate record rtctime with UTC (MID 41), cached in <input>.tcor.')
+
+    parser.add_argument('input',
+                        type=argparse.FileType('rb'),
+                        help='input file')
+
+    parser.add_argument('--rebuild',
+                        action='store_true',
+                        help='ignore the .tcor cache, scan from the start')
+
+    parser.add_argument('--from',
+                        dest='t_from',
+                        type=utc_arg,
+                        help='UTC start (unix secs or YYYY/MM/DD-HH:MM:SS)')
+
+    parser.add_argument('--to',
+                        dest='t_to',
+                        type=utc_arg,
+                        help='UTC end (unix secs or YYYY/MM/DD-HH:MM:SS)')
+
+    parser.add_argument('-v', '--verbose',
+                        action='count',
+                        default=0,
+                        help='increase output verbosity')
+
+    return parser.parse_args(argv)
+
+def float_list(x):
+    return [ float(v) for v in x.split(',') if v ]
+
+def parse_grid_args(argv = None):
+    '''tagdump grid build/query, see taggrid.py'''
+    from tagtime import utc_arg
+    from taggrid import cell_arg
+    parser = argparse.ArgumentParser(prog = 'tagdump grid',
+        description='Spatial grid index over GPS fixes, bounding box + time queries.')
+    sub = parser.add_subparsers(dest='cmd')
+
+    build = sub.add_parser('build', help='build an index from tracks, streams or indexes')
+    build.add_argument('input',
+                       nargs='+',
+                       help='.trk files, data streams or grid indexes')
+    build.add_argument('-o', '--output',
+                       required=True,
+                       help='grid index to write')
+    build.add_argument('--cell',
+                       type=cell_arg,
+                       default=0.01,
+                       help='cell size in degrees (default 0.01)')
+
+    query = sub.add_parser('query', help='fixes in a box and time window')
+    query.add_argument('index',
+                       help='grid index')
+    query.add_argument('--bbox',
+                       type=float_list,
+                       required=True,
+                       help='LAT0,LON0,LAT1,LON1 (degrees)')
+    query.add_argument('--from',
+                       dest='t_from',
+                       type=utc_arg,
+                       help='start (unix secs or YYYY/MM/DD-HH:MM:SS)')
+    query.add_argument('--to',
+                       dest='t_to',
+                       type=utc_arg,
+                       help='end (unix secs or YYYY/MM/DD-HH:MM:SS)')
+    query.add_argument('-v', '--verbose',
+                       action='count',
+                       default=0,
+                       help='increase output verbosity')
+
+    args = parser.parse_args(argv)
+    if args.cmd == 'query' and len(args.bbox) != 4:
+        parser.error('--bbox needs LAT0,LON0,LAT1,LON1')
+    return args
+
+def auto_int_list(x):
+    return [ auto_int(v) for v in x.split(',') if v ]
+
+def parse_sirf_args(argv = None):
+    '''tagdump sirf INPUT, see tagsirf.py'''
+    parser = argparse.ArgumentParser(prog = 'tagdump sirf',
+        description='Extract the SiRF packets of a Tag Data Stream to a sirfbin file.')
+
+    parser.add_argument('input',
+                        type=argparse.FileType('rb'),
+                        help='input file')
+
+    parser.add_argument('-o', '--output',
+                        help='sirfbin output (default <input>.sirf)')
+
+    parser.add_argument('--dir',
+                        choices=['rx', 'tx', 'all'],
+                        default='all',
+                        help='rx (from gps), tx (to gps), all (default)')
+
+    parser.add_argument('--mids',
+                        type=auto_int_list,
+                        help='only these mids, comma separated')
+
+    parser.add_argument('-v', '--verbose',
+                        action='count',
+                        default=0,
+                        help='increase output verbosity')
+
+    return parser.parse_args(argv)
+
 if __name__ == '__main__':
     print(parseargs())
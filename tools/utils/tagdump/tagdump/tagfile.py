@@ -74,6 +74,7 @@ class TagFile(object):
                     if (self.tail):
                         if self.verbose >= 5:
                             print '*** TF.read: buf len: ', len(buf)
+                        sys.stdout.flush()      # show what we have so far
                         time.sleep(5)
                         continue
                     print '*** data stream EOF, sorry'
@@ -85,6 +86,24 @@ class TagFile(object):
                 print '*** TF.read: unhandled exception', sys.exc_info()[0]
                 raise
 
+    def read_some(self, cnt):
+        '''
+        read up to cnt bytes, whatever is there, for callers that scan
+        big chunks (sirfdump hunt).  read() insists on all cnt bytes and
+        throws away a partial tail at EOF.
+
+        returns '' at EOF.  with tail, waits for at least one byte.
+        '''
+        while True:
+            if (self.net_io):
+                new = os.read(self.fileno, cnt)
+            else:
+                new = self.fd.read(cnt)
+            if new or not self.tail:
+                return new
+            sys.stdout.flush()          # show what we have so far
+            time.sleep(5)
+
     def tell(self):
         if (self.net_io):
             return os.lseek(self.fileno, 0, os.SEEK_CUR)
@@ -0,0 +1,356 @@
+'''tagdump grid - spatial grid index over GPS fixes, bbox + time queries'''
+
+# Copyright (c) 2018 Eric B. Decker, Daniel J. Maltbie
+# All rights reserved.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# See COPYING in the top level directory of this source tree.
+#
+# Contact: Eric B. Decker <cire831@gmail.com>
+#          Daniel J. Maltbie <dmaltbie@daloma.org>
+
+####
+#
+# tagdump grid: which fixes (tag, recnum) fall in a region and time window.
+#
+# usage: tagdump grid build [-h] -o OUTPUT [--cell DEG] input [input ...]
+#        tagdump grid query [-h] --bbox LAT0,LON0,LAT1,LON1
+#                           [--from UTC] [--to UTC] [-v] index
+#
+#   build input     track files (.trk, tagdump track), data streams (run
+#                   through TagTrack) or other grid indexes.  Any mix,
+#                   each track/stream is a tag, an index brings its tags.
+#   -o OUTPUT       grid index to write
+#   --cell DEG      cell size in degrees (default 0.01, about 1 km)
+#   query index     grid index to search
+#   --bbox          lat/lon box, degrees.  lon0 > lon1 wraps the
+#                   antimeridian.
+#   --from, --to    systime range (unix secs or YYYY/MM/DD-HH:MM:SS)
+#
+# The world is cut into cells of --cell degrees, key = row * ncols + col
+# (row from lat + 90, col from lon + 180).  Fixes are bucketed by cell,
+# buckets sorted by key.  On disk (little endian):
+#
+#   header      '<4sHdIII'  'TGRD', version, cell, tags, cells, fixes
+#   tags        per tag, '<H' name length then the name
+#   directory   key (d), first (I), count (I), t_min (d), t_max (d),
+#               one array each, cells long
+#   fixes       GRID_COLS, each a column fixes long, in bucket order
+#
+# Keys run to about 64800 / cell**2, past 32 bits for cells under 0.004
+# degrees, so they are kept as doubles (exact to 2**53).  --cell is held
+# to MIN_CELL (about 1 m) and up.
+#
+# A query loads the directory (small), works out the keys the box
+# covers, row by row, and bisects for them.  Buckets whose time span
+# misses the window are passed over without reading.  Each hit bucket
+# costs a seek and a read per column, rows outside the exact box or
+# window are then dropped.  Index files from different tags (or
+# deployments) merge by building from them, the tag tables are joined.
+
+import os
+import sys
+import math
+import struct
+from   array        import array
+from   bisect       import bisect_left
+from   bisect       import bisect_right
+from   collections  import OrderedDict
+
+from   tagtrack     import TRACK_MAGIC
+from   tagtrack     import read_track
+
+__version__ = '0.0.3 (tg)'
+
+GRID_MAGIC      = 'TGRD'
+GRID_VERSION    = 2
+DEFAULT_CELL    = 0.01                  # degrees
+MIN_CELL        = 1e-5                  # keys stay exact in a double
+
+GRID_COLS       = [ ('tag',     'H'),
+                    ('recnum',  'I'),
+                    ('systime', 'd'),
+                    ('lat',     'd'),
+                    ('lon',     'd') ]
+
+DIR_COLS        = [ ('key',     'd'),
+                    ('first',   'I'),
+                    ('count',   'I'),
+                    ('t_min',   'd'),
+                    ('t_max',   'd') ]
+
+grid_hdr_struct = struct.Struct('<4sHdIII')
+name_len_struct = struct.Struct('<H')
+
+
+def cell_arg(x):
+    '''--cell, degrees, MIN_CELL .. 180'''
+    import argparse
+    cell = float(x)
+    if not MIN_CELL <= cell <= 180.0:
+        raise argparse.ArgumentTypeError(
+            'cell {} out of range, {} .. 180 degrees'.format(x, MIN_CELL))
+    return cell
+
+
+def _fromfile(fd, code, n):
+    col = array(code)
+    col.fromfile(fd, n)
+    if sys.byteorder != 'little':
+        col.byteswap()
+    return col
+
+
+def _tofile(fd, col):
+    if sys.byteorder != 'little':
+        col = array(col.typecode, col)
+        col.byteswap()
+    col.tofile(fd)
+
+
+class GridBuilder(object):
+    '''
+    collect fixes from tracks, streams and indexes, write a grid index.
+    '''
+    def __init__(self, cell = DEFAULT_CELL):
+        super(GridBuilder, self).__init__()
+        self.cell  = cell
+        self.ncols = int(math.ceil(360.0 / cell))
+        self.nrows = int(math.ceil(180.0 / cell))
+        self.tags  = []
+        self.cols  = OrderedDict([ (name, array(code))
+                                   for name, code in GRID_COLS ])
+
+    def add_fixes(self, name, recnum, systime, lat, lon):
+        '''one tag's fixes, same length sequences'''
+        tag = len(self.tags)
+        self.tags.append(name)
+        c = self.cols
+        c['tag'].extend([ tag ] * len(recnum))
+        c['recnum'].extend(recnum)
+        c['systime'].extend(systime)
+        c['lat'].extend(lat)
+        c['lon'].extend(lon)
+
+    def add_index(self, grid):
+        '''every tag and fix of an open GridIndex'''
+        base = len(self.tags)
+        self.tags.extend(grid.tags)
+        rows = grid.read_rows(0, grid.nfixes)
+        c = self.cols
+        c['tag'].extend([ t + base for t in rows['tag'] ])
+        for name in ('recnum', 'systime', 'lat', 'lon'):
+            c[name].extend(rows[name])
+
+    def add_path(self, path):
+        '''a .trk, a grid index or a data stream, by its magic'''
+        with open(path, 'rb') as fd:
+            magic = fd.read(4)
+        name = os.path.basename(path)
+        if magic == TRACK_MAGIC:
+            t = read_track(path)
+            self.add_fixes(name, t['recnum'], t['systime'], t['lat'], t['lon'])
+        elif magic == GRID_MAGIC:
+            grid = GridIndex(path)
+            try:
+                self.add_index(grid)
+            finally:
+                grid.close()
+        else:
+            trk = stream_track(path)
+            c = trk.cols
+            self.add_fixes(name, c['recnum'], c['systime'], c['lat'], c['lon'])
+
+    def key(self, lat, lon):
+        row = min(max(int((lat + 90.0) / self.cell), 0), self.nrows - 1)
+        col = min(max(int((lon + 180.0) / self.cell), 0), self.ncols - 1)
+        return row * self.ncols + col
+
+    def write(self, path):
+        c    = self.cols
+        n    = len(c['tag'])
+        key  = self.key
+        lats, lons = c['lat'], c['lon']
+        keys  = [ key(lats[i], lons[i]) for i in range(n) ]
+        order = sorted(range(n), key = keys.__getitem__)
+        times = c['systime']
+        d = OrderedDict([ (name, array(code)) for name, code in DIR_COLS ])
+        last = None
+        for pos, i in enumerate(order):
+            k, t = keys[i], times[i]
+            if k != last:
+                d['key'].append(k)
+                d['first'].append(pos)
+                d['count'].append(0)
+                d['t_min'].append(t)
+                d['t_max'].append(t)
+                last = k
+            d['count'][-1] += 1
+            if t < d['t_min'][-1]:
+                d['t_min'][-1] = t
+            if t > d['t_max'][-1]:
+                d['t_max'][-1] = t
+        with open(path, 'wb') as fd:
+            fd.write(grid_hdr_struct.pack(GRID_MAGIC, GRID_VERSION,
+                self.cell, len(self.tags), len(d['key']), n))
+            for name in self.tags:
+                fd.write(name_len_struct.pack(len(name)))
+                fd.write(name)
+            for col in d.values():
+                _tofile(fd, col)
+            for name, code in GRID_COLS:
+                _tofile(fd, array(code, [ c[name][i] for i in order ]))
+        return n, len(d['key'])
+
+
+class GridIndex(object):
+    '''an open grid index file, directory in memory, fixes on disk'''
+    def __init__(self, path):
+        super(GridIndex, self).__init__()
+        self.path = path
+        self.fd   = open(path, 'rb')
+        magic, version, self.cell, ntags, ncells, self.nfixes = \
+            grid_hdr_struct.unpack(self.fd.read(grid_hdr_struct.size))
+        if magic != GRID_MAGIC or version != GRID_VERSION:
+            raise ValueError('{}: not a grid index'.format(path))
+        self.ncols = int(math.ceil(360.0 / self.cell))
+        self.nrows = int(math.ceil(180.0 / self.cell))
+        self.tags = []
+        for i in range(ntags):
+            nlen = name_len_struct.unpack(self.fd.read(name_len_struct.size))[0]
+            self.tags.append(self.fd.read(nlen))
+        self.dir = OrderedDict([ (name, _fromfile(self.fd, code, ncells))
+                                 for name, code in DIR_COLS ])
+        self.col_base = {}
+        base = self.fd.tell()
+        for name, code in GRID_COLS:
+            self.col_base[name] = base
+            base += array(code).itemsize * self.nfixes
+        self.buckets_read = 0
+
+    def close(self):
+        self.fd.close()
+
+    def read_rows(self, first, count):
+        '''count fixes from first, dict of columns'''
+        rows = {}
+        for name, code in GRID_COLS:
+            col = array(code)
+            self.fd.seek(self.col_base[name] + first * col.itemsize)
+            col.fromfile(self.fd, count)
+            if sys.byteorder != 'little':
+                col.byteswap()
+            rows[name] = col
+        return rows
+
+    def _col_ranges(self, lon0, lon1):
+        c0 = int((lon0 + 180.0) / self.cell)
+        c1 = int((lon1 + 180.0) / self.cell)
+        clamp = lambda c: min(max(c, 0), self.ncols - 1)
+        if lon0 <= lon1:
+            return [ (clamp(c0), clamp(c1)) ]
+        if clamp(c1) >= clamp(c0):      # wraps back into c0, every column
+            return [ (0, self.ncols - 1) ]
+        return [ (clamp(c0), self.ncols - 1), (0, clamp(c1)) ]
+
+    def query(self, lat0, lon0, lat1, lon1, t0 = None, t1 = None):
+        '''
+        fixes in the box (and t0..t1 if given) as a list of
+        (tag, recnum, systime, lat, lon), sorted by tag then time.
+        '''
+        if lat0 > lat1:
+            lat0, lat1 = lat1, lat0
+        t0 = -float('inf') if t0 is None else t0
+        t1 =  float('inf') if t1 is None else t1
+        r0 = min(max(int((lat0 + 90.0) / self.cell), 0), self.nrows - 1)
+        r1 = min(max(int((lat1 + 90.0) / self.cell), 0), self.nrows - 1)
+        d = self.dir
+        keys, tmin, tmax = d['key'], d['t_min'], d['t_max']
+        wrap = lon0 > lon1
+        out = []
+        for row in range(r0, r1 + 1):
+            for c0, c1 in self._col_ranges(lon0, lon1):
+                lo = bisect_left(keys,  row * self.ncols + c0)
+                hi = bisect_right(keys, row * self.ncols + c1)
+                for b in range(lo, hi):
+                    if tmax[b] < t0 or tmin[b] > t1:
+                        continue
+                    self.buckets_read += 1
+                    rows = self.read_rows(d['first'][b], d['count'][b])
+                    for tag, recnum, t, lat, lon in zip(rows['tag'],
+                            rows['recnum'], rows['systime'], rows['lat'],
+                            rows['lon']):
+                        if not (t0 <= t <= t1 and lat0 <= lat <= lat1):
+                            continue
+                        if wrap:
+                            if lon1 < lon < lon0:
+                                continue
+                        elif not (lon0 <= lon <= lon1):
+                            continue
+                        out.append((tag, recnum, t, lat, lon))
+        out.sort()
+        return out
+
+
+def stream_track(path):
+    '''fixes of a data stream, TagTrack over get_record'''
+    import tagdump  as     td
+    from   tagdump  import get_record
+    from   tagdump  import DBLK_DIR_SIZE
+    from   tagfile  import TagFile
+    from   tagtrack import TagTrack
+
+    td.init_globals()
+    infile = TagFile(open(path, 'rb'))
+    infile.seek(DBLK_DIR_SIZE)
+    trk = TagTrack()
+    while (True):
+        rec_offset, hdr, rec_buf = get_record(infile)
+        if (rec_offset < 0):
+            break
+        trk.add(rec_offset, rec_buf)
+    trk.finish()
+    return trk
+
+
+def grid(args):
+    '''tagdump grid build/query, see the top of this file'''
+    if args.cmd == 'build':
+        gb = GridBuilder(args.cell)
+        for path in args.input:
+            gb.add_path(path)
+        n, ncells = gb.write(args.output)
+        print('*** grid: {} tags, {} fixes, {} cells of {} deg -> {}'.format(
+            len(gb.tags), n, ncells, gb.cell, args.output))
+        return gb
+
+    g = GridIndex(args.index)
+    try:
+        lat0, lon0, lat1, lon1 = args.bbox
+        hits = g.query(lat0, lon0, lat1, lon1, args.t_from, args.t_to)
+        print('*** grid: {} fixes, {} of {} buckets read'.format(
+            len(hits), g.buckets_read, len(g.dir['key'])))
+        if args.verbose:
+            tags = {}
+            for h in hits:
+                tags[h[0]] = tags.get(h[0], 0) + 1
+            for tag in sorted(tags):
+                print('    {}: {} fixes'.format(g.tags[tag], tags[tag]))
+        if args.verbose >= 2:
+            for tag, recnum, t, lat, lon in hits:
+                print('    {} {:>8} {:.3f} {:.7f} {:.7f}'.format(
+                    g.tags[tag], recnum, t, lat, lon))
+    finally:
+        g.close()
+    return g
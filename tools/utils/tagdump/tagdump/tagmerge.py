@@ -0,0 +1,221 @@
+#!/usr/bin/env python2
+'''tagmerge - merge multiple captures of a tag data stream'''
+
+# Copyright (c) 2018 Daniel J. Maltbie, Eric B. Decker
+# All rights reserved.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# See COPYING in the top level directory of this source tree.
+#
+# Contact: Daniel J. Maltbie <dmaltbie@daloma.org>
+#          Eric B. Decker <cire831@gmail.com>
+
+####
+#
+# tagmerge: merge partial copies of the same tag's DBLK stream.
+#
+# usage: tagmerge [-h] [-V] [-v] -o OUTPUT [-p PROV] input [input ...]
+#
+#   input           one or more DBLK captures (tagfuse pull, SD read,
+#                   recovered image, ...).  Earlier inputs have priority
+#                   when the same recnum shows up with different contents.
+#
+#   -o OUTPUT       canonical merged data stream.  (args.output)
+#   -p PROV         provenance report, default <OUTPUT>.prov  (args.prov)
+#   -v              increase output verbosity  (args.verbose)
+#
+# Each input is walked with tagdump's get_record, so only records that
+# pass the length and recsum checks are ever considered.  Bad records
+# are resync'd over and counted per input.
+#
+# The inputs are streamed concurrently and merged k-way (heapq.merge)
+# on recnum.  Only one pending record per input is held in memory.  A
+# RecCoverage bitmap remembers which recnums have been written so
+# duplicates are dropped even if an input goes backwards.
+#
+# The output starts with the directory sector of the first input and
+# every record is laid down quad aligned.  Records are copied byte for
+# byte; prev_sync in SYNC/REBOOT records still refers to the offsets of
+# the stream they were captured from.
+
+import os
+import heapq
+
+import tagdump         as     td
+from   tagdump         import get_record
+from   tagdump         import DBLK_DIR_SIZE
+from   tagfile         import TagFile
+from   rec_coverage    import RecCoverage
+from   rec_coverage    import ranges_str
+from   tagmergeargs    import parseargs
+
+# import configuration, which will populate decode/emitter trees.
+# get_record needs dt_records for required lengths.
+import tagdump_config
+
+from   __init__        import __version__   as VERSION
+
+
+class MergeSource(object):
+    '''one input of a merge and its per input counters'''
+    def __init__(self, idx, infile):
+        super(MergeSource, self).__init__()
+        self.idx        = idx
+        self.name       = infile.name
+        self.tf         = TagFile(infile)
+        self.records    = 0             # valid records read
+        self.used       = 0             # records written to the output
+        self.dups       = 0             # same recnum and contents as output
+        self.conflicts  = 0             # same recnum, different contents
+        self.resyncs    = 0
+        self.chksum_errors = 0
+
+    def records_gen(self):
+        '''
+        generate (recnum, idx, offset, rlen, rec_buf) for each valid record
+
+        ordering of the tuple is what heapq.merge sorts on.  recnum first,
+        then input priority.
+        '''
+        self.tf.seek(DBLK_DIR_SIZE)
+        while (True):
+            resyncs   = td.num_resyncs
+            chk_errs  = td.chksum_errors
+            offset, hdr, rec_buf = get_record(self.tf)
+            self.resyncs       += td.num_resyncs   - resyncs
+            self.chksum_errors += td.chksum_errors - chk_errs
+            if (offset < 0):
+                return
+            self.records += 1
+            yield (hdr['recnum'].val, self.idx, offset,
+                   hdr['len'].val, rec_buf)
+
+
+class ProvRun(object):
+    '''a contiguous run of output records that came from one input'''
+    def __init__(self, src, recnum, in_off, out_off):
+        self.src     = src
+        self.lo      = recnum
+        self.hi      = recnum
+        self.in_off  = in_off
+        self.out_off = out_off
+
+    def extends(self, src, recnum):
+        return src is self.src and recnum == self.hi + 1
+
+    def __repr__(self):
+        return '{:>10} {:>10}  @{:<10} <- [{}] @{}'.format(
+            self.lo, self.hi, self.out_off, self.src.idx, self.in_off)
+
+
+def merge(args):
+    '''
+    k-way merge of args.input into args.output, provenance to args.prov
+    '''
+    verbose = args.verbose if (args.verbose) else 0
+
+    td.init_globals()
+    td.verbose = verbose
+
+    sources = [ MergeSource(idx, f) for idx, f in enumerate(args.input) ]
+
+    prov = args.prov
+    if prov is None:
+        prov = open(args.output.name + '.prov', 'w')
+
+    out = args.output
+    sources[0].tf.seek(0)
+    dir_sector = bytearray(sources[0].tf.read(DBLK_DIR_SIZE))
+    dir_sector.extend(bytearray(DBLK_DIR_SIZE - len(dir_sector)))
+    out.write(dir_sector)
+    out_off = DBLK_DIR_SIZE
+
+    prov.write('# tagmerge {}\n'.format(VERSION))
+    for src in sources:
+        prov.write('# [{}] {}\n'.format(src.idx, src.name))
+    prov.write('#\n#    rec_lo     rec_hi  out         <- [input] in\n')
+
+    cov      = RecCoverage()
+    run      = None
+    last_num = -1                       # last recnum written
+    last_buf = None                     # and its contents
+    pad      = bytearray(4)
+
+    try:
+        for recnum, idx, offset, rlen, rec_buf in \
+                heapq.merge(*[ s.records_gen() for s in sources ]):
+            src = sources[idx]
+            if cov.seen(recnum):
+                # already written, see if it agrees with what we have
+                if recnum == last_num and rec_buf[:rlen] != last_buf:
+                    src.conflicts += 1
+                    if (verbose >= 1):
+                        print('*** conflict: rec {}, [{}] @{} differs from output'.format(
+                            recnum, idx, offset))
+                else:
+                    src.dups += 1
+                continue
+
+            cov.add(recnum, out_off)
+            last_num = recnum
+            last_buf = rec_buf[:rlen]
+            out.write(last_buf)
+            src.used += 1
+
+            if run is None or not run.extends(src, recnum):
+                if run:
+                    prov.write('{}\n'.format(run))
+                run = ProvRun(src, recnum, offset, out_off)
+            else:
+                run.hi = recnum
+
+            out_off += rlen
+            if (out_off & 3):
+                out.write(pad[:4 - (out_off & 3)])
+                out_off = (out_off + 3) & ~3
+    except KeyboardInterrupt:
+        print
+        print('*** user stop')
+
+    if run:
+        prov.write('{}\n'.format(run))
+
+    missing = cov.missing()
+    prov.write('#\n# output: {} records, {} bytes, recnums {} .. {}\n'.format(
+        cov.unique, out_off, cov.lo, cov.hi))
+    prov.write('# missing: {} {}\n'.format(cov.num_missing(missing),
+                                           ranges_str(missing)))
+    for src in sources:
+        prov.write('# [{}] read: {}  used: {}  dups: {}  conflicts: {}'
+                   '  resyncs: {}  chksum_errs: {}\n'.format(
+                       src.idx, src.records, src.used, src.dups,
+                       src.conflicts, src.resyncs, src.chksum_errors))
+    if prov is not args.prov:
+        prov.close()
+
+    print
+    print('*** merged {} inputs -> {}, {} records, {} bytes'.format(
+        len(sources), out.name, cov.unique, out_off))
+    for src in sources:
+        print('    [{}] {}: read: {}  used: {}  dups: {}  conflicts: {}'.format(
+            src.idx, src.name, src.records, src.used, src.dups, src.conflicts))
+    cov.display()
+    return cov
+
+
+def main():
+    merge(parseargs())
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+'''argparse definitions for tagmerge options'''
+
+# Copyright (c) 2018 Daniel J. Maltbie, Eric B. Decker
+# All rights reserved.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# See COPYING in the top level directory of this source tree.
+#
+# Contact: Daniel J. Maltbie <dmaltbie@daloma.org>
+#          Eric B. Decker <cire831@gmail.com>
+
+from   __init__ import __version__ as VERSION
+from   dt_defs  import DT_H_REVISION as DT_REV
+import argparse
+
+def parseargs():
+    parser = argparse.ArgumentParser(
+        description='Merge multiple captures of a Tag Data Stream by recnum.')
+
+    parser.add_argument('input',
+                        type=argparse.FileType('rb'),
+                        nargs='+',
+                        help='input files, earlier inputs win on conflicts')
+
+    parser.add_argument('-V', '--version',
+                        action='version',
+                        version='%(prog)s ' + VERSION + ':  dt_rev ' + str(DT_REV))
+
+    parser.add_argument('-o', '--output',
+                        type=argparse.FileType('wb'),
+                        required=True,
+                        help='merged output data stream')
+
+    parser.add_argument('-p', '--prov',
+                        type=argparse.FileType('w'),
+                        help='provenance report (default <output>.prov)')
+
+    parser.add_argument('-v', '--verbose',
+                        action='count',
+                        default=0,
+                        help='increase output verbosity')
+
+    return parser.parse_args()
+
+if __name__ == '__main__':
+    print(parseargs())
@@ -0,0 +1,293 @@
+'''tagdump sensor - SENSOR_DATA/SENSOR_SET samples as time series'''
+
+# Copyright (c) 2018 Eric B. Decker, Daniel J. Maltbie
+# All rights reserved.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# See COPYING in the top level directory of this source tree.
+#
+# Contact: Eric B. Decker <cire831@gmail.com>
+#          Daniel J. Maltbie <dmaltbie@daloma.org>
+
+####
+#
+# tagdump sensor: sensor samples out of SENSOR_DATA and SENSOR_SET.
+#
+# usage: tagdump sensor [-h] [-o OUTPUT] [--csv] [-v] input
+#
+#   input           tag data stream
+#   -o OUTPUT       sensor file (args.output), default <input>.sns
+#   --csv           write text (csv) instead of the binary sensor file
+#
+# The stream is walked with get_record.  Each sample is unpacked straight
+# out of the record buffer with the precompiled payload struct for its
+# sns_id (core_headers sns_structs) and appended to that sensor's columns
+# (array), so memory is the samples themselves:
+#
+#   recnum      record number
+#   systime     record rtctime as unix seconds (sub_sec is 1/32768)
+#   sched_delta sched_delta of the record
+#   <datums>    one 'H' column per datum (sns_table), raw counts
+#
+# A SENSOR_SET adds one sample to each sensor in its mask, all with the
+# set's recnum, systime and sched_delta.  Unknown sns_ids and records too
+# short for their payload are counted, not kept.
+#
+# csv is one row per sched_delta: consecutive samples (stream order) with
+# the same sched_delta share a row, columns <SENSOR>.<datum> for every
+# sensor seen, empty where a sensor has no sample in the row.
+#
+# Sensor file (.sns), little endian:
+#
+#   header      '<4sHH'  'TSNS', version (1), number of sensors
+#   per sensor  '<HI'    sns_id, number of samples n, then the columns
+#               (SNS_COLS, then the datums) each n values
+#
+# read_sensors(path) gives the columns back, OrderedDict sns_id ->
+# OrderedDict name -> array.
+
+import sys
+import struct
+import calendar
+from   array        import array
+from   collections  import OrderedDict
+
+import tagdump      as     td
+from   tagdump      import get_record
+from   tagdump      import DBLK_DIR_SIZE
+from   tagfile      import TagFile
+
+from   dt_defs      import DT_SENSOR_DATA
+from   dt_defs      import DT_SENSOR_SET
+from   dt_defs      import dt_hdr_struct
+from   core_headers import sns_table
+from   core_headers import sns_structs
+from   core_headers import sns_name
+from   core_headers import SNS_PAYLOAD_OFFSET
+
+__version__ = '0.0.1 (ts)'
+
+JIFFIES         = 32768                 # rtctime sub_sec
+
+SENSOR_MAGIC    = 'TSNS'
+SENSOR_VERSION  = 1
+SNS_COLS        = [ ('recnum',      'I'),
+                    ('systime',     'd'),
+                    ('sched_delta', 'I') ]
+
+sensor_hdr_struct = struct.Struct('<4sHH')
+sensor_sns_struct = struct.Struct('<HI')
+
+# sched_delta and sns_id/mask, right after the dt header
+sns_fields_struct = struct.Struct('<IH')
+SNS_FIELDS_OFFSET = dt_hdr_struct.size
+
+# SENSOR_SET mask bits we know the payload of
+SNS_MASK = sum([ 1 << sns_id for sns_id in sns_structs ])
+
+
+def sensor_cols(sns_id):
+    '''empty columns for sns_id, OrderedDict name -> array'''
+    cols = OrderedDict([ (name, array(code)) for name, code in SNS_COLS ])
+    for datum in sns_table[sns_id][1]:
+        cols[datum] = array('H')
+    return cols
+
+
+class TagSensor(object):
+    '''
+    collect sensor samples from a data stream, columns per sns_id.
+
+    appenders[sns_id] is the precompiled unpack for the sensor's payload
+    and the bound appends of its columns, built the first time the sensor
+    shows up.
+    '''
+    def __init__(self):
+        super(TagSensor, self).__init__()
+        self.sensors   = OrderedDict()  # sns_id -> columns
+        self.appenders = {}
+        self.seq       = array('I')     # sample order, sns_id per sample
+        self.n         = 0
+        self.sets      = 0              # SENSOR_SET records
+        self.unknown   = 0              # records with an unknown sns_id
+        self.short     = 0              # records short of their payload
+
+    def _appender(self, sns_id):
+        cols = self.sensors.get(sns_id)
+        if cols is None:
+            cols = sensor_cols(sns_id)
+            self.sensors[sns_id] = cols
+        app = (sns_structs[sns_id].unpack_from, sns_structs[sns_id].size,
+               [ col.append for col in cols.values() ])
+        self.appenders[sns_id] = app
+        return app
+
+    def _sample(self, sns_id, rec_buf, idx, recnum, systime, sched):
+        app = self.appenders.get(sns_id)
+        if app is None:
+            app = self._appender(sns_id)
+        unpack, size, appends = app
+        vals = unpack(rec_buf, idx)
+        appends[0](recnum)
+        appends[1](systime)
+        appends[2](sched)
+        for i, v in enumerate(vals, 3):
+            appends[i](v)
+        self.seq.append(sns_id)
+        self.n += 1
+        return size
+
+    def add(self, offset, rec_buf):
+        '''look at one record, keep its samples if it is sensor data'''
+        rlen, rtype, recnum, sub_sec, sec, mn, hr, dow, day, mon, year, \
+            recsum = dt_hdr_struct.unpack_from(rec_buf)
+        if rtype != DT_SENSOR_DATA and rtype != DT_SENSOR_SET:
+            return
+        if rlen < SNS_PAYLOAD_OFFSET:
+            self.short += 1
+            return
+        try:
+            systime = calendar.timegm((year, mon, day, hr, mn, sec)) \
+                      + sub_sec / float(JIFFIES)
+        except (ValueError, OverflowError):
+            systime = 0.0
+        sched, sid = sns_fields_struct.unpack_from(rec_buf, SNS_FIELDS_OFFSET)
+
+        if rtype == DT_SENSOR_DATA:
+            if sid not in sns_structs:
+                self.unknown += 1
+                return
+            if rlen < SNS_PAYLOAD_OFFSET + sns_structs[sid].size:
+                self.short += 1
+                return
+            self._sample(sid, rec_buf, SNS_PAYLOAD_OFFSET, recnum,
+                         systime, sched)
+            return
+
+        self.sets += 1
+        mask = sid
+        if mask & ~SNS_MASK:
+            self.unknown += 1           # unknown payload size, can't split
+            return
+        idx = SNS_PAYLOAD_OFFSET
+        for sns_id in sorted(sns_structs):
+            if not (mask & (1 << sns_id)):
+                continue
+            if idx + sns_structs[sns_id].size > rlen:
+                self.short += 1
+                return
+            idx += self._sample(sns_id, rec_buf, idx, recnum, systime, sched)
+
+    def write(self, fd):
+        '''binary sensor file, header then each sensor's columns'''
+        fd.write(sensor_hdr_struct.pack(SENSOR_MAGIC, SENSOR_VERSION,
+                                        len(self.sensors)))
+        for sns_id, cols in self.sensors.items():
+            fd.write(sensor_sns_struct.pack(sns_id, len(cols['recnum'])))
+            for col in cols.values():
+                if sys.byteorder != 'little':
+                    col = array(col.typecode, col)
+                    col.byteswap()
+                col.tofile(fd)
+
+    def rows(self):
+        '''
+        time series aligned on sched_delta, see the top of this file.
+
+        generates (recnum, systime, sched_delta, {sns_id: values}).
+        '''
+        pos  = dict([ (sns_id, 0) for sns_id in self.sensors ])
+        row  = None
+        for sns_id in self.seq:
+            cols = self.sensors[sns_id]
+            i = pos[sns_id]
+            pos[sns_id] = i + 1
+            sched = cols['sched_delta'][i]
+            vals  = [ col[i] for col in cols.values()[len(SNS_COLS):] ]
+            if row is None or row[2] != sched or sns_id in row[3]:
+                if row is not None:
+                    yield row
+                row = (cols['recnum'][i], cols['systime'][i], sched, {})
+            row[3][sns_id] = vals
+        if row is not None:
+            yield row
+
+    def write_csv(self, fd):
+        names = [ name for name, code in SNS_COLS ]
+        for sns_id in self.sensors:
+            names.extend([ '{}.{}'.format(sns_name(sns_id), datum)
+                           for datum in sns_table[sns_id][1] ])
+        fd.write(','.join(names) + '\n')
+        for recnum, systime, sched, samples in self.rows():
+            line = [ str(recnum), '{:.3f}'.format(systime), str(sched) ]
+            for sns_id in self.sensors:
+                vals = samples.get(sns_id)
+                if vals is None:
+                    line.extend([ '' ] * len(sns_table[sns_id][1]))
+                else:
+                    line.extend([ str(v) for v in vals ])
+            fd.write(','.join(line) + '\n')
+
+
+def read_sensors(path):
+    '''columns of a sensor file, OrderedDict sns_id -> columns'''
+    with open(path, 'rb') as fd:
+        magic, version, count = sensor_hdr_struct.unpack(
+            fd.read(sensor_hdr_struct.size))
+        if magic != SENSOR_MAGIC or version != SENSOR_VERSION:
+            raise ValueError('{}: not a sensor file'.format(path))
+        sensors = OrderedDict()
+        for i in range(count):
+            sns_id, n = sensor_sns_struct.unpack(
+                fd.read(sensor_sns_struct.size))
+            cols = sensor_cols(sns_id)
+            for col in cols.values():
+                col.fromfile(fd, n)
+                if sys.byteorder != 'little':
+                    col.byteswap()
+            sensors[sns_id] = cols
+    return sensors
+
+
+def sensor(args):
+    '''tagdump sensor, see the top of this file'''
+    td.init_globals()
+    infile = TagFile(args.input)
+    infile.seek(DBLK_DIR_SIZE)
+    sns = TagSensor()
+    while (True):
+        rec_offset, hdr, rec_buf = get_record(infile)
+        if (rec_offset < 0):
+            break
+        sns.add(rec_offset, rec_buf)
+
+    output = args.output or args.input.name + ('.csv' if args.csv else '.sns')
+    with open(output, 'w' if args.csv else 'wb') as fd:
+        if args.csv:
+            sns.write_csv(fd)
+        else:
+            sns.write(fd)
+    print('*** sensor: {} samples, {} sensors ({} sets, {} unknown, '
+          '{} short) -> {}'.format(sns.n, len(sns.sensors), sns.sets,
+                                   sns.unknown, sns.short, output))
+    if args.verbose:
+        for sns_id, cols in sns.sensors.items():
+            print('    {:<6s} {:7d}  sched_delta {} .. {}'.format(
+                sns_name(sns_id), len(cols['recnum']),
+                min(cols['sched_delta']), max(cols['sched_delta']))),
+            for datum in sns_table[sns_id][1]:
+                print(' {} {}..{}'.format(datum, min(cols[datum]),
+                                          max(cols[datum]))),
+            print
+    return sns
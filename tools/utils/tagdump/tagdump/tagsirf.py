@@ -0,0 +1,134 @@
+'''tagdump sirf - pull the SiRF packets out of a tag data stream'''
+
+# Copyright (c) 2018 Eric B. Decker, Daniel J. Maltbie
+# All rights reserved.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# See COPYING in the top level directory of this source tree.
+#
+# Contact: Eric B. Decker <cire831@gmail.com>
+#          Daniel J. Maltbie <dmaltbie@daloma.org>
+
+####
+#
+# tagdump sirf: GPS_RAW_SIRFBIN records to a plain sirfbin stream.
+#
+# usage: tagdump sirf [-h] [-o OUTPUT] [--dir {rx,tx,all}] [--mids MIDS]
+#                     [-v] input
+#
+#   input           tag data stream
+#   -o OUTPUT       sirfbin output (args.output), default <input>.sirf
+#   --dir           rx (from the chip), tx (to the chip) or all (default)
+#   --mids MIDS     only these mids, comma separated (args.mids)
+#
+# The stream is walked with get_record.  For every GPS_RAW_SIRFBIN record
+# that passes the filters, the packet bytes (everything after the
+# dt_gps_t header, SOP through EOP) are written back to back to OUTPUT.
+# The result is what the chip put on the wire, it goes straight to
+# sirfdump or any other SiRF tool without touching the DBLK again.
+#
+# The sidecar, OUTPUT.idx, has a line per packet tying it back to the
+# data stream:
+#
+#   # sirf_offset dblk_offset recnum dir mid len
+#
+# sirfdump -j <sirf_offset> jumps to a packet, tagdump -j <dblk_offset>
+# to the record that carried it.
+
+import sys
+
+import tagdump      as     td
+from   tagdump      import get_record
+from   tagdump      import DBLK_DIR_SIZE
+from   tagfile      import TagFile
+
+from   dt_defs      import DT_GPS_RAW_SIRFBIN
+from   dt_defs      import dt_hdr_struct
+from   sirf_defs    import SIRF_SOP_SEQ
+from   sirf_defs    import sirf_hdr_struct
+from   tagstats     import GPS_RAW_SIRF_OFFSET
+from   tagstats     import GPS_RAW_MID_OFFSET
+from   tagstats     import GPS_RAW_MIN_LEN
+
+__version__ = '0.0.1 (tx)'
+
+GPS_RAW_DIR_OFFSET = GPS_RAW_SIRF_OFFSET - 3    # dir, pad (2), then sirf
+
+DIRS = { 'rx': (0,), 'tx': (1,), 'all': (0, 1) }
+
+sidecar_title = '# sirf_offset dblk_offset recnum dir mid len\n'
+sidecar_fmt   = '{} {} {} {} {} {}\n'
+
+
+class SirfExtract(object):
+    '''
+    copy the sirf packets of GPS_RAW_SIRFBIN records to out, index to idx.
+    '''
+    def __init__(self, out, idx, dirs = DIRS['all'], mids = None):
+        super(SirfExtract, self).__init__()
+        self.out     = out
+        self.idx     = idx
+        self.dirs    = dirs
+        self.mids    = mids             # None or set of mids
+        self.offset  = 0                # next sirf_offset
+        self.packets = 0
+        self.records = 0                # GPS_RAW_SIRFBIN seen
+        self.no_sop  = 0
+        idx.write(sidecar_title)
+
+    def add(self, dblk_offset, rec_buf):
+        rlen, rtype, recnum = dt_hdr_struct.unpack_from(rec_buf)[:3]
+        if rtype != DT_GPS_RAW_SIRFBIN:
+            return
+        self.records += 1
+        if rlen < GPS_RAW_MIN_LEN:
+            return
+        gdir = rec_buf[GPS_RAW_DIR_OFFSET]
+        if gdir not in self.dirs:
+            return
+        sop = sirf_hdr_struct.unpack_from(rec_buf, GPS_RAW_SIRF_OFFSET)[0]
+        if sop != SIRF_SOP_SEQ:
+            self.no_sop += 1
+            return
+        mid = rec_buf[GPS_RAW_MID_OFFSET]
+        if self.mids is not None and mid not in self.mids:
+            return
+        plen = rlen - GPS_RAW_SIRF_OFFSET
+        self.out.write(rec_buf[GPS_RAW_SIRF_OFFSET:rlen])
+        self.idx.write(sidecar_fmt.format(self.offset, dblk_offset, recnum,
+                                          gdir, mid, plen))
+        self.offset  += plen
+        self.packets += 1
+
+
+def extract(args):
+    '''tagdump sirf, see the top of this file'''
+    td.init_globals()
+    infile = TagFile(args.input)
+    infile.seek(DBLK_DIR_SIZE)
+    output = args.output or args.input.name + '.sirf'
+    mids   = set(args.mids) if args.mids else None
+    with open(output, 'wb') as out, open(output + '.idx', 'w') as idx:
+        ext = SirfExtract(out, idx, DIRS[args.dir], mids)
+        while (True):
+            rec_offset, hdr, rec_buf = get_record(infile)
+            if (rec_offset < 0):
+                break
+            ext.add(rec_offset, rec_buf)
+    print('*** sirf: {} packets, {} bytes -> {} (+.idx)'.format(
+        ext.packets, ext.offset, output))
+    if args.verbose:
+        print('    GPS_RAW_SIRFBIN records: {}, no SOP: {}'.format(
+            ext.records, ext.no_sop))
+    return ext
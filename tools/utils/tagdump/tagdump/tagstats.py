@@ -0,0 +1,158 @@
+'''statistics only pass over a tag data stream'''
+
+# Copyright (c) 2018 Eric B. Decker, Daniel J. Maltbie
+# All rights reserved.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# See COPYING in the top level directory of this source tree.
+#
+# Contact: Eric B. Decker <cire831@gmail.com>
+#          Daniel J. Maltbie <dmaltbie@daloma.org>
+
+# Statistics (--stats) support.
+#
+# TagStats accumulates counters from record headers only.  No decoders
+# or emitters are run and no per record output is generated.  Headers
+# are pulled apart using the flat dt_hdr_struct rather than the
+# dt_hdr_obj tree.
+#
+# get_record has already validated length and recsum for every record
+# handed to add().
+
+from   dt_defs      import *
+from   dt_defs      import dt_hdr_struct
+from   dt_defs      import dt_name
+from   dt_defs      import rtctime_str
+
+from   sirf_defs    import SIRF_SOP_SEQ
+from   sirf_defs    import sirf_hdr_struct
+from   core_headers import dt_gps_hdr_obj
+from   rec_coverage import RecCoverage
+
+__version__ = '0.0.1 (ts)'
+
+# where the sirf header lives in a DT_GPS_RAW_SIRFBIN record
+GPS_RAW_SIRF_OFFSET = len(dt_gps_hdr_obj)
+GPS_RAW_MID_OFFSET  = GPS_RAW_SIRF_OFFSET + sirf_hdr_struct.size
+GPS_RAW_MIN_LEN     = GPS_RAW_MID_OFFSET + 1
+
+
+class TagStats(object):
+    '''
+    accumulate per rtype counts, byte totals, recnum gaps, reboots,
+    MID histograms and time span for a data stream.
+
+    resync locations and checksum errors are tracked by get_record/resync
+    and are handed in when displaying.
+    '''
+    def __init__(self):
+        super(TagStats, self).__init__()
+        self.rtype_count = {}
+        self.rtype_bytes = {}
+        self.mid_count   = {}
+        self.records     = 0
+        self.bytes       = 0
+        self.gaps        = 0            # number of gaps seen
+        self.missing     = 0            # records lost to gaps
+        self.backwards   = 0            # recnum went backwards
+        self.first_rec   = 0
+        self.last_rec    = 0
+        self.first_off   = -1
+        self.last_off    = -1
+        self.first_rt    = None         # earliest rtctime seen (tuple)
+        self.last_rt     = None         # latest rtctime seen (tuple)
+        self.cov         = RecCoverage()
+
+    def add(self, offset, rec_buf):
+        '''
+        add one record to the stats.
+
+        input:  offset      file offset of the record
+                rec_buf     record buffer (validated by get_record)
+        '''
+        rlen, rtype, recnum, sub_sec, sec, mn, hr, dow, day, mon, year, \
+            recsum = dt_hdr_struct.unpack_from(rec_buf)
+
+        self.records += 1
+        self.bytes   += rlen
+        try:
+            self.rtype_count[rtype] += 1
+            self.rtype_bytes[rtype] += rlen
+        except KeyError:
+            self.rtype_count[rtype]  = 1
+            self.rtype_bytes[rtype]  = rlen
+
+        last = self.last_rec
+        if last:
+            if recnum < last:
+                self.backwards += 1
+            elif recnum > last + 1:
+                self.gaps    += 1
+                self.missing += recnum - last - 1
+        else:
+            self.first_rec = recnum
+            self.first_off = offset
+        self.last_rec = recnum
+        self.last_off = offset
+        self.cov.add(recnum, offset)
+
+        if year:                        # year 0, rtc not set yet
+            rt = (year, mon, day, hr, mn, sec, sub_sec)
+            if self.first_rt is None or rt < self.first_rt:
+                self.first_rt = rt
+            if self.last_rt is None or rt > self.last_rt:
+                self.last_rt = rt
+
+        if rtype == DT_GPS_RAW_SIRFBIN and rlen >= GPS_RAW_MIN_LEN:
+            sop, plen = sirf_hdr_struct.unpack_from(rec_buf,
+                                                    GPS_RAW_SIRF_OFFSET)
+            if sop == SIRF_SOP_SEQ:
+                mid = rec_buf[GPS_RAW_MID_OFFSET]
+                try:
+                    self.mid_count[mid] += 1
+                except KeyError:
+                    self.mid_count[mid]  = 1
+
+    def display(self, resyncs, chksum_errors):
+        '''
+        print a compact summary of the stats.
+
+        input:  resyncs         list of offsets where resyncs started
+                chksum_errors   number of checksum failures seen
+        '''
+        print('*** stats: records: {}  bytes: {}  @{} (0x{:x}) .. @{} (0x{:x})'.format(
+            self.records, self.bytes, self.first_off, self.first_off,
+            self.last_off, self.last_off))
+        print('    recnums: {} .. {}  gaps: {}  missing: {}  backwards: {}'.format(
+            self.first_rec, self.last_rec, self.gaps, self.missing,
+            self.backwards))
+        print('    reboots: {}  resyncs: {}  chksum_errs: {}'.format(
+            self.rtype_count.get(DT_REBOOT, 0), len(resyncs), chksum_errors))
+        if self.first_rt:
+            print('    span: {} .. {}'.format(rtctime_str(*self.first_rt[:6]),
+                                              rtctime_str(*self.last_rt[:6])))
+        else:
+            print('    span: (no rtctime set)')
+        self.cov.display()
+        if resyncs:
+            print('    resync @: {}'.format(
+                ' '.join(['0x{:x}'.format(x) for x in resyncs])))
+        print
+        print('    rtype                count      bytes')
+        for rtype in sorted(self.rtype_count.keys()):
+            print('    {:2} {:14s} {:8} {:10}'.format(rtype, dt_name(rtype),
+                self.rtype_count[rtype], self.rtype_bytes[rtype]))
+        if self.mid_count:
+            print
+            print('mids:   {}'.format(self.mid_count))
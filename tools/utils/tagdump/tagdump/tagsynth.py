@@ -0,0 +1,451 @@
+#!/usr/bin/env python2
+'''tagsynth - generate synthetic tag data streams'''
+
+# Copyright (c) 2018 Eric B. Decker, Daniel J. Maltbie
+# All rights reserved.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# See COPYING in the top level directory of this source tree.
+#
+# Contact: Eric B. Decker <cire831@gmail.com>
+#          Daniel J. Maltbie <dmaltbie@daloma.org>
+
+####
+#
+# tagsynth: write a synthetic DBLK data stream.
+#
+# usage: tagsynth [-h] [-V] [-v] [-s SIZE] [--seed SEED] [--mix MIX]
+#                 [--flips N] [--zeros N] [--truncs N]
+#                 output
+#
+#   output          file to write.  (args.output)
+#   -s SIZE         approximate size of the stream in bytes, k/m/g
+#                   suffixes allowed.  (args.size)
+#   --seed SEED     random seed, same seed same stream.  (args.seed)
+#   --mix MIX       rtype weights, NAME=weight,...  (args.mix)
+#                   names: REBOOT, EVENT, GPS_RAW, SENSOR.  see DEFAULT_MIX.
+#                   GPS_RAW.<mid>=weight sets the sirf mid mix.
+#
+#   corruption, counts per MB of output:
+#   --flips N       single bit flips
+#   --zeros N       zeroed sectors
+#   --truncs N      truncated records (record cut short, stream continues
+#                   at the next quad alignment)
+#
+# Records are laid down the way the tag does it.  A directory sector,
+# then REBOOT followed by VERSION, then the record mix.  A SYNC is
+# written every SYNC_MAX_SECTORS sectors or SYNC_PERIOD secs, and each
+# SYNC/REBOOT carries the offset of the previous one (prev_sync).
+#
+# All records are packed through the same object descriptors that are
+# used to decode them (core_headers, sirf_headers) using build (see
+# decode_base).  Field values are handed in as nested dicts keyed the
+# same as the aggies.  Anything not given is packed as zero (or empty
+# string).  build_record fills in len and recsum.
+
+import sys
+import random
+import datetime
+
+from   dt_defs         import *
+import dt_defs         as     dtd
+from   dt_defs         import build_record
+from   tagdump         import DBLK_DIR_SIZE
+
+from   core_headers    import *
+from   sirf_headers    import *
+import sirf_defs       as     sirf
+from   sirf_defs       import SIRF_SOP_SEQ
+from   sirf_defs       import SIRF_EOP_SEQ
+
+from   tagsynthargs    import parseargs
+from   __init__        import __version__   as VERSION
+
+SECTOR_SIZE      = 512
+SYNC_MAX_SECTORS = 8                    # typed_data.h
+SYNC_PERIOD      = 5 * 60               # secs, typed_data.h
+OW_SIG           = 0xfabafaba           # overwatch.h
+IMAGE_INFO_SIG   = 0x33275401
+JIFFIES          = 32768                # rtctime sub_sec
+
+DEFAULT_MIX = {
+    'REBOOT':       0.02,
+    'EVENT':        20,
+    'GPS_RAW':      80,
+    'SENSOR':       0,
+}
+
+# sirf mids we know how to make, and how often
+DEFAULT_MID_MIX = {
+    2:              10,                 # NavData
+    4:              10,                 # NavTrack
+    13:             2,                  # VisList
+    41:             10,                 # GeoData
+    225:            1,                  # Stats, sid 6
+}
+
+gps_events = [ 32, 33, 35, 36, 38, 39, 42, 43, 44, 45, 46, 48 ]
+
+
+def _build(obj, vals):
+    '''build obj from vals, anything not in vals is zero'''
+    obj.zero()
+    return obj.build(vals)
+
+
+def _record(obj, vals, extra = None):
+    '''build a full record, anything not in vals is zero'''
+    obj.zero()
+    return build_record(obj, vals, extra)
+
+
+def rtctime_vals(t):
+    '''rtctime_obj values from a datetime'''
+    return {
+        'sub_sec':  (t.microsecond * JIFFIES) / 1000000,
+        'sec':      t.second,
+        'min':      t.minute,
+        'hr':       t.hour,
+        'dow':      t.weekday(),
+        'day':      t.day,
+        'mon':      t.month,
+        'year':     t.year,
+    }
+
+
+def sirf_packet(mid, payload):
+    '''wrap a sirf payload (after mid) into a full sirfbin packet'''
+    body = bytearray([mid]) + payload
+    pkt  = bytearray(sirf.sirf_hdr_struct.pack(SIRF_SOP_SEQ, len(body)))
+    pkt += body
+    pkt += sirf.sirf_end_struct.pack(sum(body) & 0x7fff, SIRF_EOP_SEQ)
+    return pkt
+
+
+class TagSynth(object):
+    '''
+    build a synthetic data stream.
+
+    records are generated into self.buf and flushed to the output in
+    chunks.  corruption is applied as the chunks go out.
+    '''
+    def __init__(self, out, seed = 0, mix = None, mid_mix = None,
+                 flips = 0, zeros = 0, truncs = 0, verbose = 0):
+        super(TagSynth, self).__init__()
+        self.out      = out
+        self.rnd      = random.Random(seed)
+        self.verbose  = verbose
+        self.mix      = self._cdf(mix     or DEFAULT_MIX)
+        self.mid_mix  = self._cdf(mid_mix or DEFAULT_MID_MIX)
+        self.flips    = flips           # per MB
+        self.zeros    = zeros           # per MB
+        self.truncs   = truncs          # per MB
+
+        self.buf      = bytearray()
+        self.buf_off  = DBLK_DIR_SIZE   # file offset of buf[0]
+        self.recnum   = 0
+        self.now      = datetime.datetime(2018, 1, 1)
+        self.prev_sync = 0
+        self.last_sync_t = self.now
+        self.sched    = 0               # sensor sched_delta
+        self.rtype_count = {}
+        self.mid_count   = {}
+        self.corrupt  = { 'flips': [], 'zeros': [], 'truncs': [] }
+
+    def _cdf(self, weights):
+        items = sorted(weights.items())
+        total = float(sum([ w for k, w in items ]))
+        acc   = 0.0
+        cdf   = []
+        for k, w in items:
+            acc += w / total
+            cdf.append((acc, k))
+        return cdf
+
+    def _pick(self, cdf):
+        r = self.rnd.random()
+        for acc, k in cdf:
+            if r <= acc:
+                return k
+        return cdf[-1][1]
+
+    def offset(self):
+        return self.buf_off + len(self.buf)
+
+    def _hdr(self, rtype):
+        self.recnum += 1
+        self.rtype_count[rtype] = self.rtype_count.get(rtype, 0) + 1
+        return { 'len': 0, 'type': rtype, 'recnum': self.recnum,
+                 'rt': rtctime_vals(self.now), 'recsum': 0 }
+
+    def _lay_down(self, rec):
+        '''append a built record quad aligned.  maybe truncate.'''
+        rlen = len(rec)
+        if self.truncs and \
+           self.rnd.random() < self.truncs * rlen / float(1 << 20):
+            cut = self.rnd.randint(4, rlen - 1)
+            self.corrupt['truncs'].append(self.offset())
+            rec = rec[:cut]
+        self.buf += rec
+        pad = -len(self.buf) & 3
+        if pad:
+            self.buf += bytearray(pad)
+
+    def sync_due(self):
+        return (self.offset() - self.prev_sync >= SYNC_MAX_SECTORS * SECTOR_SIZE or
+                (self.now - self.last_sync_t).total_seconds() >= SYNC_PERIOD)
+
+    def reboot(self):
+        offset = self.offset()
+        owcb = _build(owcb_obj, {
+            'ow_sig':        OW_SIG,
+            'ow_sig_b':      OW_SIG,
+            'ow_sig_c':      OW_SIG,
+            'uptime':        self.rnd.getrandbits(32),
+            'from_base':     0,
+            'reboot_reason': self.rnd.choice([1, 4, 6, 7, 8]),
+            'ow_boot_mode':  2,
+            'reboot_count':  self.rtype_count.get(DT_REBOOT, 1),
+            'elapsed':       self.rnd.getrandbits(32),
+        })
+        self._lay_down(_record(dt_reboot_obj, {
+            'hdr':       self._hdr(DT_REBOOT),
+            'prev_sync': self.prev_sync,
+            'majik':     dtd.dt_sync_majik,
+            'dt_rev':    DT_H_REVISION,
+            'base':      0x20000,
+        }, owcb))
+        self.prev_sync   = offset
+        self.last_sync_t = self.now
+        self.version()
+
+    def version(self):
+        image_info = _build(image_info_obj, {
+            'ii_sig':     IMAGE_INFO_SIG,
+            'im_start':   0x20000,
+            'im_len':     0x1e000,
+            'ver_id':     { 'build': 63, 'minor': 2, 'major': 0 },
+            'desc0':      'heads/tagsynth-0-g0000000\0',
+            'desc1':      'heads/tagsynth-0-g0000000\0',
+            'build_date': 'Mon Jan  1 00:00:00 UTC 2018\0',
+            'hw_ver':     { 'rev': 1, 'model': 0xf0 },
+        })
+        self._lay_down(_record(dt_version_obj, {
+            'hdr':  self._hdr(DT_VERSION),
+            'base': 0x20000,
+        }, image_info))
+
+    def sync(self):
+        offset = self.offset()
+        self._lay_down(_record(dt_sync_obj, {
+            'hdr':       self._hdr(DT_SYNC),
+            'prev_sync': self.prev_sync,
+            'majik':     dtd.dt_sync_majik,
+        }))
+        self.prev_sync   = offset
+        self.last_sync_t = self.now
+
+    def event(self):
+        rnd = self.rnd
+        self._lay_down(_record(dt_event_obj, {
+            'hdr':   self._hdr(DT_EVENT),
+            'event': rnd.choice(gps_events),
+            'arg0':  rnd.randint(0, 1000),
+            'arg1':  rnd.randint(0, 1000),
+        }))
+
+    def sirf_payload(self, mid):
+        rnd = self.rnd
+        if mid == 2:
+            return _build(sirf_nav_obj, {
+                'xpos': -2700000 + rnd.randint(-500, 500),
+                'ypos': -4300000 + rnd.randint(-500, 500),
+                'zpos':  3850000 + rnd.randint(-500, 500),
+                'mode1': 4, 'hdop': rnd.randint(4, 20),
+                'week10': 972, 'tow': rnd.randint(0, 60480000),
+                'nsats': rnd.randint(4, 12),
+                'prns': ''.join([ chr(rnd.randint(1, 32)) for i in range(12) ]),
+            })
+        if mid == 4:
+            chans = 12
+            p = _build(sirf_navtrk_obj, {
+                'week10': 972, 'tow': rnd.randint(0, 60480000),
+                'chans': chans })
+            for n in range(chans):
+                cno = rnd.randint(0, 45)
+                vals = { 'sv_id': n + 1, 'sv_az23': rnd.randint(0, 240),
+                         'sv_el2': rnd.randint(0, 180), 'state': 0xbf }
+                for i in range(10):
+                    vals['cno' + str(i)] = cno
+                p += _build(sirf_navtrk_chan, vals)
+            return p
+        if mid == 13:
+            n = rnd.randint(4, 12)
+            p = _build(sirf_vis_obj, { 'vis_sats': n })
+            for i in range(n):
+                p += _build(sirf_vis_azel, { 'sv_id': i + 1,
+                                             'sv_az': rnd.randint(0, 359),
+                                             'sv_el': rnd.randint(0, 90) })
+            return p
+        if mid == 41:
+            t = self.now
+            return _build(sirf_geo_obj, {
+                'nav_valid': 0, 'nav_type': 0x204, 'week_x': 1996,
+                'tow': rnd.randint(0, 604800000),
+                'utc_year': t.year, 'utc_month': t.month, 'utc_day': t.day,
+                'utc_hour': t.hour, 'utc_min': t.minute,
+                'utc_ms': t.second * 1000 + t.microsecond / 1000,
+                'lat':  343000000 + rnd.randint(-10000, 10000),
+                'lon': -1198000000 + rnd.randint(-10000, 10000),
+                'alt_elipsoid': rnd.randint(0, 10000),
+                'alt_msl': rnd.randint(0, 10000),
+                'nsats': rnd.randint(4, 12), 'hdop': rnd.randint(4, 20),
+            })
+        if mid == 225:
+            return _build(sirf_statistics_obj, {
+                'sid': 6, 'ttff_reset': rnd.randint(10, 600),
+                'ttff_aiding': rnd.randint(10, 600),
+                'ttff_nav': rnd.randint(10, 600),
+            })
+        return bytearray()
+
+    def gps_raw(self):
+        mid = self._pick(self.mid_mix)
+        self.mid_count[mid] = self.mid_count.get(mid, 0) + 1
+        pkt = sirf_packet(mid, self.sirf_payload(mid))
+        self._lay_down(_record(dt_gps_hdr_obj, {
+            'hdr':  self._hdr(DT_GPS_RAW_SIRFBIN),
+            'mark': self.rnd.randint(0, 1 << 31),
+            'chip': 1,
+            'dir':  0,
+        }, pkt))
+
+    def sensor(self):
+        '''SENSOR_DATA (one sensor) or SENSOR_SET (a few), random datums'''
+        rnd = self.rnd
+        self.sched += rnd.choice([ 1000, 1000, 5000 ])
+        ids = sorted(sns_structs.keys())
+        if rnd.random() < 0.5:
+            sns_id = rnd.choice(ids)
+            s = sns_structs[sns_id]
+            payload = s.pack(*[ rnd.randint(0, 0xffff)
+                                for i in range(s.size / 2) ])
+            self._lay_down(_record(dt_sen_data_obj, {
+                'hdr':         self._hdr(DT_SENSOR_DATA),
+                'sched_delta': self.sched,
+                'sns_id':      sns_id,
+            }, payload))
+            return
+        mask, payload = 0, ''
+        for sns_id in sorted(rnd.sample(ids, rnd.randint(2, 4))):
+            s = sns_structs[sns_id]
+            mask    |= 1 << sns_id
+            payload += s.pack(*[ rnd.randint(0, 0xffff)
+                                 for i in range(s.size / 2) ])
+        self._lay_down(_record(dt_sen_set_obj, {
+            'hdr':         self._hdr(DT_SENSOR_SET),
+            'sched_delta': self.sched,
+            'mask':        mask,
+            'mask_id':     1,
+        }, payload))
+
+    def _corrupt(self, chunk, chunk_off):
+        '''apply bit flips and zeroed sectors to a chunk about to go out'''
+        mb  = len(chunk) / float(1 << 20)
+        rnd = self.rnd
+        for i in range(int(self.zeros * mb + rnd.random())):
+            s = rnd.randrange(0, len(chunk), SECTOR_SIZE)
+            chunk[s:s + SECTOR_SIZE] = bytearray(len(chunk[s:s + SECTOR_SIZE]))
+            self.corrupt['zeros'].append(chunk_off + s)
+        for i in range(int(self.flips * mb + rnd.random())):
+            b = rnd.randrange(len(chunk))
+            chunk[b] ^= 1 << rnd.randint(0, 7)
+            self.corrupt['flips'].append(chunk_off + b)
+
+    def flush(self, final = False):
+        '''write out whole sectors (everything if final)'''
+        n = len(self.buf) if final else len(self.buf) & ~(SECTOR_SIZE - 1)
+        if n == 0:
+            return
+        chunk = self.buf[:n]
+        if self.flips or self.zeros:
+            self._corrupt(chunk, self.buf_off)
+        self.out.write(chunk)
+        del self.buf[:n]
+        self.buf_off += n
+
+    def generate(self, size):
+        '''generate about size bytes of data stream'''
+        self.out.write(bytearray(DBLK_DIR_SIZE))
+        self.reboot()
+        gen = { 'REBOOT': self.reboot, 'EVENT': self.event,
+                'GPS_RAW': self.gps_raw, 'SENSOR': self.sensor }
+        while self.offset() < size:
+            self.now += datetime.timedelta(
+                microseconds = self.rnd.randint(1000, 2000000))
+            if self.sync_due():
+                self.sync()
+            gen[self._pick(self.mix)]()
+            if len(self.buf) >= (1 << 20):
+                self.flush()
+        self.flush(final = True)
+        return self.offset()
+
+    def display(self):
+        print('*** tagsynth: {} records, {} bytes'.format(
+            self.recnum, self.offset()))
+        print('rtypes: {}'.format(self.rtype_count))
+        print('mids:   {}'.format(self.mid_count))
+        print('corruption: flips: {}  zeros: {}  truncs: {}'.format(
+            len(self.corrupt['flips']), len(self.corrupt['zeros']),
+            len(self.corrupt['truncs'])))
+        if self.verbose:
+            for k in sorted(self.corrupt.keys()):
+                for off in self.corrupt[k]:
+                    print('    {:6s} @{} (0x{:x})'.format(k, off, off))
+
+
+def parse_mix(mix_str):
+    '''NAME=w,GPS_RAW.41=w,... -> (mix, mid_mix)'''
+    mix     = dict(DEFAULT_MIX)
+    mid_mix = {}
+    if not mix_str:
+        return mix, None
+    for item in mix_str.split(','):
+        name, w = item.split('=')
+        name = name.strip().upper()
+        if name.startswith('GPS_RAW.'):
+            mid_mix[int(name.split('.')[1], 0)] = float(w)
+        elif name in mix:
+            mix[name] = float(w)
+        else:
+            raise ValueError('tagsynth: unknown rtype in mix: {}'.format(name))
+    return mix, (mid_mix if mid_mix else None)
+
+
+def synth(args):
+    mix, mid_mix = parse_mix(args.mix)
+    ts = TagSynth(args.output, seed = args.seed, mix = mix,
+                  mid_mix = mid_mix, flips = args.flips, zeros = args.zeros,
+                  truncs = args.truncs, verbose = args.verbose)
+    ts.generate(args.size)
+    ts.display()
+    return ts
+
+
+def main():
+    synth(parseargs())
+
+if __name__ == '__main__':
+    main()
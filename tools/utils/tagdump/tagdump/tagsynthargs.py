@@ -0,0 +1,83 @@
+'''argparse definitions for tagsynth options'''
+
+# Copyright (c) 2018 Eric B. Decker, Daniel J. Maltbie
+# All rights reserved.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# See COPYING in the top level directory of this source tree.
+#
+# Contact: Eric B. Decker <cire831@gmail.com>
+#          Daniel J. Maltbie <dmaltbie@daloma.org>
+
+from   __init__ import __version__ as VERSION
+from   dt_defs  import DT_H_REVISION as DT_REV
+import argparse
+
+def auto_size(x):
+    '''size with optional k, m, g suffix'''
+    mult = { 'k': 1 << 10, 'm': 1 << 20, 'g': 1 << 30 }
+    x = x.lower()
+    if x and x[-1] in mult:
+        return int(float(x[:-1]) * mult[x[-1]])
+    return int(x, 0)
+
+def parseargs():
+    parser = argparse.ArgumentParser(
+        description='Generate a synthetic Tag Data Stream.')
+
+    parser.add_argument('output',
+                        type=argparse.FileType('wb'),
+                        help='output file')
+
+    parser.add_argument('-V', '--version',
+                        action='version',
+                        version='%(prog)s ' + VERSION + ':  dt_rev ' + str(DT_REV))
+
+    parser.add_argument('-s', '--size',
+                        type=auto_size,
+                        default=1 << 20,
+                        help='approximate stream size (k/m/g), default 1m')
+
+    parser.add_argument('--seed',
+                        type=int,
+                        default=0,
+                        help='random seed')
+
+    parser.add_argument('--mix',
+                        help='rtype weights, NAME=w[,...], GPS_RAW.<mid>=w')
+
+    parser.add_argument('--flips',
+                        type=float,
+                        default=0,
+                        help='bit flips per MB')
+
+    parser.add_argument('--zeros',
+                        type=float,
+                        default=0,
+                        help='zeroed sectors per MB')
+
+    parser.add_argument('--truncs',
+                        type=float,
+                        default=0,
+                        help='truncated records per MB')
+
+    parser.add_argument('-v', '--verbose',
+                        action='count',
+                        default=0,
+                        help='increase output verbosity')
+
+    return parser.parse_args()
+
+if __name__ == '__main__':
+    print(parseargs())
@@ -0,0 +1,389 @@
+'''tagdump time - rtctime to UTC correlation for a data stream'''
+
+# Copyright (c) 2018 Eric B. Decker, Daniel J. Maltbie
+# All rights reserved.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# See COPYING in the top level directory of this source tree.
+#
+# Contact: Eric B. Decker <cire831@gmail.com>
+#          Daniel J. Maltbie <dmaltbie@daloma.org>
+
+####
+#
+# tagdump time: map record rtctime to UTC.
+#
+# usage: tagdump time [-h] [--rebuild] [--from UTC] [--to UTC] [-v] input
+#
+#   input           tag data stream
+#   --rebuild       ignore the cache (<input>.tcor), scan from the start
+#   --from, --to    UTC range (unix secs or YYYY/MM/DD-HH:MM:SS), print
+#                   the recnum ranges that cover it
+#
+# Every record carries the tag's rtctime, which is only as good as the
+# RTC: it starts over on some reboots, gets set from the GPS now and
+# then and drifts in between.  (get_systime packs min/sec/sub_sec into 32
+# bits and wraps every hour, we use the whole rtctime as unix seconds.)
+#
+# Anchors.  Each GPS_RAW_SIRFBIN MID 41 from the chip with nav_valid 0
+# ties the record's rtctime (rtc) to the UTC in the packet, giving
+# offset = utc - rtc.  The packet comes out of the chip a little after
+# the fix it reports, that latency ends up in the offset.
+#
+# Segments.  A REBOOT starts a new segment, so does an anchor whose
+# offset is more than STEP_TOL off the previous one (the RTC was set).
+# Within a segment the offset is linear between anchors and held flat
+# past the first and last.  Anchors that the straight line through their
+# neighbours already predicts to within DRIFT_TOL are dropped as they
+# come in, except that one is kept every ANCHOR_SPAN.  A day of 1 Hz
+# fixes comes down to a few hundred anchors.
+#
+# Cache.  <input>.tcor holds the segments, the anchors, the input size
+# and where the scan stopped.  If the input has grown since (a stream
+# still being written), the scan picks up where it stopped.
+#
+#   header      '<4sHIIQQ'  'TCOR', version, segments, anchors,
+#                           size scanned, next offset
+#   segments    recnum (I) of the first record, index (I) of its first
+#               anchor
+#   anchors     recnum (I), rtc (d), offset (d)
+#
+# TimeCorr.utc(recnum, rtc) gives UTC for any record.  It remembers the
+# last bracket it used, so a pass over the records in order is O(1) a
+# record, a random lookup is a bisect.  recnums(t0, t1) gives the recnum
+# ranges that cover a UTC range, for use with the record index (.idx).
+
+import os
+import sys
+import math
+import struct
+import calendar
+from   array        import array
+from   bisect       import bisect_right
+
+import tagdump      as     td
+from   tagdump      import get_record
+from   tagdump      import DBLK_DIR_SIZE
+from   tagfile      import TagFile
+
+from   dt_defs      import DT_REBOOT
+from   dt_defs      import DT_GPS_RAW_SIRFBIN
+from   dt_defs      import dt_hdr_struct
+from   sirf_defs    import SIRF_SOP_SEQ
+from   sirf_defs    import SIRF_MID_OFFSET
+from   sirf_defs    import sirf_hdr_struct
+from   core_headers import dt_gps_hdr_obj
+from   hdr_structs  import structs
+
+__version__ = '0.0.1 (tc)'
+
+JIFFIES         = 32768                 # rtctime sub_sec
+NAN             = float('nan')
+
+STEP_TOL        = 1.0                   # secs, bigger offset step: new segment
+DRIFT_TOL       = 0.002                 # secs, anchors closer than this dropped
+ANCHOR_SPAN     = 300                   # secs, keep at least one this often
+
+TCOR_MAGIC      = 'TCOR'
+TCOR_VERSION    = 1
+tcor_hdr_struct = struct.Struct('<4sHIIQQ')
+
+GPS_DIR_OFFSET  = dt_hdr_struct.size + 5        # mark (4), chip (1), dir
+GPS_SIRF_OFFSET = len(dt_gps_hdr_obj)
+
+geo_struct      = structs['sb_geodetic_t']
+GEO_NAV_VALID   = geo_struct.index['nav_valid']
+GEO_UTC         = geo_struct.index['utc_year']  # year, mon, day, hr, min, ms
+
+
+def rtc_secs(year, mon, day, hr, mn, sec, sub_sec):
+    '''rtctime pieces to unix seconds, nan if they make no sense'''
+    try:
+        return calendar.timegm((year, mon, day, hr, mn, sec)) \
+            + sub_sec / float(JIFFIES)
+    except (ValueError, OverflowError):
+        return NAN
+
+
+class TimeCorr(object):
+    '''
+    piecewise linear rtc -> UTC, see the top of this file.
+    '''
+    def __init__(self):
+        super(TimeCorr, self).__init__()
+        self.seg_recnum = array('I')    # first recnum of each segment
+        self.seg_first  = array('I')    # its first anchor
+        self.recnum     = array('I')    # anchors
+        self.rtc        = array('d')
+        self.offset     = array('d')
+        self.pending    = None          # last anchor seen, not yet kept
+        self.new_seg    = True          # current segment has no anchors
+        self.anchors_seen = 0
+        self.size       = 0             # input bytes covered
+        self.next_off   = DBLK_DIR_SIZE # where to pick up the scan
+        self.cur        = (0, -1, -1)   # utc() bracket: seg, lo, hi
+
+    def add(self, offset, rec_buf):
+        '''look at one record'''
+        rlen, rtype, recnum, sub_sec, sec, mn, hr, dow, day, mon, year, \
+            recsum = dt_hdr_struct.unpack_from(rec_buf)
+        if rtype == DT_REBOOT:
+            self._new_segment(recnum)
+            return
+        if rtype != DT_GPS_RAW_SIRFBIN or \
+           rlen < GPS_SIRF_OFFSET + geo_struct.size or \
+           rec_buf[GPS_DIR_OFFSET] != 0 or \
+           rec_buf[GPS_SIRF_OFFSET + SIRF_MID_OFFSET] != 41 or \
+           sirf_hdr_struct.unpack_from(rec_buf, GPS_SIRF_OFFSET)[0] \
+               != SIRF_SOP_SEQ:
+            return
+        v = geo_struct.unpack_from(rec_buf, GPS_SIRF_OFFSET)
+        if v[GEO_NAV_VALID] != 0:
+            return
+        u_year, u_mon, u_day, u_hr, u_min, u_ms = v[GEO_UTC:GEO_UTC + 6]
+        try:
+            utc = calendar.timegm((u_year, u_mon, u_day, u_hr, u_min, 0)) \
+                  + u_ms / 1000.0
+        except (ValueError, OverflowError):
+            return
+        rtc = rtc_secs(year, mon, day, hr, mn, sec, sub_sec)
+        if math.isnan(rtc):
+            return
+        self.anchors_seen += 1
+        self.anchor(recnum, rtc, utc - rtc)
+
+    def anchor(self, recnum, rtc, off):
+        '''add an anchor, dropping the one before it if it is in line'''
+        if not self.seg_recnum:
+            self._new_segment(0)
+        elif not self.new_seg:
+            prev = self.pending[2] if self.pending else self.offset[-1]
+            if abs(off - prev) > STEP_TOL:
+                self._new_segment(recnum)
+        if self.new_seg:
+            self._keep(recnum, rtc, off)
+            self.new_seg = False
+            return
+        p = self.pending
+        self.pending = (recnum, rtc, off)
+        if p is None:
+            return
+        # is p on the line from the last kept anchor to this one?  keep
+        # one every ANCHOR_SPAN anyway, they bound recnums() ranges.
+        r0, o0 = self.rtc[-1], self.offset[-1]
+        if rtc != r0 and p[1] - r0 < ANCHOR_SPAN:
+            pred = o0 + (off - o0) * (p[1] - r0) / (rtc - r0)
+            if abs(pred - p[2]) <= DRIFT_TOL:
+                return
+        self._keep(*p)
+
+    def _new_segment(self, recnum):
+        self._flush()
+        self.seg_recnum.append(recnum)
+        self.seg_first.append(len(self.recnum))
+        self.new_seg = True
+
+    def _keep(self, recnum, rtc, off):
+        self.recnum.append(recnum)
+        self.rtc.append(rtc)
+        self.offset.append(off)
+
+    def _flush(self):
+        '''keep the pending anchor, the end of a segment'''
+        if self.pending is not None:
+            self._keep(*self.pending)
+            self.pending = None
+
+    def finish(self, size, next_off):
+        self._flush()
+        self.size     = size
+        self.next_off = next_off
+        self.cur      = (0, -1, -1)
+
+    def segment(self, recnum):
+        '''segment index of recnum, -1 if before all of them'''
+        return bisect_right(self.seg_recnum, recnum) - 1
+
+    def _seg_range(self, seg):
+        lo = self.seg_first[seg]
+        hi = self.seg_first[seg + 1] if seg + 1 < len(self.seg_first) \
+             else len(self.recnum)
+        return lo, hi
+
+    def utc(self, recnum, rtc):
+        '''UTC (unix secs) for a record, nan if its segment has no anchors'''
+        seg, lo, hi = self.cur
+        rtcs = self.rtc
+        # fast path: same segment and bracket as last time
+        if not (lo >= 0 and
+                (seg + 1 >= len(self.seg_recnum) or
+                 recnum < self.seg_recnum[seg + 1]) and
+                recnum >= self.seg_recnum[seg] and
+                rtcs[lo] <= rtc and (hi == lo or rtc < rtcs[hi])):
+            if not self.seg_recnum:
+                return NAN
+            seg = max(self.segment(recnum), 0)
+            first, last = self._seg_range(seg)
+            if first == last:
+                return NAN
+            i = bisect_right(rtcs, rtc, first, last) - 1
+            if i < first:
+                lo = hi = first         # before the first anchor
+            elif i >= last - 1:
+                lo = hi = last - 1      # past the last
+            else:
+                lo, hi = i, i + 1
+            self.cur = (seg, lo, hi)
+            if i < first:
+                return rtc + self.offset[first]
+        if hi == lo:
+            return rtc + self.offset[lo]
+        o0 = self.offset[lo]
+        return rtc + o0 + (self.offset[hi] - o0) * (rtc - rtcs[lo]) / \
+                                                   (rtcs[hi] - rtcs[lo])
+
+    def recnums(self, t0, t1):
+        '''
+        [ (lo, hi) ] recnum ranges covering UTC t0..t1, one per segment
+        that overlaps.  bounded by anchors, so a little wide.
+        '''
+        out = []
+        for seg in range(len(self.seg_recnum)):
+            first, last = self._seg_range(seg)
+            if first == last:
+                continue
+            utcs = [ self.rtc[i] + self.offset[i] for i in range(first, last) ]
+            if utcs[-1] < t0 or utcs[0] > t1:
+                continue
+            i = max(bisect_right(utcs, t0) - 1, 0)
+            j = bisect_right(utcs, t1)
+            lo = self.recnum[first + i] if utcs[i] <= t0 else \
+                 self.seg_recnum[seg]
+            if j < len(utcs):
+                hi = self.recnum[first + j]
+            elif seg + 1 < len(self.seg_recnum):
+                hi = self.seg_recnum[seg + 1] - 1
+            else:
+                hi = 0xffffffff
+            out.append((lo, hi))
+        return out
+
+    def write(self, path):
+        with open(path, 'wb') as fd:
+            fd.write(tcor_hdr_struct.pack(TCOR_MAGIC, TCOR_VERSION,
+                len(self.seg_recnum), len(self.recnum), self.size,
+                self.next_off))
+            for col in (self.seg_recnum, self.seg_first, self.recnum,
+                        self.rtc, self.offset):
+                if sys.byteorder != 'little':
+                    col = array(col.typecode, col)
+                    col.byteswap()
+                col.tofile(fd)
+
+    @classmethod
+    def read(cls, path):
+        tc = cls()
+        with open(path, 'rb') as fd:
+            magic, version, nseg, nanc, tc.size, tc.next_off = \
+                tcor_hdr_struct.unpack(fd.read(tcor_hdr_struct.size))
+            if magic != TCOR_MAGIC or version != TCOR_VERSION:
+                raise ValueError('{}: not a tcor file'.format(path))
+            for col, n in ((tc.seg_recnum, nseg), (tc.seg_first, nseg),
+                           (tc.recnum, nanc), (tc.rtc, nanc),
+                           (tc.offset, nanc)):
+                col.fromfile(fd, n)
+                if sys.byteorder != 'little':
+                    col.byteswap()
+        tc.new_seg = not tc.seg_first or tc.seg_first[-1] == len(tc.recnum)
+        return tc
+
+
+def build(path, rebuild = False):
+    '''
+    TimeCorr for the data stream at path, from <path>.tcor when it is
+    current, picking up the scan where it stopped when path has grown.
+    returns (TimeCorr, records scanned).
+    '''
+    cache = path + '.tcor'
+    size  = os.path.getsize(path)
+    tc    = None
+    if not rebuild and os.path.exists(cache):
+        try:
+            tc = TimeCorr.read(cache)
+        except (ValueError, IOError, EOFError, struct.error):
+            tc = None
+        if tc and tc.size > size:
+            tc = None                   # input shrank, start over
+        if tc and tc.size == size:
+            return tc, 0
+    if tc is None:
+        tc = TimeCorr()
+    td.init_globals()
+    infile = TagFile(open(path, 'rb'))
+    infile.seek(tc.next_off)
+    records = 0
+    while (True):
+        rec_offset, hdr, rec_buf = get_record(infile)
+        if (rec_offset < 0):
+            break
+        tc.add(rec_offset, rec_buf)
+        records += 1
+        tc.next_off = rec_offset + dt_hdr_struct.unpack_from(rec_buf)[0]
+    tc.finish(size, tc.next_off)
+    tc.write(cache)
+    return tc, records
+
+
+def utc_arg(x):
+    '''unix secs or YYYY/MM/DD-HH:MM:SS'''
+    try:
+        return float(x)
+    except ValueError:
+        import time
+        return float(calendar.timegm(time.strptime(x, '%Y/%m/%d-%H:%M:%S')))
+
+
+def utc_str(t):
+    import time
+    if math.isnan(t):
+        return '-'
+    return time.strftime('%Y/%m/%d-%H:%M:%S', time.gmtime(t)) + \
+        '.{:03d}'.format(int((t % 1) * 1000))
+
+
+def time_corr(args):
+    '''tagdump time, see the top of this file'''
+    tc, records = build(args.input.name, args.rebuild)
+    print('*** time: {} segments, {} anchors ({} seen this scan), scanned {} records '
+          '-> {}.tcor'.format(len(tc.seg_recnum), len(tc.recnum),
+                              tc.anchors_seen, records, args.input.name))
+    if args.verbose:
+        for seg in range(len(tc.seg_recnum)):
+            first, last = tc._seg_range(seg)
+            print('    seg {:3}  recnum {:>8}  anchors {:5}  offset {}'.format(
+                seg, tc.seg_recnum[seg], last - first,
+                '{:+.3f} .. {:+.3f}s'.format(min(tc.offset[first:last]),
+                                              max(tc.offset[first:last]))
+                if last > first else '-'))
+    if args.verbose >= 2:
+        for i in range(len(tc.recnum)):
+            print('    {:>8}  rtc {}  utc {}  {:+.3f}'.format(
+                tc.recnum[i], utc_str(tc.rtc[i]),
+                utc_str(tc.rtc[i] + tc.offset[i]), tc.offset[i]))
+    if args.t_from is not None or args.t_to is not None:
+        t0 = args.t_from if args.t_from is not None else 0.0
+        t1 = args.t_to   if args.t_to   is not None else float('inf')
+        for lo, hi in tc.recnums(t0, t1):
+            print('    recnums {} .. {}'.format(lo, hi))
+    return tc
@@ -0,0 +1,307 @@
+'''tagdump track - extract a position track from a tag data stream'''
+
+# Copyright (c) 2018 Eric B. Decker, Daniel J. Maltbie
+# All rights reserved.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# See COPYING in the top level directory of this source tree.
+#
+# Contact: Eric B. Decker <cire831@gmail.com>
+#          Daniel J. Maltbie <dmaltbie@daloma.org>
+
+####
+#
+# tagdump track: position fixes from GPS_RAW records.
+#
+# usage: tagdump track [-h] [-o OUTPUT] [--csv] [-v] input
+#
+#   input           tag data stream
+#   -o OUTPUT       track file (args.output), default <input>.trk
+#   --csv           write text (csv) instead of the binary track file
+#
+# The stream is walked with get_record.  GPS_RAW_SIRFBIN records coming
+# from the chip (dir 0) holding a MID 2 (NavData, ECEF) or MID 41
+# (GeoData, lat/lon) packet with a valid fix are collected into columns
+# (array), each fix joined with its record:
+#
+#   recnum      record number
+#   systime     record rtctime as unix seconds (sub_sec is 1/32768)
+#   mid         2 or 41, where the fix came from
+#   lat, lon    degrees, WGS84
+#   alt         meters above the ellipsoid
+#   hdop        hdop (the chip reports hdop * 5)
+#   nsats       satellites in the fix
+#
+# The packets are unpacked straight out of the record buffer with the
+# generated hdr_structs (sb_nav_data_t, sb_geodetic_t), no decoder
+# objects.  MID 2 positions are converted from ECEF to WGS84 in one pass
+# over all fixes at the end (numpy when it is installed, plain math
+# otherwise, same closed form either way).
+#
+# Track file (.trk), little endian:
+#
+#   header      '<4sHI'  'TTRK', version (1), number of fixes n
+#   columns     TRACK_COLS in order, each n values of its array typecode
+#
+# read_track(path) gives the columns back as an OrderedDict of arrays.
+
+import sys
+import math
+import struct
+import calendar
+from   array        import array
+from   collections  import OrderedDict
+
+import tagdump      as     td
+from   tagdump      import get_record
+from   tagdump      import DBLK_DIR_SIZE
+from   tagfile      import TagFile
+
+from   dt_defs      import DT_GPS_RAW_SIRFBIN
+from   dt_defs      import dt_hdr_struct
+from   sirf_defs    import SIRF_SOP_SEQ
+from   sirf_defs    import SIRF_MID_OFFSET
+from   sirf_defs    import sirf_hdr_struct
+from   core_headers import dt_gps_hdr_obj
+from   hdr_structs  import structs
+
+__version__ = '0.0.2 (tt)'
+
+JIFFIES         = 32768                 # rtctime sub_sec
+
+TRACK_MAGIC     = 'TTRK'
+TRACK_VERSION   = 1
+TRACK_COLS      = [ ('recnum',  'I'),
+                    ('systime', 'd'),
+                    ('mid',     'B'),
+                    ('lat',     'd'),
+                    ('lon',     'd'),
+                    ('alt',     'd'),
+                    ('hdop',    'f'),
+                    ('nsats',   'B') ]
+
+track_hdr_struct = struct.Struct('<4sHI')
+
+GPS_DIR_OFFSET  = dt_hdr_struct.size + 5        # mark (4), chip (1), dir
+GPS_SIRF_OFFSET = len(dt_gps_hdr_obj)
+
+nav_struct      = structs['sb_nav_data_t']
+geo_struct      = structs['sb_geodetic_t']
+
+GEO_NAV_VALID   = geo_struct.index['nav_valid']
+GEO_LAT         = geo_struct.index['lat']
+GEO_LON         = geo_struct.index['lon']
+GEO_ALT         = geo_struct.index['alt_elipsoid']
+GEO_NSATS       = geo_struct.index['nsats']
+GEO_HDOP        = geo_struct.index['hdop']
+
+NAV_XPOS        = nav_struct.index['xpos']
+NAV_YPOS        = nav_struct.index['ypos']
+NAV_ZPOS        = nav_struct.index['zpos']
+NAV_MODE1       = nav_struct.index['mode1']
+NAV_HDOP        = nav_struct.index['hdop']
+NAV_NSATS       = nav_struct.index['nsats']
+
+# WGS84
+WGS84_A         = 6378137.0
+WGS84_F         = 1 / 298.257223563
+WGS84_B         = WGS84_A * (1 - WGS84_F)
+WGS84_E2        = WGS84_F * (2 - WGS84_F)
+WGS84_EP2       = WGS84_E2 / (1 - WGS84_E2)
+
+
+def ecef_to_lla(x, y, z):
+    '''
+    ECEF (m) to WGS84 lat/lon (degrees) and alt (m), Bowring's closed
+    form.  x, y, z are sequences of the same length.  returns three
+    array('d').
+    '''
+    try:
+        import numpy as np
+    except ImportError:
+        np = None
+
+    a, b, e2, ep2 = WGS84_A, WGS84_B, WGS84_E2, WGS84_EP2
+    if np is not None:
+        x = np.asarray(x, dtype = float)
+        y = np.asarray(y, dtype = float)
+        z = np.asarray(z, dtype = float)
+        p   = np.hypot(x, y)
+        th  = np.arctan2(z * a, p * b)
+        lat = np.arctan2(z + ep2 * b * np.sin(th) ** 3,
+                         p - e2  * a * np.cos(th) ** 3)
+        lon = np.arctan2(y, x)
+        sl  = np.sin(lat)
+        alt = p * np.cos(lat) + z * sl - a * np.sqrt(1 - e2 * sl * sl)
+        return (array('d', np.degrees(lat).tolist()),
+                array('d', np.degrees(lon).tolist()),
+                array('d', alt.tolist()))
+
+    lats, lons, alts = array('d'), array('d'), array('d')
+    sin, cos, atan2, degrees = math.sin, math.cos, math.atan2, math.degrees
+    for xi, yi, zi in zip(x, y, z):
+        p   = math.hypot(xi, yi)
+        th  = atan2(zi * a, p * b)
+        st, ct = sin(th), cos(th)
+        lat = atan2(zi + ep2 * b * st * st * st, p - e2 * a * ct * ct * ct)
+        sl  = sin(lat)
+        lats.append(degrees(lat))
+        lons.append(degrees(atan2(yi, xi)))
+        alts.append(p * cos(lat) + zi * sl - a * math.sqrt(1 - e2 * sl * sl))
+    return lats, lons, alts
+
+
+class TagTrack(object):
+    '''
+    collect position fixes from a data stream into columns.
+
+    MID 41 fixes go in directly.  MID 2 fixes are held as ECEF (x, y, z,
+    and their row) until finish() converts them all at once.
+    '''
+    def __init__(self):
+        super(TagTrack, self).__init__()
+        self.cols = OrderedDict([ (name, array(code))
+                                  for name, code in TRACK_COLS ])
+        self.ecef = (array('d'), array('d'), array('d'), array('I'))
+        self.n    = 0
+        self.skipped = 0                # packets with no valid fix
+
+    def _row(self, recnum, systime, mid, lat, lon, alt, hdop, nsats):
+        c = self.cols
+        c['recnum'].append(recnum)
+        c['systime'].append(systime)
+        c['mid'].append(mid)
+        c['lat'].append(lat)
+        c['lon'].append(lon)
+        c['alt'].append(alt)
+        c['hdop'].append(hdop)
+        c['nsats'].append(nsats)
+        self.n += 1
+
+    def add(self, offset, rec_buf):
+        '''look at one record, keep it if it is a GPS fix'''
+        rlen, rtype, recnum, sub_sec, sec, mn, hr, dow, day, mon, year, \
+            recsum = dt_hdr_struct.unpack_from(rec_buf)
+        if rtype != DT_GPS_RAW_SIRFBIN or rlen <= GPS_SIRF_OFFSET + 5:
+            return
+        if rec_buf[GPS_DIR_OFFSET] != 0:
+            return                      # tx to the chip
+        start, plen = sirf_hdr_struct.unpack_from(rec_buf, GPS_SIRF_OFFSET)
+        mid = rec_buf[GPS_SIRF_OFFSET + SIRF_MID_OFFSET]
+        if start != SIRF_SOP_SEQ or mid not in (2, 41):
+            return
+        try:
+            systime = calendar.timegm((year, mon, day, hr, mn, sec)) \
+                      + sub_sec / float(JIFFIES)
+        except (ValueError, OverflowError):
+            systime = 0.0
+
+        if mid == 41:
+            if rlen < GPS_SIRF_OFFSET + geo_struct.size:
+                return
+            v = geo_struct.unpack_from(rec_buf, GPS_SIRF_OFFSET)
+            if v[GEO_NAV_VALID] != 0:
+                self.skipped += 1
+                return
+            self._row(recnum, systime, 41, v[GEO_LAT] / 1e7, v[GEO_LON] / 1e7,
+                      v[GEO_ALT] / 100.0, v[GEO_HDOP] / 5.0, v[GEO_NSATS])
+            return
+
+        if rlen < GPS_SIRF_OFFSET + nav_struct.size:
+            return
+        v = nav_struct.unpack_from(rec_buf, GPS_SIRF_OFFSET)
+        xpos, ypos, zpos = v[NAV_XPOS], v[NAV_YPOS], v[NAV_ZPOS]
+        if (v[NAV_MODE1] & 7) == 0 or (xpos == 0 and ypos == 0 and zpos == 0):
+            self.skipped += 1           # mode1: no nav
+            return
+        x, y, z, rows = self.ecef
+        x.append(xpos)
+        y.append(ypos)
+        z.append(zpos)
+        rows.append(self.n)
+        self._row(recnum, systime, 2, 0.0, 0.0, 0.0, v[NAV_HDOP] / 5.0,
+                  v[NAV_NSATS])
+
+    def finish(self):
+        '''convert the MID 2 fixes, all of them in one go'''
+        x, y, z, rows = self.ecef
+        if not rows:
+            return
+        lats, lons, alts = ecef_to_lla(x, y, z)
+        c = self.cols
+        for i, row in enumerate(rows):
+            c['lat'][row] = lats[i]
+            c['lon'][row] = lons[i]
+            c['alt'][row] = alts[i]
+        self.ecef = (array('d'), array('d'), array('d'), array('I'))
+
+    def write(self, fd):
+        '''binary track file, header then the columns'''
+        fd.write(track_hdr_struct.pack(TRACK_MAGIC, TRACK_VERSION, self.n))
+        for name, col in self.cols.items():
+            if sys.byteorder != 'little':
+                col = array(col.typecode, col)
+                col.byteswap()
+            col.tofile(fd)
+
+    def write_csv(self, fd):
+        names = self.cols.keys()
+        fd.write(','.join(names) + '\n')
+        for row in zip(*self.cols.values()):
+            fd.write('{},{:.3f},{},{:.7f},{:.7f},{:.2f},{:.1f},{}\n'.format(*row))
+
+
+def read_track(path):
+    '''columns of a track file, OrderedDict name -> array'''
+    with open(path, 'rb') as fd:
+        magic, version, n = track_hdr_struct.unpack(
+            fd.read(track_hdr_struct.size))
+        if magic != TRACK_MAGIC or version != TRACK_VERSION:
+            raise ValueError('{}: not a track file'.format(path))
+        cols = OrderedDict()
+        for name, code in TRACK_COLS:
+            col = array(code)
+            col.fromfile(fd, n)
+            if sys.byteorder != 'little':
+                col.byteswap()
+            cols[name] = col
+    return cols
+
+
+def track(args):
+    '''tagdump track, see the top of this file'''
+    td.init_globals()
+    infile = TagFile(args.input)
+    infile.seek(DBLK_DIR_SIZE)
+    trk = TagTrack()
+    while (True):
+        rec_offset, hdr, rec_buf = get_record(infile)
+        if (rec_offset < 0):
+            break
+        trk.add(rec_offset, rec_buf)
+    trk.finish()
+
+    output = args.output or args.input.name + ('.csv' if args.csv else '.trk')
+    with open(output, 'w' if args.csv else 'wb') as fd:
+        if args.csv:
+            trk.write_csv(fd)
+        else:
+            trk.write(fd)
+    print('*** track: {} fixes ({} MID 2, {} no fix) -> {}'.format(
+        trk.n, trk.cols['mid'].count(2), trk.skipped, output))
+    if args.verbose and trk.n:
+        lat, lon = trk.cols['lat'], trk.cols['lon']
+        print('    lat {:.5f} .. {:.5f}  lon {:.5f} .. {:.5f}'.format(
+            min(lat), max(lat), min(lon), max(lon)))
+    return trk